@@ -1,14 +1,12 @@
 import os
 import uuid
-import torch
 import logging
 import time
 import wave
 from typing import List
-from funasr import AutoModel
 from abc import ABC, abstractmethod
-from funasr.utils.postprocess_utils import rich_transcription_postprocess
 from core.utils.redirect import suppress_stderr, redirect_to_logger_low_level
+from core.utils.tracer import tracer, MARK_ASR_DONE
 
 # TODO 若音频输入需要通过网络传播，则可以考虑使用Opus编码代替PCM编码，以降低传输带宽
 
@@ -29,6 +27,10 @@ class FunASRClient(BaseASRClient):
     def __init__(self, config: dict):
         self.model_dir = config.get("model_dir", "")
         self.device = config.get("device", "cpu")
+        # 延迟导入funasr（及其依赖的torch），仅在创建ASR组件时才导入
+        from funasr import AutoModel
+        from funasr.utils.postprocess_utils import rich_transcription_postprocess
+        self._postprocess = rich_transcription_postprocess
         # 将FunASR的debug信息重定向到logger
         with redirect_to_logger_low_level(logger):
             self.model = AutoModel(
@@ -75,6 +77,7 @@ class FunASRClient(BaseASRClient):
                 batch_size_s=60 # 表示采用动态 batch，batch 中总音频时长，单位为秒 s。
             )
         # 使用 rich_transcription_postprocess 对结果进行后处理
-        result = rich_transcription_postprocess(result[0]["text"]) 
+        result = self._postprocess(result[0]["text"]) 
         logger.debug(f"ASR结果：{result}，耗时: {time.time() - start_time} 秒")
+        tracer.mark(MARK_ASR_DONE, session_id)
         return result
@@ -1,3 +1,6 @@
 from core.component.audio.handler import AudioHandler
+from core.component.audio.filler import FillerAudioLibrary, FillerPlayer
+from core.component.audio.ogg_opus import OggOpusDecoder, decode_audio_stream
+from core.component.audio.spoken import SpokenTextTracker
 
-__all__ = ["AudioHandler"]
\ No newline at end of file
+__all__ = ["AudioHandler", "FillerAudioLibrary", "FillerPlayer", "OggOpusDecoder", "decode_audio_stream", "SpokenTextTracker"]
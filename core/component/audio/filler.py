@@ -0,0 +1,171 @@
+import os
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Dict, List, Set, Optional, AsyncGenerator
+
+from core.component.audio.ogg_opus import decode_audio_stream
+from core.component.llm.llm_client import tool_call_gate
+
+logger = logging.getLogger(__name__)
+
+FILLER_TOOL_CALL = "tool_call"                  # 开始调用工具时
+FILLER_SLOW_FIRST_TOKEN = "slow_first_token"    # LLM首token迟迟未到时
+
+DEFAULT_PHRASES = {
+    FILLER_TOOL_CALL: ["好的，我查一下。", "稍等，我看看。"],
+    FILLER_SLOW_FIRST_TOKEN: ["嗯，", "让我想想。"],
+}
+DEFAULT_FIRST_TOKEN_TIMEOUT_MS = 800
+DEFAULT_MAX_PER_TURN = 2
+
+class FillerAudioLibrary:
+    """补位音频库：启动时将若干短语合成为PCM并缓存，对话过程中直接播放，无需等待TTS
+
+    指定cache_dir时，合成结果按（说话人、采样率、短语）保存到磁盘，之后启动时直接加载。
+    """
+    def __init__(self, config: Optional[dict] = None):
+        config = config or {}
+        self.phrases: Dict[str, List[str]] = config.get("phrases", DEFAULT_PHRASES)
+        self.cache_dir: str = config.get("cache_dir", "")
+        self._audio: Dict[str, List[bytes]] = {}
+        self._next: Dict[str, int] = {}
+
+    @staticmethod
+    async def _synthesize(tts_client, text: str) -> bytes:
+        async def text_stream():
+            yield text
+        audio_stream = decode_audio_stream(
+            tts_client.astream_tts(text_stream()),
+            getattr(tts_client, "audio_format", "pcm"),
+            getattr(tts_client, "audio_sample_rate", 24000)
+        )
+        return b"".join([chunk async for chunk in audio_stream if chunk])
+
+    def _cache_path(self, voice: str, text: str) -> str:
+        name = hashlib.sha1(f"{voice}|{text}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.pcm")
+
+    async def prepare(self, tts_client) -> None:
+        """合成（或从磁盘加载）所有短语。TTS客户端的会话不支持并发，因此逐条合成"""
+        start_time = time.perf_counter()
+        voice = f"{getattr(tts_client, 'speaker', '')}_{getattr(tts_client, 'audio_sample_rate', '')}"
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        synthesized = 0
+        for kind, phrases in self.phrases.items():
+            self._audio[kind] = []
+            for text in phrases:
+                path = self._cache_path(voice, text) if self.cache_dir else ""
+                if path and os.path.exists(path):
+                    with open(path, "rb") as f:
+                        pcm = f.read()
+                else:
+                    try:
+                        pcm = await self._synthesize(tts_client, text)
+                    except Exception as e:
+                        logger.error(f"合成补位音频失败: {text}, {str(e)}")
+                        continue
+                    synthesized += 1
+                    if path and pcm:
+                        with open(path, "wb") as f:
+                            f.write(pcm)
+                if pcm:
+                    self._audio[kind].append(pcm)
+        total = sum(len(items) for items in self._audio.values())
+        logger.info(f"补位音频准备完成: {total} 条（新合成 {synthesized} 条），耗时: {(time.perf_counter() - start_time) * 1000:.1f} ms")
+
+    def pick(self, kind: str) -> Optional[bytes]:
+        """按顺序轮换取出一条补位音频，避免每次都是同一句"""
+        items = self._audio.get(kind)
+        if not items:
+            return None
+        index = self._next.get(kind, 0)
+        self._next[kind] = index + 1
+        return items[index % len(items)]
+
+class FillerPlayer:
+    """补位音频的播放策略
+
+    - 开始调用工具、且本轮尚未输出任何文本时，播放"好的，我查一下"之类的短语；
+    - 用户说完话后超过first_token_timeout_ms仍未收到LLM的首token时，播放"嗯，"之类的短语。
+    补位音频仅在扬声器空闲时播放，真实音频到达后由AudioHandler淡出；每轮最多播放max_per_turn次。
+    """
+    def __init__(self, audio_handler, config: Optional[dict] = None):
+        config = config or {}
+        self.audio_handler = audio_handler
+        self.enabled: bool = config.get("enabled", True)
+        self.first_token_timeout: float = config.get("first_token_timeout_ms", DEFAULT_FIRST_TOKEN_TIMEOUT_MS) / 1000
+        self.max_per_turn: int = config.get("max_per_turn", DEFAULT_MAX_PER_TURN)
+        self.library = FillerAudioLibrary(config)
+
+        self._turn_active = False
+        self._got_first_token = False
+        self._played: List[str] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # 等待推测执行被采纳的工具调用通知
+        self._deferred: Set[asyncio.Task] = set()
+
+    async def prepare(self, tts_client) -> None:
+        if self.enabled:
+            await self.library.prepare(tts_client)
+
+    def start_turn(self) -> None:
+        """用户说完话时调用，开始等待LLM首token的计时"""
+        self._turn_active = True
+        self._got_first_token = False
+        self._played = []
+        if self.enabled and self.first_token_timeout > 0:
+            self._timer = asyncio.get_running_loop().call_later(self.first_token_timeout, self._play, FILLER_SLOW_FIRST_TOKEN)
+
+    def end_turn(self) -> List[str]:
+        """本轮结束或被打断时调用，立即停止补位音频，返回本轮播放过的补位类型"""
+        self._turn_active = False
+        self._cancel_timer()
+        # 未被采纳的推测执行不会放行工具调用，不再等待
+        for task in self._deferred:
+            task.cancel()
+        self.audio_handler.stop_filler(fade=False)
+        return self._played
+
+    def on_tool_call(self, tool_name: str) -> None:
+        """LLM开始调用工具时的回调
+
+        推测执行中的工具调用在采纳后才开始执行，此时本轮可能尚未开始，推测也可能不被采纳，
+        因此等到采纳（tool_call_gate被设置）时再播放。
+        """
+        gate = tool_call_gate.get()
+        if gate is not None and not gate.is_set():
+            task = asyncio.create_task(self._on_gate_open(gate, tool_name), name='filler_deferred_tool_call')
+            self._deferred.add(task)
+            task.add_done_callback(self._deferred.discard)
+            return
+        if not self._got_first_token:
+            self._play(FILLER_TOOL_CALL)
+
+    async def _on_gate_open(self, gate: asyncio.Event, tool_name: str) -> None:
+        await gate.wait()
+        if not self._got_first_token:
+            self._play(FILLER_TOOL_CALL)
+
+    async def watch(self, text_stream: AsyncGenerator[str, None]) -> AsyncGenerator[str, None]:
+        """透传LLM的文本流，收到首token时取消计时"""
+        async for text in text_stream:
+            if not self._got_first_token and text:
+                self._got_first_token = True
+                self._cancel_timer()
+            yield text
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _play(self, kind: str) -> None:
+        if not self.enabled or not self._turn_active or len(self._played) >= self.max_per_turn:
+            return
+        pcm = self.library.pick(kind)
+        if pcm is not None and self.audio_handler.play_filler(pcm):
+            self._played.append(kind)
+            logger.debug(f"播放补位音频: {kind}")
@@ -6,6 +6,8 @@ import wave
 from typing import Optional, Dict, Any, List
 import numpy as np
 from core.utils.redirect import suppress_stderr
+from core.component.audio.silence import SilenceStats, FRAME_SILENCE, FRAME_AUDIO, FRAME_FILLER
+from core.utils.tracer import tracer, MARK_FIRST_SPEAKER_SAMPLE
 import asyncio
 from scipy.signal import resample_poly
 from dataclasses import dataclass
@@ -72,6 +74,16 @@ class AudioHandler:
         self.istream_active: bool = True # 控制回调函数中的行为，为True时，拾音并写入buffer；为False时，屏蔽麦克风输入。
         self.ostream_active: bool = True # 控制回调函数中的行为，为True时，播放buffer中的数据；为False时，静默。
 
+        # 补位音频（如"好的，我查一下"）：仅在ostream_buffer为空时播放，真实音频到达后淡出
+        self.filler_buffer: queue.Queue = queue.Queue()
+        self._filler_fade: Optional[bytes] = None
+        # 当前一轮对话的扬声器静默统计，由输出回调逐帧记录
+        self.silence_stats: Optional[SilenceStats] = None
+        # 当前一轮对话的追踪id，首个回复音频帧送入扬声器时打点后清空
+        self._trace_session: Optional[str] = None
+        # 当前一轮对话已送入扬声器的回复音频字节数（不含补位音频），被打断时据此确定用户听到的文本
+        self.played_bytes: int = 0
+
         self.tmp_dir = config.get("tmp_dir", "")
 
     async def init(self) -> None:
@@ -142,23 +154,91 @@ class AudioHandler:
         return None, pyaudio.paContinue
 
     # 1. ostream未激活时，输出静音
-    # 2. 激活，但输出队列为空时，输出静音
-    # 3. 激活，且输出队列非空时，取出元素, 若有效则输出，否则输出静音
+    # 2. 激活时，按优先级取出一帧：淡出中的补位音频 > 输出队列 > 补位音频队列
+    # 3. 都为空，或取出的元素无效时，输出静音
     def _ostream_callback(self, in_data: bytes, frame_count: int, time_info: Dict, status: int) -> tuple:
         """音频输出回调函数"""
-        try:
-            if self.ostream_active:
-                data = self.ostream_buffer.get_nowait()
-                if data is None:
-                    data = b'\x00' * frame_count * BYTES_PER_SAMPLE # 静音
-            else:
-                # bytes_per_frame = self.channels * pyaudio.get_sample_size(pyaudio.paInt16)
-                # 单通道16位，bytes_per_frame = 1 * 2 = 2 字节
-                data = b'\x00' * frame_count * BYTES_PER_SAMPLE # 静音
-        except queue.Empty:
+        data, kind = None, FRAME_SILENCE
+        if self.ostream_active:
+            data, kind = self._next_output_frame()
+        stats = self.silence_stats
+        if stats is not None:
+            stats.record(kind)
+        if kind == FRAME_AUDIO:
+            self.played_bytes += len(data)
+        if kind == FRAME_AUDIO and self._trace_session is not None:
+            tracer.mark(MARK_FIRST_SPEAKER_SAMPLE, self._trace_session)
+            self._trace_session = None
+        if data is None:
+            # bytes_per_frame = self.channels * pyaudio.get_sample_size(pyaudio.paInt16)
+            # 单通道16位，bytes_per_frame = 1 * 2 = 2 字节
             data = b'\x00' * frame_count * BYTES_PER_SAMPLE # 静音
         return data, pyaudio.paContinue
 
+    def _next_output_frame(self) -> tuple:
+        """取出下一帧待播放的数据及其类型"""
+        fade = self._filler_fade
+        if fade is not None:
+            self._filler_fade = None
+            return fade, FRAME_FILLER
+        try:
+            data = self.ostream_buffer.get_nowait()
+            return data, FRAME_AUDIO if data is not None else FRAME_SILENCE
+        except queue.Empty:
+            pass
+        try:
+            return self.filler_buffer.get_nowait(), FRAME_FILLER
+        except queue.Empty:
+            return None, FRAME_SILENCE
+
+    def play_filler(self, pcm: bytes) -> bool:
+        """播放一段补位音频（PCM），已有补位音频在播放时忽略
+
+        Returns:
+            是否开始播放
+        """
+        if not self.filler_buffer.empty():
+            return False
+        _size = self.output_config.frames_per_buffer * BYTES_PER_SAMPLE
+        for i in range(0, len(pcm), _size):
+            frame = pcm[i:i + _size]
+            if len(frame) < _size:
+                frame += b'\x00' * (_size - len(frame))
+            self.filler_buffer.put(frame)
+        return True
+
+    def stop_filler(self, fade: bool = True) -> None:
+        """停止补位音频
+
+        Args:
+            fade: 为True时，将下一帧补位音频淡出后播放，避免声音戛然而止；被打断时传入False立即静音
+        """
+        next_frame = None
+        while True:
+            try:
+                frame = self.filler_buffer.get_nowait()
+            except queue.Empty:
+                break
+            if next_frame is None:
+                next_frame = frame
+        if next_frame is not None and fade:
+            samples = np.frombuffer(next_frame, dtype=np.int16)
+            self._filler_fade = (samples * np.linspace(1.0, 0.0, len(samples))).astype(np.int16).tobytes()
+        elif not fade:
+            self._filler_fade = None
+
+    def begin_turn(self, session_id: Optional[str] = None) -> None:
+        """开始统计一轮对话的扬声器静默，应在用户说完话时调用"""
+        self.silence_stats = SilenceStats(frame_ms=self.output_config.chunk_duration_ms)
+        self._trace_session = session_id
+        self.played_bytes = 0
+
+    def end_turn(self) -> Optional[Dict[str, Any]]:
+        """结束本轮的静默统计并返回结果"""
+        stats, self.silence_stats = self.silence_stats, None
+        self._trace_session = None
+        return stats.summary() if stats is not None else None
+
     def _start_streams(self):
         if self.istream is not None:
             self.istream.start_stream()
@@ -241,6 +321,9 @@ class AudioHandler:
         try:
             async for chunk in audio_stream:
                 if chunk is not None:
+                    # 真实音频到达，淡出正在播放的补位音频
+                    if not self.filler_buffer.empty():
+                        self.stop_filler()
                     chunks.extend(chunk)
                     while len(chunks) >= _size:
                         self.ostream_buffer.put(bytes(chunks[:_size]))
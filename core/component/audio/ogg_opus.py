@@ -0,0 +1,119 @@
+import struct
+import logging
+from typing import AsyncGenerator, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)     # Opus解码器支持的输出采样率
+MAX_FRAME_MS = 120                                          # Opus单个包的最大时长
+OUTPUT_CHANNELS = 1                                         # 扬声器按单声道播放，立体声流由解码器直接混为单声道
+
+_PAGE_HEADER = struct.Struct("<4sBBqIIIB")     # capture_pattern, version, header_type, granule, serial, seq, crc, segments
+_CONTINUED_PACKET = 0x01
+
+class OggPacketReader:
+    """增量的Ogg解复用
+
+    按任意边界喂入字节流，输出其中完整的包；跨页的包会被拼接。
+    传输层（WebSocket/TLS）已保证数据完整，这里不校验页的CRC。
+    """
+    def __init__(self):
+        self._buffer = bytearray()
+        self._packet = bytearray()
+        self.pages = 0
+
+    def feed(self, data: bytes) -> List[bytes]:
+        self._buffer.extend(data)
+        buffer = self._buffer
+        packets = []
+        offset = 0
+        while len(buffer) - offset >= _PAGE_HEADER.size:
+            if buffer[offset:offset + 4] != b"OggS":
+                # 失步时跳到下一个页头
+                index = buffer.find(b"OggS", offset + 1)
+                if index < 0:
+                    offset = max(offset, len(buffer) - 3)
+                    break
+                offset = index
+                continue
+            _, _, header_type, _, _, _, _, segments = _PAGE_HEADER.unpack_from(buffer, offset)
+            body_offset = offset + _PAGE_HEADER.size + segments
+            if len(buffer) < body_offset:
+                break
+            lacing = buffer[offset + _PAGE_HEADER.size:body_offset]
+            page_end = body_offset + sum(lacing)
+            if len(buffer) < page_end:
+                break
+            if self._packet and not header_type & _CONTINUED_PACKET:
+                logger.warning("Ogg流中的包不完整，已丢弃")
+                self._packet.clear()
+            position = body_offset
+            for size in lacing:
+                self._packet.extend(buffer[position:position + size])
+                position += size
+                # 长度为255的段表示包在下一段（可能在下一页）继续
+                if size < 255:
+                    packets.append(bytes(self._packet))
+                    self._packet.clear()
+            offset = page_end
+            self.pages += 1
+        del buffer[:offset]
+        return packets
+
+def _opuslib_decoder(sample_rate: int, channels: int):
+    # 延迟导入opuslib（依赖系统的libopus），仅在使用ogg_opus格式时才需要
+    import opuslib
+    return opuslib.Decoder(sample_rate, channels)
+
+class OggOpusDecoder:
+    """增量地将Ogg/Opus流解码为16位单声道PCM
+
+    每个会话的流以OpusHead开头，遇到新的OpusHead时重建解码器；按OpusHead中的pre-skip丢弃开头的填充样本。
+    """
+    def __init__(self, sample_rate: int, decoder_factory: Optional[Callable[[int, int], object]] = None):
+        if sample_rate not in OPUS_SAMPLE_RATES:
+            raise ValueError(f"Opus不支持的采样率: {sample_rate}，可选: {OPUS_SAMPLE_RATES}")
+        self.sample_rate = sample_rate
+        self.reader = OggPacketReader()
+        self._decoder_factory = decoder_factory or _opuslib_decoder
+        self._decoder = None
+        self._max_frame_size = sample_rate * MAX_FRAME_MS // 1000
+        self._skip_bytes = 0
+        self.packets = 0
+
+    def feed(self, data: bytes) -> bytes:
+        """喂入一段Ogg/Opus数据，返回其中能完整解码的PCM（可能为空）"""
+        pcm = bytearray()
+        for packet in self.reader.feed(data):
+            if packet.startswith(b"OpusHead"):
+                pre_skip = struct.unpack_from("<H", packet, 10)[0]    # 以48kHz计的样本数
+                self._skip_bytes = pre_skip * self.sample_rate // 48000 * 2 * OUTPUT_CHANNELS
+                self._decoder = self._decoder_factory(self.sample_rate, OUTPUT_CHANNELS)
+                continue
+            if packet.startswith(b"OpusTags"):
+                continue
+            if self._decoder is None:
+                raise RuntimeError("Ogg/Opus流缺少OpusHead")
+            frame = self._decoder.decode(packet, self._max_frame_size)
+            self.packets += 1
+            if self._skip_bytes:
+                skipped = min(self._skip_bytes, len(frame))
+                self._skip_bytes -= skipped
+                frame = frame[skipped:]
+            pcm.extend(frame)
+        return bytes(pcm)
+
+async def decode_audio_stream(audio_stream: AsyncGenerator[bytes, None], audio_format: str,
+                              sample_rate: int) -> AsyncGenerator[bytes, None]:
+    """按TTS的音频格式将音频流转换为可直接播放的PCM流：pcm原样输出，ogg_opus增量解码"""
+    if audio_format == "pcm":
+        async for chunk in audio_stream:
+            yield chunk
+        return
+    if audio_format != "ogg_opus":
+        raise ValueError(f"不支持播放的音频格式: {audio_format}，可选: pcm/ogg_opus")
+    decoder = OggOpusDecoder(sample_rate)
+    async for chunk in audio_stream:
+        pcm = decoder.feed(chunk)
+        if pcm:
+            yield pcm
@@ -0,0 +1,51 @@
+from dataclasses import dataclass
+from typing import Optional, Dict, Any
+
+# 输出帧的类型
+FRAME_SILENCE = None
+FRAME_AUDIO = "audio"       # 回复音频
+FRAME_FILLER = "filler"     # 补位音频
+
+@dataclass
+class SilenceStats:
+    """一轮对话中扬声器的静默统计，以输出帧为单位计数
+
+    从用户说完话（begin_turn）开始，到回复播放完成（end_turn）为止：
+    - 首个有声帧之前的静默，即用户感知到的响应延迟；
+    - 首个有声帧之后的静默间隙，如等待工具调用结果时的停顿。
+    补位音频同样计为有声帧。
+    """
+    frame_ms: float
+    frames: int = 0
+    first_audio_frame: Optional[int] = None
+    gap_frames: int = 0         # 首个有声帧之后的静默帧数（不含结尾）
+    max_gap_frames: int = 0
+    filler_frames: int = 0
+    _current_gap: int = 0
+
+    def record(self, kind: Optional[str]) -> None:
+        """记录一帧输出，由音频输出回调调用"""
+        self.frames += 1
+        if kind is FRAME_SILENCE:
+            if self.first_audio_frame is not None:
+                self._current_gap += 1
+            return
+        if self.first_audio_frame is None:
+            self.first_audio_frame = self.frames - 1
+        elif self._current_gap:
+            # 静默间隙在有声帧恢复时才计入，结尾的静默不算作间隙
+            self.gap_frames += self._current_gap
+            self.max_gap_frames = max(self.max_gap_frames, self._current_gap)
+            self._current_gap = 0
+        if kind == FRAME_FILLER:
+            self.filler_frames += 1
+
+    def summary(self) -> Dict[str, Any]:
+        first_silent = self.first_audio_frame if self.first_audio_frame is not None else self.frames
+        return {
+            "first_audio_ms": round(first_silent * self.frame_ms, 1),
+            "gap_ms": round(self.gap_frames * self.frame_ms, 1),
+            "max_gap_ms": round(self.max_gap_frames * self.frame_ms, 1),
+            "filler_ms": round(self.filler_frames * self.frame_ms, 1),
+            "heard_audio": self.first_audio_frame is not None,
+        }
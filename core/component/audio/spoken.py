@@ -0,0 +1,86 @@
+import logging
+from typing import List, AsyncGenerator
+
+from core.component.tts.doubao_codec import EVENT_TTSSentenceStart, EVENT_TTSSentenceEnd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHARS_PER_SECOND = 4.5  # 当前句尚未合成完（时长未知）时，按该语速估算已播放的字数
+
+class SpokenTextTracker:
+    """记录每句文本在输出音频中的字节区间，回复被打断时按扬声器的播放位置得到用户实际听到的文本
+
+    TTS通过分句回调（EVENT_TTSSentenceStart/End）通知句子边界，回调发生在音频流的对应位置，
+    此时已输出的PCM字节数即为句子的起止位置。播放了一部分的句子按播放比例截取文字。
+
+    用法：
+        tracker = SpokenTextTracker(sample_rate)
+        text_stream = tracker.track_text(text_stream)
+        pcm_stream = tracker.track_audio(decode_audio_stream(tts_client.astream_tts(text_stream, tracker.on_sentence), ...))
+        await audio_handler.astream_play(pcm_stream)
+        ...
+        tracker.spoken_text(audio_handler.played_bytes)  # 被打断时
+    """
+    def __init__(self, sample_rate: int, chars_per_second: float = DEFAULT_CHARS_PER_SECOND):
+        """
+        Args:
+            sample_rate: 送入扬声器的16位单声道PCM的采样率
+            chars_per_second: 估算未合成完的句子已播放字数时使用的语速
+        """
+        self.bytes_per_second = sample_rate * 2
+        self.chars_per_second = chars_per_second
+        self.texts: List[str] = []          # 送入TTS的文本分段
+        self.sentences: List[list] = []     # [文本, 起始字节, 结束字节（尚未结束为None）]
+        self.audio_bytes = 0                # 已输出的PCM字节数
+
+    async def track_text(self, text_stream: AsyncGenerator[str, None]) -> AsyncGenerator[str, None]:
+        """记录送入TTS的文本分段，服务端的分句事件不带文本时按顺序与之对应"""
+        async for text in text_stream:
+            if text.strip():
+                self.texts.append(text)
+            yield text
+
+    async def track_audio(self, audio_stream: AsyncGenerator[bytes, None]) -> AsyncGenerator[bytes, None]:
+        """统计已输出的PCM字节数，须包裹解码后、送入扬声器的PCM流"""
+        async for chunk in audio_stream:
+            if chunk is not None:
+                self.audio_bytes += len(chunk)
+            yield chunk
+
+    def on_sentence(self, event: int, text: str) -> None:
+        """TTS的分句回调"""
+        if event == EVENT_TTSSentenceStart:
+            # 未收到句末的上一句在下一句开始处结束
+            self._end_sentence()
+            if not text:
+                index = len(self.sentences)
+                text = self.texts[index] if index < len(self.texts) else ""
+            self.sentences.append([text, self.audio_bytes, None])
+        elif event == EVENT_TTSSentenceEnd:
+            self._end_sentence()
+
+    def _end_sentence(self) -> None:
+        if self.sentences and self.sentences[-1][2] is None:
+            self.sentences[-1][2] = self.audio_bytes
+
+    def spoken_text(self, played_bytes: int) -> str:
+        """播放了played_bytes字节的PCM时，用户听到的文本"""
+        parts = []
+        for text, start, end in self.sentences:
+            if played_bytes <= start:
+                break
+            if end is not None and played_bytes >= end:
+                parts.append(text)
+                continue
+            # 只播放了该句的一部分：按该句的音频时长截取相应比例的文字，尚未合成完的句子按语速估算
+            if end is not None:
+                ratio = (played_bytes - start) / (end - start)
+            else:
+                ratio = (played_bytes - start) / self.bytes_per_second * self.chars_per_second / max(len(text), 1)
+            parts.append(text[:int(len(text) * min(ratio, 1.0))])
+            break
+        return "".join(parts)
+
+    def unspoken_chars(self, played_bytes: int) -> int:
+        """已送入TTS但用户没有听到的字数"""
+        return max(0, sum(len(text) for text in self.texts) - len(self.spoken_text(played_bytes)))
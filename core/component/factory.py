@@ -1,10 +1,11 @@
-from typing import Dict, Type, Any, Optional
+import time
+import asyncio
+import logging
+import importlib
+from typing import Dict, Type, Any, Optional, Union, List
 from core.utils.config import ConfigLoader
-from core.component.audio import AudioHandler
-from core.component.vad import SileroVADClient, WebRTCVADClient
-from core.component.asr import FunASRClient
-from core.component.llm import AsyncOllamaClient, AsyncOpenAIClient
-from core.component.tts import AsyncDouBaoTTSClient
+
+logger = logging.getLogger(__name__)
 
 class ComponentFactory:
     """统一的组件工厂类
@@ -13,61 +14,218 @@ class ComponentFactory:
     """
     
     # 组件类型到具体实现类的映射
-    _component_registry: Dict[str, Dict[str, Type]] = {
+    # 值为 "模块路径:类名" 形式的延迟导入路径，只有被 config.yml 选中的组件才会被导入，
+    # 避免未使用的实现（如 torch、funasr）拖慢冷启动并占用内存
+    _component_registry: Dict[str, Dict[str, Union[str, Type]]] = {
+        "AUDIO": {
+            "General": "core.component.audio.handler:AudioHandler",
+        },
         "VAD": {
-            "SileroVAD": SileroVADClient,
-            "WebRTCVAD": WebRTCVADClient,
+            "SileroVAD": "core.component.vad.vad_client:SileroVADClient",
+            "WebRTCVAD": "core.component.vad.vad_client:WebRTCVADClient",
         },
         "ASR": {
-            "FunASR": FunASRClient,
+            "FunASR": "core.component.asr.asr_client:FunASRClient",
         },
         "LLM": {
-            "Ollama": AsyncOllamaClient,
-            "OpenAI": AsyncOpenAIClient,
+            "Ollama": "core.component.llm.llm_client:AsyncOllamaClient",
+            "OpenAI": "core.component.llm.llm_client:AsyncOpenAIClient",
         },
         "TTS": {
-            "DouBaoTTS": AsyncDouBaoTTSClient,
-            "GizwitsTTS": AsyncDouBaoTTSClient,
+            "DouBaoTTS": "core.component.tts.doubao:AsyncDouBaoTTSClient",
+            "GizwitsTTS": "core.component.tts.doubao:AsyncDouBaoTTSClient",
+            "SherpaOnnxTTS": "core.component.tts.sherpa:AsyncSherpaOnnxTTSClient",
+        },
+        "SEGMENTER": {
+            "LatencyAware": "core.component.segmenter.text_segmenter:LatencyAwareSegmenter",
+            "Passthrough": "core.component.segmenter.text_segmenter:PassthroughSegmenter",
         }
     }
 
+    # config.yml 未选择时使用的默认实现
+    _default_components: Dict[str, str] = {
+        "SEGMENTER": "LatencyAware",
+    }
+
+    # 组件键名到组件类型的映射。各组件之间没有构造依赖，可以并行创建
+    _component_keys: Dict[str, str] = {
+        "audio": "AUDIO",
+        "vad": "VAD",
+        "asr": "ASR",
+        "llm": "LLM",
+        "tts": "TTS",
+        "segmenter": "SEGMENTER",
+    }
+
     @classmethod
     async def create_components(cls, config: ConfigLoader) -> Dict[str, Any]:
         """根据配置文件创建所有需要的组件实例
         
+        各组件的构造（加载模型、打开音频设备等）互不依赖，因此放到线程池中并行执行，
+        启动耗时从各组件耗时之和降为其中的最大值。
+        
         Args:
             config: ConfigLoader实例，包含所有组件的配置信息
             
         Returns:
             包含所有组件实例的字典，键为组件类型
+            
+        Raises:
+            RuntimeError: 当任一组件创建失败时，汇总所有失败的组件
         """
+        timings: Dict[str, float] = {}
+
+        def _create(component_type: str) -> Any:
+            name = cls._get_selected_name(config, component_type)
+            component_config = config.get_component_config(component_type, name)
+            component = cls.create(component_type, name, component_config)
+            if component_type == "LLM":
+                component = cls._decorate_llm(component, component_config, config)
+            elif component_type == "TTS":
+                component = cls._decorate_tts(component, component_config, config)
+            return component
+
+        async def _timed_create(key: str, component_type: str) -> Any:
+            start_time = time.perf_counter()
+            try:
+                # 模型加载等阻塞操作放到线程中执行，不阻塞事件循环
+                return await asyncio.to_thread(_create, component_type)
+            finally:
+                timings[key] = time.perf_counter() - start_time
+
+        keys = list(cls._component_keys.keys())
+        results = await asyncio.gather(
+            *(_timed_create(key, cls._component_keys[key]) for key in keys),
+            return_exceptions=True
+        )
+
         components = {}
+        errors = {}
+        for key, result in zip(keys, results):
+            if isinstance(result, BaseException):
+                errors[key] = result
+            else:
+                components[key] = result
+
+        cls._report("创建", timings, errors)
+        if errors:
+            raise RuntimeError(f"组件创建失败: {cls._format_errors(errors)}")
+        return components
+
+    @classmethod
+    def _decorate_llm(cls, llm: Any, llm_config: dict, config: ConfigLoader) -> Any:
+        """按配置为LLM客户端叠加可选能力，由内到外依次为：对冲请求、回复缓存、截止时间
+
+        截止时间位于最外层，超时后输出的致歉不会被缓存。
+        """
+        def _create_backend(name: str) -> Any:
+            if name not in cls._component_registry["LLM"]:
+                raise ValueError(f"未知的备用LLM后端: {name}")
+            return cls.create("LLM", name, config.get_component_config("LLM", name))
+
+        hedge_config = llm_config.get("hedge") or {}
+        if hedge_config.get("enabled", False):
+            from core.component.llm.hedged import HedgedLLMClient
+            llm = HedgedLLMClient(llm, _create_backend(hedge_config.get("secondary")), hedge_config)
+
+        cache_config = llm_config.get("cache") or {}
+        if cache_config.get("enabled", False):
+            from core.component.llm.cache import CachedLLMClient
+            llm = CachedLLMClient(llm, cache_config)
+
+        deadline_config = llm_config.get("deadline") or {}
+        if deadline_config.get("enabled", False):
+            from core.component.llm.deadline import DeadlineLLMClient
+            fallback_name = deadline_config.get("fallback")
+            fallback = _create_backend(fallback_name) if fallback_name else None
+            llm = DeadlineLLMClient(llm, deadline_config, fallback)
+        return llm
+
+    @classmethod
+    def _decorate_tts(cls, tts: Any, tts_config: dict, config: ConfigLoader) -> Any:
+        """按配置为TTS客户端叠加可选能力，由内到外依次为：短句音频缓存、备用后端、多分段并行合成
+
+        备用后端位于缓存之外，其合成的音频（音色可能不同）不会写入主TTS的缓存；
+        并行合成位于最外层，每个分段各自经过缓存与备用后端。
+        """
+        cache_config = tts_config.get("cache") or {}
+        if cache_config.get("enabled", False):
+            from core.component.tts.cache import CachedTTSClient
+            tts = CachedTTSClient(tts, cache_config)
+
+        failover_config = tts_config.get("failover") or {}
+        if failover_config.get("enabled", False):
+            from core.component.tts.failover import FailoverTTSClient
+            name = failover_config.get("backend")
+            if name not in cls._component_registry["TTS"]:
+                raise ValueError(f"未知的备用TTS后端: {name}")
+            fallback = cls.create("TTS", name, config.get_component_config("TTS", name))
+            tts = FailoverTTSClient(tts, fallback, failover_config)
+
+        parallel_config = tts_config.get("parallel") or {}
+        if parallel_config.get("enabled", False):
+            from core.component.tts.parallel import ParallelTTSClient
+            tts = ParallelTTSClient(tts, parallel_config)
+            # 被打断时正在合成的分段所在的连接都进入排空状态，连接池还需为下一轮回复留出同样数量的连接
+            pool_size = tts_config.get("pool_size")
+            if pool_size is not None and pool_size < 2 * tts.max_concurrency:
+                logger.warning(f"TTS并行合成的max_concurrency为{tts.max_concurrency}，pool_size（{pool_size}）应不小于"
+                               f"{2 * tts.max_concurrency}，否则打断后的下一轮回复需要现场建立连接")
+        return tts
+
+    @classmethod
+    async def init_components(cls, components: Dict[str, Any]) -> None:
+        """异步初始化所有组件
         
-        # 创建AudioHandler
-        audio_handler = AudioHandler(config.get_cls_config("AUDIO"))
-        components['audio'] = audio_handler
-        
-        # 创建VAD组件
-        vad_name = config.get_cls_name("VAD")
-        vad_config = config.get_cls_config("VAD")
-        components['vad'] = cls.create("VAD", vad_name, vad_config)
-        
-        # 创建ASR组件
-        asr_name = config.get_cls_name("ASR")
-        asr_config = config.get_cls_config("ASR")
-        components['asr'] = cls.create("ASR", asr_name, asr_config)
-        
-        # 创建LLM组件
-        llm_name = config.get_cls_name("LLM")
-        llm_config = config.get_cls_config("LLM")
-        components['llm'] = cls.create("LLM", llm_name, llm_config)
-        
-        # 创建TTS组件
-        tts_name = config.get_cls_name("TTS")
-        tts_config = config.get_cls_config("TTS")
-        components['tts'] = cls.create("TTS", tts_name, tts_config)
+        对实现了 init() 的组件（打开音频流、建立TTS的WebSocket连接等）并发执行初始化，
+        网络握手与设备就绪等待相互重叠。
         
-        return components
+        Args:
+            components: create_components() 返回的组件字典
+            
+        Raises:
+            RuntimeError: 当任一组件初始化失败时，汇总所有失败的组件
+        """
+        timings: Dict[str, float] = {}
+
+        async def _timed_init(key: str, component: Any) -> None:
+            start_time = time.perf_counter()
+            try:
+                await component.init()
+            finally:
+                timings[key] = time.perf_counter() - start_time
+
+        keys = [key for key, component in components.items() if hasattr(component, "init")]
+        tasks = [
+            asyncio.create_task(_timed_init(key, components[key]), name=f"init_{key}")
+            for key in keys
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        errors = {
+            key: result for key, result in zip(keys, results)
+            if isinstance(result, BaseException)
+        }
+        cls._report("初始化", timings, errors)
+        if errors:
+            raise RuntimeError(f"组件初始化失败: {cls._format_errors(errors)}")
+
+    @staticmethod
+    def _format_errors(errors: Dict[str, BaseException]) -> str:
+        return "; ".join(f"{key}: {error!r}" for key, error in errors.items())
+
+    @staticmethod
+    def _report(stage: str, timings: Dict[str, float], errors: Dict[str, BaseException]) -> None:
+        """记录各组件的耗时明细"""
+        lines = [f"组件{stage}耗时（并行，总耗时约等于最大值 {max(timings.values(), default=0):.3f} 秒）:"]
+        for key, elapsed in sorted(timings.items(), key=lambda item: item[1], reverse=True):
+            status = f"失败: {errors[key]!r}" if key in errors else "成功"
+            lines.append(f"  {key:<6} {elapsed:>8.3f} 秒  {status}")
+        report = "\n".join(lines)
+        if errors:
+            logger.error(report)
+        else:
+            logger.info(report)
 
     @classmethod
     def create(cls, component_type: str, name: str, config: Optional[dict] = None) -> Any:
@@ -81,6 +239,16 @@ class ComponentFactory:
         Returns:
             组件实例
             
+        Raises:
+            ValueError: 当组件类型或名称未注册时
+        """
+        component_class = cls.get_component_class(component_type, name)
+        return component_class(config) if config is not None else component_class()
+
+    @classmethod
+    def get_component_path(cls, component_type: str, name: str) -> str:
+        """获取组件实现类的导入路径（"模块路径:类名"），不触发导入
+        
         Raises:
             ValueError: 当组件类型或名称未注册时
         """
@@ -90,18 +258,53 @@ class ComponentFactory:
         component_dict = cls._component_registry[component_type]
         if name not in component_dict:
             raise ValueError(f"未知的{component_type}组件: {name}")
-            
-        component_class = component_dict[name]
-        return component_class(config) if config is not None else component_class()
+
+        component = component_dict[name]
+        if isinstance(component, str):
+            return component
+        return f"{component.__module__}:{component.__qualname__}"
+
+    @classmethod
+    def get_component_class(cls, component_type: str, name: str) -> Type:
+        """获取组件实现类，首次使用时才导入其所在模块
+        
+        Raises:
+            ValueError: 当组件类型或名称未注册时
+        """
+        component = cls._component_registry.get(component_type, {}).get(name)
+        if component is not None and not isinstance(component, str):
+            return component
+
+        module_path, _, class_name = cls.get_component_path(component_type, name).partition(":")
+        component_class = getattr(importlib.import_module(module_path), class_name)
+        # 缓存解析结果，后续创建无需重复查找
+        cls._component_registry[component_type][name] = component_class
+        return component_class
+
+    @classmethod
+    def _get_selected_name(cls, config: ConfigLoader, component_type: str) -> str:
+        """获取 config.yml 选中的组件名称，未选择时使用默认实现"""
+        return config.get_cls_name(component_type) or cls._default_components.get(component_type, "")
+
+    @classmethod
+    def get_selected_modules(cls, config: ConfigLoader) -> List[str]:
+        """获取 config.yml 选中的组件所在的模块路径列表（不触发导入）"""
+        modules = []
+        for component_type in cls._component_keys.values():
+            name = cls._get_selected_name(config, component_type)
+            module_path = cls.get_component_path(component_type, name).partition(":")[0]
+            if module_path not in modules:
+                modules.append(module_path)
+        return modules
 
     @classmethod
-    def register_component(cls, component_type: str, name: str, component_class: Type) -> None:
+    def register_component(cls, component_type: str, name: str, component_class: Union[str, Type]) -> None:
         """注册新的组件实现类
         
         Args:
             component_type: 组件类型（如 "VAD", "ASR" 等）
             name: 组件名称
-            component_class: 组件实现类
+            component_class: 组件实现类，或 "模块路径:类名" 形式的延迟导入路径
         """
         if component_type not in cls._component_registry:
             cls._component_registry[component_type] = {}
@@ -120,4 +323,3 @@ class ComponentFactory:
         if component_type:
             return {component_type: list(cls._component_registry.get(component_type, {}).keys())}
         return {k: list(v.keys()) for k, v in cls._component_registry.items()}
-    
\ No newline at end of file
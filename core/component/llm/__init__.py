@@ -1,3 +1,7 @@
 from core.component.llm.llm_client import AsyncBaseLLMClient, AsyncOllamaClient, AsyncOpenAIClient
+from core.component.llm.wrapper import AsyncLLMClientWrapper
+from core.component.llm.cache import CachedLLMClient
+from core.component.llm.hedged import HedgedLLMClient
+from core.component.llm.deadline import DeadlineLLMClient
 
-__all__ = ["AsyncBaseLLMClient", "AsyncOllamaClient", "AsyncOpenAIClient"]
\ No newline at end of file
+__all__ = ["AsyncBaseLLMClient", "AsyncOllamaClient", "AsyncOpenAIClient", "AsyncLLMClientWrapper", "CachedLLMClient", "HedgedLLMClient", "DeadlineLLMClient"]
\ No newline at end of file
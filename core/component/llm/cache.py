@@ -0,0 +1,172 @@
+import time
+import json
+import hashlib
+import logging
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Dict, AsyncGenerator, Optional, Tuple, Any
+
+from core.component.llm.llm_client import AsyncBaseLLMClient
+from core.component.llm.wrapper import AsyncLLMClientWrapper
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL = 600               # 缓存条目的有效期，单位为秒
+DEFAULT_CONTEXT_MESSAGES = 2    # 参与缓存键计算的历史消息条数（不含当前用户消息），默认为上一轮的问题与回复：
+                                # "为什么"、"那明天呢"等追问的答案取决于上文，不同上文下不能命中同一条缓存
+# 包含这些词的请求答案随时间变化，不使用缓存
+DEFAULT_NO_CACHE_KEYWORDS = ["几点", "时间", "日期", "星期几"]
+
+# 句末可省略、不影响语义的语气词
+_TRAILING_PARTICLES = "呀啊呢哦嘛啦哈"
+
+def normalize_query(text: str) -> str:
+    """归一化用户文本：全角转半角、统一小写、去除标点空白与句末语气词
+
+    "现在几点了？" 与 "现在几点了呀" 归一化后相同。
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = "".join(ch for ch in text if not (ch.isspace() or unicodedata.category(ch).startswith("P")))
+    return text.rstrip(_TRAILING_PARTICLES)
+
+@dataclass
+class CacheEntry:
+    reply: str
+    created_at: float
+    first_token_ms: float   # 原始请求的首token延迟，命中时视为节省的延迟
+    total_ms: float         # 原始请求生成完整回复的耗时
+
+class LLMResponseCache:
+    """带TTL的LRU回复缓存"""
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str], CacheEntry]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.saved_first_token_ms = 0.0
+        self.saved_total_ms = 0.0
+
+    def get(self, key: Tuple[str, str]) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry.created_at > self.ttl:
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self.saved_first_token_ms += entry.first_token_ms
+        self.saved_total_ms += entry.total_ms
+        return entry
+
+    def put(self, key: Tuple[str, str], entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """导出缓存统计：命中率与节省的延迟"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_first_token_ms": round(self.saved_first_token_ms, 1),
+            "saved_total_ms": round(self.saved_total_ms, 1),
+        }
+
+class CachedLLMClient(AsyncLLMClientWrapper):
+    """带回复缓存的LLM客户端（可选启用）
+
+    缓存键 = 归一化后的用户文本 + 相关上下文的指纹（系统提示词、模型、工具定义以及最近的若干条历史消息）。
+    命中时立即输出缓存的回复，下游的文本分段器与TTS无需等待LLM；
+    调用了工具的回复（如天气）以及包含时间类关键词的请求不会被缓存。
+    """
+    def __init__(self, inner: AsyncBaseLLMClient, config: Optional[dict] = None):
+        super().__init__(inner)
+        config = config or {}
+        self.cache = LLMResponseCache(
+            max_entries=config.get("max_entries", DEFAULT_MAX_ENTRIES),
+            ttl=config.get("ttl", DEFAULT_TTL)
+        )
+        self.context_messages: int = config.get("context_messages", DEFAULT_CONTEXT_MESSAGES)
+        self.no_cache_keywords: List[str] = config.get("no_cache_keywords", DEFAULT_NO_CACHE_KEYWORDS)
+
+    def _fingerprint(self, messages: List[Dict[str, Any]]) -> str:
+        """计算与回复相关的上下文指纹"""
+        context = {
+            "model": getattr(self.inner, "model_name", ""),
+            # 仅取第一条系统提示词，滚动摘要的变化不影响缓存
+            "system": messages[0].get("content") if messages and messages[0].get("role") == "system" else "",
+            "tools": [tool.get("function", {}).get("name") for tool in self.tool_definitions],
+            "history": [
+                (message.get("role"), message.get("content"))
+                for message in messages[-1 - self.context_messages:-1]
+            ] if self.context_messages else [],
+        }
+        return hashlib.sha1(json.dumps(context, ensure_ascii=False, sort_keys=True).encode()).hexdigest()
+
+    def _cache_key(self, messages: List[Dict[str, Any]]) -> Optional[Tuple[str, str]]:
+        """生成缓存键，不适合缓存的请求返回None"""
+        if not messages or messages[-1].get("role") != "user":
+            return None
+        text = messages[-1].get("content") or ""
+        if any(keyword in text for keyword in self.no_cache_keywords):
+            return None
+        query = normalize_query(text)
+        if not query:
+            return None
+        return query, self._fingerprint(messages)
+
+    async def astream_chat(self, messages: List[Dict[str, str]], session_id: str, print_stream: bool = False) -> AsyncGenerator[str, None]:
+        key = self._cache_key(messages)
+        if key is None:
+            self.cache.bypasses += 1
+            async for text in self.inner.astream_chat(messages, session_id, print_stream):
+                yield text
+            return
+
+        entry = self.cache.get(key)
+        if entry is not None:
+            logger.info(f"LLM回复缓存命中，节省首token延迟约 {entry.first_token_ms:.1f} ms，统计: {self.cache.stats()}")
+            if print_stream:
+                print(f"AI: {entry.reply}\n")
+            messages.append({"role": "assistant", "content": entry.reply})
+            # 整段输出，由文本分段器按标点切分后立即送入TTS
+            yield entry.reply
+            return
+
+        start_time = time.perf_counter()
+        first_token_ms = None
+        prompt_len = len(messages)
+        reply = ""
+        async for text in self.inner.astream_chat(messages, session_id, print_stream):
+            if first_token_ms is None:
+                first_token_ms = (time.perf_counter() - start_time) * 1000
+            reply += text
+            yield text
+
+        # 只缓存正常结束、未调用工具的回复
+        used_tools = any(message.get("role") == "tool" for message in messages[prompt_len:])
+        if reply and not used_tools:
+            self.cache.put(key, CacheEntry(
+                reply=reply,
+                created_at=time.monotonic(),
+                first_token_ms=first_token_ms or 0.0,
+                total_ms=(time.perf_counter() - start_time) * 1000
+            ))
+        elif used_tools:
+            self.cache.bypasses += 1
+
+    async def close(self) -> None:
+        logger.info(f"LLM回复缓存统计: {self.cache.stats()}")
+        await super().close()
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+from typing import List, Dict, AsyncGenerator, Optional, Any, Callable
+
+from core.tools.handler import ToolHandler
+from core.component.llm.llm_client import AsyncBaseLLMClient
+from core.component.llm.wrapper import AsyncLLMClientWrapper
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIRST_TOKEN_MS = 3000   # 首token的最长等待时间
+DEFAULT_INTER_TOKEN_MS = 2000   # 相邻token的最长间隔
+DEFAULT_TOOL_GRACE_MS = 6000    # 开始执行工具调用后，额外放宽的等待时间（工具执行期间LLM没有输出）
+DEFAULT_COMPLETE_MS = 30000     # 非流式补全（如对话摘要）的超时时间，需等待整段输出，远长于首token的截止时间
+DEFAULT_APOLOGY = "抱歉，我这边网络有点慢，请稍后再问我一次吧。"
+
+class DeadlineExceeded(Exception):
+    def __init__(self, kind: str):
+        super().__init__(f"LLM {kind} deadline exceeded")
+        self.kind = kind
+
+class DeadlineLLMClient(AsyncLLMClientWrapper):
+    """带首token与token间隔截止时间的LLM客户端
+
+    超过截止时间时取消当前的流：
+    - 尚未输出任何文本时，改用备用后端重新请求（配置了fallback时）；
+    - 已输出部分文本、已开始执行工具调用（换后端会重复执行工具），或备用后端同样超时时，
+      输出一句简短的致歉并结束本轮回复。
+    截止时间的触发次数按类型计数，用于观察上游服务的劣化。
+    """
+    def __init__(self, inner: AsyncBaseLLMClient, config: Optional[dict] = None, fallback: Optional[AsyncBaseLLMClient] = None):
+        super().__init__(inner)
+        config = config or {}
+        self.fallback = fallback
+        self.first_token_timeout: float = config.get("first_token_ms", DEFAULT_FIRST_TOKEN_MS) / 1000
+        self.inter_token_timeout: float = config.get("inter_token_ms", DEFAULT_INTER_TOKEN_MS) / 1000
+        self.tool_grace: float = config.get("tool_grace_ms", DEFAULT_TOOL_GRACE_MS) / 1000
+        self.complete_timeout: float = config.get("complete_ms", DEFAULT_COMPLETE_MS) / 1000
+        self.apology: str = config.get("apology", DEFAULT_APOLOGY)
+
+        self.hits = {"first_token": 0, "inter_token": 0}
+        self.fallbacks = 0
+        self.apologies = 0
+        # 当前流的截止时间（事件循环时间），工具调用开始时顺延。同一时间只有一个流在进行
+        self._deadline = 0.0
+        # 当前回复是否已开始执行工具调用
+        self._tool_called = False
+
+        # 由内层客户端通知工具调用，以便顺延截止时间，再转发给外部的监听者
+        self.inner.set_tool_call_listener(self._on_tool_call)
+        if self.fallback is not None:
+            self.fallback.set_tool_call_listener(self._on_tool_call)
+
+    @property
+    def model_name(self) -> str:
+        return getattr(self.inner, "model_name", "")
+
+    def config_tool_call(self, tool_handler: ToolHandler):
+        super().config_tool_call(tool_handler)
+        if self.fallback is not None:
+            self.fallback.config_tool_call(tool_handler)
+
+    def set_tool_call_listener(self, listener: Optional[Callable[[str], None]]) -> None:
+        self.tool_call_listener = listener
+
+    def _on_tool_call(self, tool_name: str) -> None:
+        loop = asyncio.get_running_loop()
+        self._deadline = max(self._deadline, loop.time() + self.tool_grace)
+        self._tool_called = True
+        self._notify_tool_call(tool_name)
+
+    async def _guarded(self, stream: AsyncGenerator[str, None]) -> AsyncGenerator[str, None]:
+        """透传文本流，超过截止时间时取消流并抛出DeadlineExceeded"""
+        loop = asyncio.get_running_loop()
+        iterator = stream.__aiter__()
+        pending: Optional[asyncio.Future] = None
+        first = True
+        self._deadline = loop.time() + self.first_token_timeout
+        try:
+            while True:
+                pending = asyncio.ensure_future(iterator.__anext__())
+                while not pending.done():
+                    timeout = self._deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    await asyncio.wait({pending}, timeout=timeout)
+                if not pending.done():
+                    raise DeadlineExceeded("first_token" if first else "inter_token")
+                try:
+                    text = pending.result()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    pending = None
+                if text:
+                    first = False
+                    self._deadline = loop.time() + self.inter_token_timeout
+                yield text
+        finally:
+            if pending is not None and not pending.done():
+                pending.cancel()
+                try:
+                    await pending
+                except BaseException:
+                    pass
+            await iterator.aclose()
+
+    async def astream_chat(self, messages: List[Dict[str, str]], session_id: str, print_stream: bool = False) -> AsyncGenerator[str, None]:
+        prompt_len = len(messages)
+        reply = ""
+        attempt: Optional[List[Dict[str, Any]]] = None
+        backends = [("primary", self.inner)] + ([("fallback", self.fallback)] if self.fallback is not None else [])
+        self._tool_called = False
+        try:
+            for name, backend in backends:
+                if name == "fallback":
+                    self.fallbacks += 1
+                # 每个后端使用消息列表的副本，超时被取消的后端追加的不完整消息不会进入对话记录
+                attempt = list(messages)
+                try:
+                    async for text in self._guarded(backend.astream_chat(attempt, session_id, print_stream)):
+                        reply += text
+                        yield text
+                    return
+                except DeadlineExceeded as e:
+                    self.hits[e.kind] += 1
+                    attempt = None
+                    logger.warning(f"LLM后端 {name} 超过{'首token' if e.kind == 'first_token' else 'token间隔'}截止时间，"
+                                   f"session_id: {session_id}，统计: {self.stats()}")
+                    if reply or self._tool_called:
+                        # 已经输出了部分回复或已执行了工具，换后端重新生成会重复内容、再次执行工具
+                        break
+
+            self.apologies += 1
+            yield self.apology
+            messages.append({"role": "assistant", "content": reply + self.apology})
+        finally:
+            if attempt is not None:
+                messages.extend(attempt[prompt_len:])
+
+    async def acomplete(self, messages: List[Dict[str, str]]) -> str:
+        return await asyncio.wait_for(self.inner.acomplete(messages), self.complete_timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """导出截止时间的触发次数、改用备用后端与致歉的次数"""
+        return {"hits": dict(self.hits), "fallbacks": self.fallbacks, "apologies": self.apologies}
+
+    async def init(self) -> None:
+        await asyncio.gather(self.inner.init(), *([self.fallback.init()] if self.fallback is not None else []))
+
+    async def close(self) -> None:
+        logger.info(f"LLM截止时间统计: {self.stats()}")
+        await asyncio.gather(self.inner.close(), *([self.fallback.close()] if self.fallback is not None else []), return_exceptions=True)
@@ -0,0 +1,203 @@
+import time
+import asyncio
+import logging
+from typing import List, Dict, AsyncGenerator, Optional, Any, Callable
+
+from core.tools.handler import ToolHandler
+from core.component.llm.llm_client import AsyncBaseLLMClient
+from core.component.llm.wrapper import AsyncLLMClientWrapper
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEDGE_DELAY_MS = 500    # 主后端超过该时长仍未返回首token时，同时向备用后端发起请求
+
+# 后端输出结束的标记
+_END = object()
+# 后端开始执行工具调用的标记，与首token一样视为后端已开始输出
+_TOOL_CALL = object()
+
+class HedgedLLMClient(AsyncLLMClientWrapper):
+    """对冲请求的LLM客户端
+
+    先向主后端发起请求；若hedge_delay_ms内没有收到首token（或主后端直接报错），
+    再向备用后端发起同样的请求。哪个后端先返回首token或先开始执行工具调用就输出哪个，另一个立即取消：
+    工具可能有副作用，一旦某个后端开始执行工具，就不再对冲或切换后端，保证每个工具调用只执行一次。
+    两个后端各自使用消息列表的副本，结束后只把胜出者追加的消息（助手回复、工具调用等）写回原列表。
+    """
+    def __init__(self, primary: AsyncBaseLLMClient, secondary: AsyncBaseLLMClient, config: Optional[dict] = None):
+        super().__init__(primary)
+        config = config or {}
+        self.secondary = secondary
+        self.hedge_delay: float = config.get("hedge_delay_ms", DEFAULT_HEDGE_DELAY_MS) / 1000
+
+        self.requests = 0
+        self.hedges = 0
+        self.wins = {"primary": 0, "secondary": 0}
+        # 当前请求中处理后端工具调用通知的回调。同一时间只有一个流在进行
+        self._tool_call_router: Optional[Callable[[str, str], None]] = None
+
+        # 由两个后端通知工具调用，以便选定后端，再转发给外部的监听者
+        self.inner.set_tool_call_listener(lambda tool_name: self._on_tool_call("primary", tool_name))
+        self.secondary.set_tool_call_listener(lambda tool_name: self._on_tool_call("secondary", tool_name))
+
+    @property
+    def model_name(self) -> str:
+        return getattr(self.inner, "model_name", "")
+
+    def config_tool_call(self, tool_handler: ToolHandler):
+        super().config_tool_call(tool_handler)
+        self.secondary.config_tool_call(tool_handler)
+
+    def set_tool_call_listener(self, listener: Optional[Callable[[str], None]]) -> None:
+        self.tool_call_listener = listener
+
+    def _on_tool_call(self, backend: str, tool_name: str) -> None:
+        if self._tool_call_router is not None:
+            self._tool_call_router(backend, tool_name)
+
+    async def _pump(self, client: AsyncBaseLLMClient, messages: List[Dict[str, Any]], session_id: str, queue: asyncio.Queue) -> None:
+        """把后端的输出转存到队列中，异常也作为队列元素传递"""
+        try:
+            async for text in client.astream_chat(messages, session_id):
+                await queue.put(text)
+            await queue.put(_END)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(e)
+
+    async def astream_chat(self, messages: List[Dict[str, str]], session_id: str, print_stream: bool = False) -> AsyncGenerator[str, None]:
+        self.requests += 1
+        start_time = time.perf_counter()
+        prompt_len = len(messages)
+        backends = {"primary": self.inner, "secondary": self.secondary}
+        prompts: Dict[str, List[Dict[str, Any]]] = {}
+        queues: Dict[str, asyncio.Queue] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+        getters: Dict[str, asyncio.Future] = {}
+        winner = None
+        committed = None    # 最先开始执行工具调用的后端
+
+        def route_tool_call(name: str, tool_name: str) -> None:
+            nonlocal committed
+            if winner is None and committed is None:
+                # 在工具调用的回调中同步取消另一个后端，使其没有机会再执行同一个工具
+                committed = name
+                for other, task in tasks.items():
+                    if other != name:
+                        task.cancel()
+                queues[name].put_nowait(_TOOL_CALL)
+            if name == (winner or committed):
+                self._notify_tool_call(tool_name)
+
+        def launch(name: str) -> None:
+            prompts[name] = list(messages)
+            queues[name] = asyncio.Queue()
+            tasks[name] = asyncio.create_task(
+                self._pump(backends[name], prompts[name], session_id, queues[name]),
+                name=f"llm_hedge_{name}_{session_id}"
+            )
+            getters[name] = asyncio.ensure_future(queues[name].get())
+
+        self._tool_call_router = route_tool_call
+        try:
+            launch("primary")
+            first_item = None
+            error: Optional[Exception] = None
+            while winner is None:
+                if not getters:
+                    raise error
+                hedged = "secondary" in tasks
+                done, _ = await asyncio.wait(
+                    set(getters.values()),
+                    timeout=None if hedged else self.hedge_delay,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    if committed is not None:
+                        # 主后端已开始执行工具调用，其标记尚未从队列中取出
+                        continue
+                    self.hedges += 1
+                    logger.info(f"主LLM后端 {self.hedge_delay * 1000:.0f} ms 内未返回首token，同时请求备用后端")
+                    launch("secondary")
+                    continue
+
+                for name, getter in list(getters.items()):
+                    if getter not in done:
+                        continue
+                    del getters[name]
+                    item = getter.result()
+                    if committed is not None and name != committed:
+                        # 另一个后端已开始执行工具调用，本后端已被取消，忽略其残留的输出
+                        continue
+                    if isinstance(item, Exception):
+                        error = item
+                        logger.warning(f"LLM后端 {name} 请求失败: {str(item)}")
+                        if "secondary" not in tasks:
+                            launch("secondary")
+                        continue
+                    winner, first_item = name, item
+                    break
+
+            self.wins[winner] += 1
+            logger.debug(f"LLM对冲请求由 {winner} 胜出，首token延迟: {(time.perf_counter() - start_time) * 1000:.1f} ms")
+            for name, getter in getters.items():
+                getter.cancel()
+            for name, task in tasks.items():
+                if name != winner:
+                    task.cancel()
+
+            if print_stream:
+                print("AI: ", end="", flush=True)
+            item = first_item
+            while item is not _END:
+                if isinstance(item, Exception):
+                    raise item
+                if item is _TOOL_CALL:
+                    item = await queues[winner].get()
+                    continue
+                if print_stream:
+                    print(item, end="", flush=True)
+                yield item
+                item = await queues[winner].get()
+            if print_stream:
+                print("\n")
+        finally:
+            self._tool_call_router = None
+            for getter in getters.values():
+                getter.cancel()
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            if winner is not None:
+                messages.extend(prompts[winner][prompt_len:])
+
+    async def acomplete(self, messages: List[Dict[str, str]]) -> str:
+        try:
+            return await self.inner.acomplete(messages)
+        except Exception as e:
+            logger.warning(f"主LLM后端请求失败，改用备用后端: {str(e)}")
+            return await self.secondary.acomplete(messages)
+
+    def stats(self) -> Dict[str, Any]:
+        """导出对冲统计：对冲率与各后端胜出次数"""
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_rate": self.hedges / self.requests if self.requests else 0.0,
+            "wins": dict(self.wins),
+        }
+
+    async def _init_secondary(self) -> None:
+        """备用后端初始化失败不影响启动，请求时仍会尝试使用"""
+        try:
+            await self.secondary.init()
+        except Exception as e:
+            logger.warning(f"备用LLM后端初始化失败: {e!r}")
+
+    async def init(self) -> None:
+        await asyncio.gather(self.inner.init(), self._init_secondary())
+
+    async def close(self) -> None:
+        logger.info(f"LLM对冲请求统计: {self.stats()}")
+        await asyncio.gather(self.inner.close(), self.secondary.close(), return_exceptions=True)
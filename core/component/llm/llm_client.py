@@ -1,24 +1,183 @@
+import copy
 import time
+import json
+import asyncio
+import hashlib
 import logging
-from typing import List, Dict, AsyncGenerator, Tuple, Optional
+from contextvars import ContextVar
+from typing import List, Dict, AsyncGenerator, Tuple, Optional, Callable
 from abc import ABC, abstractmethod
 from core.tools.handler import ToolHandler
-from openai import AsyncOpenAI
-from ollama import AsyncClient
+from core.utils.tracer import tracer, MARK_LLM_FIRST_TOKEN
 
 logger = logging.getLogger(__name__)
 
+# 值为Event时，当前协程（及其创建的任务）中的工具调用等到Event被设置后才执行，如推测执行被采纳之前
+tool_call_gate: ContextVar[Optional[asyncio.Event]] = ContextVar("tool_call_gate", default=None)
+
+# 连接池默认参数
+DEFAULT_MAX_CONNECTIONS = 10
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 5
+DEFAULT_KEEPALIVE_EXPIRY = 300      # 空闲连接的保活时长，单位为秒
+
+def _build_pool_limits(config: dict):
+    """根据配置生成httpx连接池参数，长时间保持空闲连接以免每轮对话都重新进行TCP/TLS握手"""
+    import httpx
+    return httpx.Limits(
+        max_connections=config.get("max_connections", DEFAULT_MAX_CONNECTIONS),
+        max_keepalive_connections=config.get("max_keepalive_connections", DEFAULT_MAX_KEEPALIVE_CONNECTIONS),
+        keepalive_expiry=config.get("keepalive_expiry", DEFAULT_KEEPALIVE_EXPIRY),
+    )
+
+def _is_json_complete(text: str) -> bool:
+    """判断流式拼接中的工具调用参数是否已是完整的JSON对象"""
+    text = text.strip()
+    # 先做廉价的结尾判断，避免每个delta都尝试解析
+    if not text.endswith("}"):
+        return False
+    try:
+        json.loads(text)
+        return True
+    except ValueError:
+        return False
+
+class ToolCallDispatcher:
+    """工具调用调度器
+
+    在LLM仍在流式输出时，提前执行参数已完整的工具调用，使工具的网络I/O与剩余的生成过程重叠；
+    流结束后按原顺序收集结果，并统计相比"流结束后再执行"节省的时间。
+    """
+    def __init__(self, client: "AsyncBaseLLMClient", messages: List[Dict[str, str]]):
+        self.client = client
+        self.messages = messages
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._dispatch_times: Dict[int, float] = {}
+        self._finish_times: Dict[int, float] = {}
+
+    def is_dispatched(self, key: int) -> bool:
+        return key in self._tasks
+
+    def dispatch(self, key: int, tool_name: str, tool_args: str) -> None:
+        """开始执行一个工具调用，同一个key只会执行一次"""
+        if key in self._tasks:
+            return
+        self._dispatch_times[key] = time.perf_counter()
+        self.client._notify_tool_call(tool_name)
+        self._tasks[key] = asyncio.create_task(self._run(key, tool_name, tool_args), name=f'tool_call_{key}')
+
+    async def _run(self, key: int, tool_name: str, tool_args: str) -> Tuple[bool, str]:
+        try:
+            gate = tool_call_gate.get()
+            if gate is not None:
+                await gate.wait()
+            return await self.client._handle_tool_call(self.messages, tool_name, tool_args)
+        finally:
+            self._finish_times[key] = time.perf_counter()
+
+    async def gather(self, keys: List[int]) -> List[Tuple[bool, str]]:
+        """在LLM流结束后调用，等待所有工具调用完成并按keys的顺序返回结果"""
+        stream_end = time.perf_counter()
+        results = await asyncio.gather(*(self._tasks[key] for key in keys))
+        if keys:
+            # 对比基线：流结束后才开始并发执行，耗时为最慢工具的执行时长
+            baseline_end = stream_end + max(self._finish_times[key] - self._dispatch_times[key] for key in keys)
+            actual_end = max(self._finish_times[key] for key in keys)
+            early = sum(1 for key in keys if self._dispatch_times[key] < stream_end)
+            saved_ms = max(0.0, baseline_end - actual_end) * 1000
+            logger.info(f"工具调用: {len(keys)} 个，其中 {early} 个在流式输出期间提前执行，节省约 {saved_ms:.1f} ms")
+        return results
+
+    def cancel(self) -> None:
+        """取消尚未完成的工具调用，如对话被打断时"""
+        for task in self._tasks.values():
+            if not task.done():
+                task.cancel()
+
 class AsyncBaseLLMClient(ABC):
+    # 已完成的请求数，首个请求（且未预热）记为冷启动
+    _request_count: int = 0
+    _warmed_up: bool = False
+    tool_handler: Optional[ToolHandler] = None
+    tool_definitions: List[Dict] = []
+    # 开始执行工具调用时的回调，参数为工具名，如用于播放补位音频
+    tool_call_listener: Optional[Callable[[str], None]] = None
+    # 请求前缀（系统提示词+工具定义）的指纹，用于发现破坏服务端prompt缓存的前缀变化
+    _tools_fingerprint: str = ""
+    _prefix_fingerprint: Optional[str] = None
+    # 最近一次请求的prompt用量，以及累计值
+    last_prompt_usage: Optional[Dict] = None
+    _prompt_tokens_total: int = 0
+    _cached_tokens_total: int = 0
+
     @abstractmethod
     async def astream_chat(self, messages: List[Dict[str, str]], session_id: str, print_stream: bool = False) -> AsyncGenerator[str, None]:
         """与LLM进行对话"""
         pass
 
+    def config_tool_call(self, tool_handler: ToolHandler):
+        self.tool_handler = tool_handler
+        # 固定一份工具定义的快照：每轮请求序列化出的工具定义逐字节相同，服务端才能复用prompt缓存
+        self.tool_definitions = copy.deepcopy(tool_handler.get_tool_definitions())
+        self._tools_fingerprint = hashlib.sha1(json.dumps(self.tool_definitions, ensure_ascii=False).encode()).hexdigest()
+
+    def _check_prefix(self, messages: List[Dict[str, str]]) -> None:
+        """检查请求前缀（首条系统提示词与工具定义）是否与上次请求一致"""
+        system = messages[0].get("content") if messages and messages[0].get("role") == "system" else ""
+        fingerprint = hashlib.sha1(f"{system}|{self._tools_fingerprint}".encode()).hexdigest()
+        if self._prefix_fingerprint is not None and fingerprint != self._prefix_fingerprint:
+            logger.warning("LLM请求前缀（系统提示词/工具定义）发生变化，服务端的prompt缓存将失效")
+        self._prefix_fingerprint = fingerprint
+
+    def _log_prompt_usage(self, session_id: str, prompt_tokens: Optional[int] = None, cached_tokens: Optional[int] = None,
+                          evaluated_tokens: Optional[int] = None, prompt_eval_ms: Optional[float] = None) -> None:
+        """记录一次请求的prompt处理情况：总token数、命中服务端缓存的token数、实际计算的token数及耗时"""
+        self.last_prompt_usage = {
+            "prompt_tokens": prompt_tokens,
+            "cached_tokens": cached_tokens,
+            "evaluated_tokens": evaluated_tokens,
+            "prompt_eval_ms": round(prompt_eval_ms, 1) if prompt_eval_ms is not None else None,
+        }
+        self._prompt_tokens_total += prompt_tokens or evaluated_tokens or 0
+        self._cached_tokens_total += cached_tokens or 0
+        usage = ", ".join(f"{key}: {value}" for key, value in self.last_prompt_usage.items() if value is not None)
+        logger.info(f"LLM prompt用量: {usage}, session_id: {session_id}")
+
+    def set_tool_call_listener(self, listener: Optional[Callable[[str], None]]) -> None:
+        self.tool_call_listener = listener
+
+    def _notify_tool_call(self, tool_name: str) -> None:
+        if self.tool_call_listener is None:
+            return
+        try:
+            self.tool_call_listener(tool_name)
+        except Exception as e:
+            logger.error(f"工具调用回调执行失败: {str(e)}")
+
+    @abstractmethod
+    async def acomplete(self, messages: List[Dict[str, str]]) -> str:
+        """非流式、不带工具的单次补全，用于对话摘要等后台任务"""
+        pass
+
+    async def init(self) -> None:
+        """异步初始化，如建立连接、预热模型"""
+        pass
+
+    async def close(self) -> None:
+        """关闭连接并清理资源"""
+        pass
+
+    def _log_first_token(self, session_id: str, start_time: float) -> None:
+        """记录首token延迟，区分冷启动（连接未建立/模型未加载）与预热后的请求"""
+        state = "warm" if self._warmed_up or self._request_count > 0 else "cold"
+        self._request_count += 1
+        logger.info(f"LLM首token延迟（{state}）: {(time.perf_counter() - start_time) * 1000:.1f} ms, session_id: {session_id}")
+        tracer.mark(MARK_LLM_FIRST_TOKEN, session_id)
+
     async def _handle_tool_call(self, messages: List[Dict[str, str]], tool_name: str, tool_args: str) -> Tuple[bool, str]:
         """处理工具调用并返回工具执行结果"""
         try:
-            # 执行函数
-            tool_response = self.tool_handler.execute_tool(tool_name, tool_args)
+            # 执行函数，同步工具由ToolHandler放入线程池执行，不阻塞事件循环
+            tool_response = await self.tool_handler.aexecute_tool(tool_name, tool_args)
             return True, tool_response
         except Exception as e:
             error_msg = f"Tool call failed: {str(e)}"
@@ -49,15 +208,47 @@ class AsyncOllamaClient(AsyncBaseLLMClient):
         self.model_name = config.get("model_name", "")
         self.temperature = config.get("temperature", 0.1)
         self.base_url = config.get("base_url", "")
+        self.keep_alive = config.get("keep_alive", "30m")  # 模型在Ollama中常驻的时长，避免空闲后重新加载
+        self.warmup = config.get("warmup", True)
         self.tool_handler = None
         self.tool_definitions = []
 
-        # 初始化本地Ollama模型
-        self.llm = AsyncClient()
+        # 初始化本地Ollama模型，使用保活的连接池
+        from ollama import AsyncClient
+        self.llm = AsyncClient(
+            host=self.base_url or None,
+            limits=_build_pool_limits(config)
+        )
 
-    def config_tool_call(self, tool_handler: ToolHandler):
-        self.tool_handler = tool_handler
-        self.tool_definitions = tool_handler.get_tool_definitions()
+    async def init(self) -> None:
+        """预热：建立连接，并让Ollama提前将模型加载到内存
+
+        预热失败（如Ollama尚未启动）不影响启动，首个请求按冷启动处理，失败时由该请求报错。
+        """
+        if not self.warmup or self._warmed_up:
+            return
+        start_time = time.perf_counter()
+        try:
+            # messages为空时，Ollama只加载模型而不进行推理
+            await self.llm.chat(model=self.model_name, messages=[], keep_alive=self.keep_alive)
+        except Exception as e:
+            logger.warning(f"Ollama LLM 预热失败，首个请求将按冷启动处理: {e!r}")
+            return
+        self._warmed_up = True
+        logger.info(f"Ollama LLM 预热完成，耗时: {(time.perf_counter() - start_time) * 1000:.1f} ms")
+
+    async def close(self) -> None:
+        logger.info(f"Ollama LLM 累计处理prompt token: {self._prompt_tokens_total}")
+        # ollama.AsyncClient未提供close()，直接关闭其内部的httpx连接池
+        await self.llm._client.aclose()
+
+    async def acomplete(self, messages: List[Dict[str, str]]) -> str:
+        response = await self.llm.chat(
+            model=self.model_name,
+            messages=messages,
+            keep_alive=self.keep_alive
+        )
+        return response['message']['content']
 
     async def astream_chat(self, messages: List[Dict[str, str]], session_id: str, print_stream: bool = False) -> AsyncGenerator[str, None]:
         """与LLM进行对话"""
@@ -67,56 +258,61 @@ class AsyncOllamaClient(AsyncBaseLLMClient):
         try:
             while True:
                 response = ""
-                buffer = ""
                 tool_calls = []
+                dispatcher = ToolCallDispatcher(self, messages)
                 
                 # 调用 Ollama 进行对话
+                # Ollama的/api/chat不返回context，模型常驻（keep_alive）且前缀逐字节相同时，服务端自动复用已计算的KV缓存
+                self._check_prefix(messages)
+                start_time = time.perf_counter()
+                first_token = True
                 stream = await self.llm.chat(
                     model=self.model_name,
                     messages=messages,
                     stream=True,
-                    tools=self.tool_definitions if self.tool_definitions else None
+                    tools=self.tool_definitions if self.tool_definitions else None,
+                    keep_alive=self.keep_alive
                 )
 
                 async for chunk in stream:
+                    if first_token:
+                        first_token = False
+                        self._log_first_token(session_id, start_time)
+                    if chunk.get('done'):
+                        # 复用KV缓存时，prompt_eval_count只包含前缀之后新计算的token
+                        self._log_prompt_usage(
+                            session_id,
+                            evaluated_tokens=chunk.get('prompt_eval_count'),
+                            prompt_eval_ms=(chunk.get('prompt_eval_duration') or 0) / 1e6
+                        )
                     message = chunk.get('message', {})
                     
                     # TODO 假设tool_calls字段和content字段是互斥的，如果同时存在，则只处理tool_calls
                     # 检查是否是工具调用
                     if message.get('tool_calls', None):
-                        tool_calls.extend(message['tool_calls'])
+                        # Ollama的每个工具调用都是完整下发的，收到即可开始执行
+                        for tool_call in message['tool_calls']:
+                            dispatcher.dispatch(len(tool_calls), tool_call.function.name, tool_call.function.arguments)
+                            tool_calls.append(tool_call)
                         continue
 
-                    # 如果是普通文本响应
+                    # 如果是普通文本响应，原样输出，由下游的文本分段器决定何时送入TTS
                     content = message.get('content', '')
                     if content:
-                        buffer += content
-                        if any(p in content for p in ["，", "。", "！", "？", "\n"]) or len(buffer) >= 2:
-                            if print_stream:
-                                print(buffer, end="", flush=True)
-                            yield buffer
-                            response += buffer
-                            buffer = ""
-
-                # 处理剩余的buffer
-                if buffer:
-                    if print_stream:
-                        print(buffer, end="", flush=True)
-                    yield buffer
-                    response += buffer
+                        if print_stream:
+                            print(content, end="", flush=True)
+                        yield content
+                        response += content
 
                 # 如果有工具调用，先记录助手的工具调用
                 if tool_calls:
                     self._record_assistant_tool_calls(messages, tool_calls)
-                    # 然后处理每个工具调用
-                    for tool_call in tool_calls:
-                        success, tool_response = await self._handle_tool_call(
-                            messages, 
-                            tool_call.function.name,
-                            tool_call.function.arguments
-                        )
+                    # 然后等待所有工具调用（已在流式输出期间开始执行）完成
+                    results = await dispatcher.gather(list(range(len(tool_calls))))
+                    for tool_call, (success, tool_response) in zip(tool_calls, results):
                         # 无论成功失败都记录结果
                         self._record_tool_response(messages, tool_call.function.name, tool_response)
+                    for success, tool_response in results:
                         if not success:
                             yield f"\n工具调用失败：{tool_response}\n"
                             return
@@ -129,6 +325,7 @@ class AsyncOllamaClient(AsyncBaseLLMClient):
             traceback.print_exc()
             raise
         finally:
+            dispatcher.cancel()
             if print_stream:
                 print("\n")
             if not tool_calls:
@@ -146,33 +343,53 @@ class AsyncOpenAIClient(AsyncBaseLLMClient):
         self.model_name = config.get("model_name", "")
         self.temperature = config.get("temperature", 0.1)
         self.stream = config.get("stream", True)
+        self.warmup = config.get("warmup", True)
+        # 在流的最后一个chunk中返回用量（含命中prompt缓存的token数），部分OpenAI兼容服务不支持时可关闭
+        self.report_usage = config.get("report_usage", True)
         self.tool_handler = None
         self.tool_definitions = []
 
-        # 初始化OpenAI模型
+        # 初始化OpenAI模型，使用保活的连接池
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
         self.llm = AsyncOpenAI(
             api_key=self.api_key,
             base_url=self.base_url,
-            timeout=self.timeout # 请求超时时间，单位为秒
+            timeout=self.timeout, # 请求超时时间，单位为秒
+            http_client=DefaultAsyncHttpxClient(limits=_build_pool_limits(config))
         )
         logger.debug("OpenAI LLM 组件初始化完成")
 
-    def config_tool_call(self, tool_handler: ToolHandler):
-        self.tool_handler = tool_handler
-        self.tool_definitions = tool_handler.get_tool_definitions()
+    async def init(self) -> None:
+        """预热：发送一个极小的请求，提前完成TCP/TLS握手并放入连接池
 
-    async def _handle_tool_call(self, messages: List[Dict[str, str]], tool_name: str, tool_args: str, tool_call_id: str) -> Tuple[bool, str]:
-        """处理工具调用并返回工具执行结果"""
+        预热失败（如网络超时、API Key无效）不影响启动，首个请求按冷启动处理，失败时由该请求报错。
+        """
+        if not self.warmup or self._warmed_up:
+            return
+        start_time = time.perf_counter()
         try:
-            # 执行函数
-            tool_response = self.tool_handler.execute_tool(tool_name, tool_args)
-            return True, tool_response
+            await self.llm.chat.completions.create(
+                model=self.model_name,
+                messages=[{"role": "user", "content": "hi"}],
+                max_tokens=1
+            )
         except Exception as e:
-            error_msg = f"Tool call failed: {str(e)}"
-            logger.error(error_msg)
-            import traceback
-            traceback.print_exc()
-            return False, error_msg
+            logger.warning(f"OpenAI LLM 预热失败，首个请求将按冷启动处理: {e!r}")
+            return
+        self._warmed_up = True
+        logger.info(f"OpenAI LLM 预热完成，耗时: {(time.perf_counter() - start_time) * 1000:.1f} ms")
+
+    async def close(self) -> None:
+        logger.info(f"OpenAI LLM 累计prompt token: {self._prompt_tokens_total}，其中命中缓存: {self._cached_tokens_total}")
+        await self.llm.close()
+
+    async def acomplete(self, messages: List[Dict[str, str]]) -> str:
+        response = await self.llm.chat.completions.create(
+            model=self.model_name,
+            messages=messages,
+            temperature=self.temperature
+        )
+        return response.choices[0].message.content or ""
 
     async def astream_chat(self, messages: List[Dict[str, str]], session_id: str, print_stream: bool = False) -> AsyncGenerator[str, None]:
         """与LLM进行对话"""
@@ -182,15 +399,21 @@ class AsyncOpenAIClient(AsyncBaseLLMClient):
         try:
             while True:
                 response = ""
-                buffer = ""
                 tool_calls = []
                 current_tool_call = None
+                current_index = None
+                dispatcher = ToolCallDispatcher(self, messages)
 
+                # 系统提示词与工具定义在前、对话在后，前缀逐字节相同时服务端自动复用prompt缓存
+                self._check_prefix(messages)
+                start_time = time.perf_counter()
+                first_token = True
                 generator = await self.llm.chat.completions.create(
                     model=self.model_name,
                     messages=messages,
                     temperature=self.temperature,          # 温度，取值范围[0,1]，0代表确定性输出，1代表随机性输出
                     stream=True,                           # 是否启用流式输出
+                    **({"stream_options": {"include_usage": True}} if self.report_usage else {}),
                     **({
                         "tools": self.tool_definitions,    # 工具定义
                         "tool_choice": "auto",             # 自动选择是否调用工具
@@ -199,6 +422,16 @@ class AsyncOpenAIClient(AsyncBaseLLMClient):
                 )
 
                 async for chunk in generator:
+                    if first_token:
+                        first_token = False
+                        self._log_first_token(session_id, start_time)
+                    if chunk.usage:
+                        details = chunk.usage.prompt_tokens_details
+                        self._log_prompt_usage(
+                            session_id,
+                            prompt_tokens=chunk.usage.prompt_tokens,
+                            cached_tokens=details.cached_tokens if details else None
+                        )
                     # gpt-4o-mini，chunk.choices 一定几率会返回[]，此时需要跳过
                     if len(chunk.choices) == 0:
                         continue
@@ -222,6 +455,7 @@ class AsyncOpenAIClient(AsyncBaseLLMClient):
                                     "type": "function"
                                 })
                             current_tool_call = tool_calls[tool_call.index]
+                            current_index = tool_call.index
                         
                         # 更新当前tool_call的信息
                         if tool_call.id:
@@ -231,39 +465,40 @@ class AsyncOpenAIClient(AsyncBaseLLMClient):
                                 current_tool_call["function"]["name"] = tool_call.function.name
                             if tool_call.function.arguments:
                                 current_tool_call["function"]["arguments"] += tool_call.function.arguments
+                        # 参数一旦是完整的JSON就立即执行，无需等待整个流（及后续的工具调用）结束
+                        if (current_tool_call["id"] and current_tool_call["function"]["name"]
+                                and not dispatcher.is_dispatched(current_index)
+                                and _is_json_complete(current_tool_call["function"]["arguments"])):
+                            dispatcher.dispatch(
+                                current_index,
+                                current_tool_call["function"]["name"],
+                                current_tool_call["function"]["arguments"]
+                            )
                         continue
 
                     # 如果是普通文本响应
                     # 一定几率 token.choices[0].delta.content 为空，此时需要跳过
+                    # 原样输出，由下游的文本分段器决定何时送入TTS
                     if delta.content:
-                        buffer += delta.content
-                        if any(p in delta.content for p in ["，", "。", "！", "？", "\n"]) or len(buffer) >= 2:
-                            if print_stream:
-                                print(buffer, end="", flush=True)
-                            yield buffer
-                            response += buffer
-                            buffer = ""
-
-                # 处理剩余的buffer
-                if buffer:
-                    if print_stream:
-                        print(buffer, end="", flush=True)
-                    yield buffer
-                    response += buffer
+                        if print_stream:
+                            print(delta.content, end="", flush=True)
+                        yield delta.content
+                        response += delta.content
 
                 # 如果有工具调用，先记录助手的工具调用
                 if tool_calls:
                     self._record_assistant_tool_calls(messages, tool_calls)
-                    # 然后处理每个工具调用
-                    for tool_call in tool_calls:
-                        if not tool_call["id"] or not tool_call["function"]["name"]:
-                            continue
-                        success, tool_response = await self._handle_tool_call(
-                            messages,
-                            tool_call["function"]["name"],
-                            tool_call["function"]["arguments"],
-                            tool_call["id"]
-                        )
+                    # 然后并发处理所有工具调用，两个天气查询只需一次往返的耗时
+                    valid_indexes = [
+                        index for index, tool_call in enumerate(tool_calls)
+                        if tool_call["id"] and tool_call["function"]["name"]
+                    ]
+                    # 流式输出期间参数未能解析的工具调用，在此补充执行（由工具处理器报告参数错误）
+                    for index in valid_indexes:
+                        dispatcher.dispatch(index, tool_calls[index]["function"]["name"], tool_calls[index]["function"]["arguments"])
+                    results = await dispatcher.gather(valid_indexes)
+                    for index, (success, tool_response) in zip(valid_indexes, results):
+                        tool_call = tool_calls[index]
                         # 无论成功失败都记录结果
                         self._record_tool_response(
                             messages, 
@@ -271,6 +506,7 @@ class AsyncOpenAIClient(AsyncBaseLLMClient):
                             tool_response,
                             tool_call["id"]
                         )
+                    for success, tool_response in results:
                         if not success:
                             yield f"\n工具调用失败：{tool_response}\n"
                             return
@@ -283,6 +519,7 @@ class AsyncOpenAIClient(AsyncBaseLLMClient):
             traceback.print_exc()
             raise
         finally:
+            dispatcher.cancel()
             if print_stream:
                 print("\n")
             if not tool_calls:
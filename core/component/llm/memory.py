@@ -0,0 +1,247 @@
+import asyncio
+import logging
+from typing import List, Dict, Optional, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_TURNS = 8           # 原文保留的最近对话轮数
+DEFAULT_MAX_TOKENS = 1500       # 摘要与原文保留轮次的token预算（不含系统提示词）
+DEFAULT_SUMMARY_MAX_CHARS = 200 # 滚动摘要的最大字数
+DEFAULT_TRIM_RATIO = 1.0        # 超出预算时裁剪到预算的比例，小于1时一次多裁剪几轮
+DEFAULT_TRUNCATE_INTERRUPTED = True # 回复被打断时，只记入用户实际听到的部分
+
+SUMMARY_PROMPT = (
+    "你负责压缩对话历史。请将已有摘要与新增对话合并为一段不超过{max_chars}字的中文摘要，"
+    "保留用户的身份信息、偏好、提出过的问题和尚未完成的事项，省略寒暄和重复内容。只输出摘要本身。"
+)
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """粗略估算文本的token数：中日韩字符约1个token，其余字符约4个字符1个token"""
+    if not text:
+        return 0
+    cjk = sum(1 for ch in text if '⺀' <= ch <= '鿿' or '가' <= ch <= '힯')
+    return cjk + (len(text) - cjk + 3) // 4
+
+def truncate_to_spoken(content: str, spoken: str) -> str:
+    """将回复截断到实际播放的部分：按非空白字符数对齐，保留回复原有的空白与换行"""
+    remaining = sum(1 for ch in spoken if not ch.isspace())
+    if remaining == 0:
+        return ""
+    for i, ch in enumerate(content):
+        if not ch.isspace():
+            remaining -= 1
+            if remaining == 0:
+                return content[:i + 1]
+    return content
+
+def estimate_message_tokens(message: Dict[str, Any]) -> int:
+    """估算单条消息的token数，包含工具调用参数，每条消息另计4个token的格式开销"""
+    tokens = 4 + estimate_tokens(message.get("content"))
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call["function"] if isinstance(tool_call, dict) else tool_call.function
+        if isinstance(function, dict):
+            tokens += estimate_tokens(function.get("name")) + estimate_tokens(str(function.get("arguments")))
+        else:
+            tokens += estimate_tokens(function.name) + estimate_tokens(str(function.arguments))
+    return tokens
+
+class ConversationMemory:
+    """按token预算管理的对话记忆
+
+    系统提示词始终保留；最近的若干轮对话（一轮 = 用户消息及其后的助手回复、工具调用与工具结果）
+    原文保留在预算之内；被挤出窗口的旧轮次在两轮对话之间由后台任务压缩进滚动摘要，
+    不占用对话的关键路径。
+
+    用法：
+        memory.add_user_message(text)
+        messages = memory.build_prompt()
+        ... llm_client.astream_chat(messages, ...)  # LLM会把回复追加到messages中
+        memory.commit(messages)
+    """
+    def __init__(self, system_prompt: str, config: Optional[dict] = None, summarizer=None):
+        """
+        Args:
+            system_prompt: 系统提示词
+            config: 记忆配置，包含max_turns、max_tokens、summary_max_chars、trim_ratio、truncate_interrupted
+            summarizer: 用于生成摘要的LLM客户端（需实现acomplete），为None时直接丢弃旧轮次
+        """
+        config = config or {}
+        self.max_turns: int = config.get("max_turns", DEFAULT_MAX_TURNS)
+        self.max_tokens: int = config.get("max_tokens", DEFAULT_MAX_TOKENS)
+        self.summary_max_chars: int = config.get("summary_max_chars", DEFAULT_SUMMARY_MAX_CHARS)
+        # 每次裁剪都会改变prompt的前缀，使服务端的prompt缓存失效；
+        # 一次裁剪到预算的trim_ratio，之后若干轮只在末尾追加消息，前缀保持不变
+        self.trim_ratio: float = config.get("trim_ratio", DEFAULT_TRIM_RATIO)
+        # 被打断的回复中未播放的部分用户没有听到，记入历史会让LLM误以为已经说过，且白白占用之后每轮的prompt
+        self.truncate_interrupted: bool = config.get("truncate_interrupted", DEFAULT_TRUNCATE_INTERRUPTED)
+        self.summarizer = summarizer
+
+        self.system_message = {"role": "system", "content": system_prompt}
+        self.summary: str = ""
+        self.turns: List[List[Dict[str, Any]]] = []
+        self._turn_tokens: List[int] = []
+        # 已被挤出窗口、等待压缩进摘要的轮次
+        self._pending_turns: List[List[Dict[str, Any]]] = []
+        self._summary_task: Optional[asyncio.Task] = None
+
+    def add_user_message(self, text: str, message: Optional[Dict[str, Any]] = None) -> None:
+        """开始新的一轮对话
+
+        Args:
+            text: 用户消息的文本
+            message: 推测执行时已放入prompt的用户消息，采纳推测结果时传入，commit()据此定位LLM追加的消息
+        """
+        message = message if message is not None else {"role": "user", "content": text}
+        self.turns.append([message])
+        self._turn_tokens.append(estimate_message_tokens(message))
+
+    def build_speculative_prompt(self, text: str) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """不修改记忆，生成以text为本轮用户消息的prompt，用于推测执行
+
+        Returns:
+            (prompt, 用户消息)。采纳推测结果时将该用户消息传给add_user_message()
+        """
+        message = {"role": "user", "content": text}
+        messages = self.build_prompt()
+        messages.append(message)
+        return messages, message
+
+    def build_prompt(self) -> List[Dict[str, Any]]:
+        """生成发送给LLM的消息列表（新列表，LLM可以在其后追加消息）"""
+        messages = [self.system_message]
+        if self.summary:
+            messages.append({"role": "system", "content": f"此前对话的摘要：{self.summary}"})
+        for turn in self.turns:
+            messages.extend(turn)
+        logger.debug(f"对话记忆：{len(self.turns)} 轮原文，约 {self.prompt_tokens()} 个prompt token")
+        return messages
+
+    def prompt_tokens(self) -> int:
+        """估算当前prompt的token数"""
+        summary_tokens = estimate_tokens(self.summary) + 4 if self.summary else 0
+        return estimate_message_tokens(self.system_message) + summary_tokens + sum(self._turn_tokens)
+
+    def commit(self, messages: List[Dict[str, Any]], spoken_reply: Optional[str] = None) -> None:
+        """将LLM在build_prompt()结果之后追加的消息（助手回复、工具调用等）归入当前轮次，并按预算裁剪
+
+        Args:
+            messages: 发送给LLM的消息列表，LLM已在其后追加本轮的消息
+            spoken_reply: 回复被打断时用户实际听到的文本，最后一条助手回复截断为该部分
+        """
+        # 摘要可能在本轮对话期间于后台更新，因此不能按长度定位，而是找到当前轮次最后一条消息之后的部分
+        new_messages = []
+        if self.turns:
+            last_message = self.turns[-1][-1]
+            for i in range(len(messages) - 1, -1, -1):
+                if messages[i] is last_message:
+                    new_messages = messages[i + 1:]
+                    break
+            if spoken_reply is not None and self.truncate_interrupted:
+                new_messages = self._truncate_reply(new_messages, spoken_reply)
+        if new_messages:
+            self.turns[-1].extend(new_messages)
+            self._turn_tokens[-1] += sum(estimate_message_tokens(message) for message in new_messages)
+        self._trim()
+
+    @staticmethod
+    def _truncate_reply(messages: List[Dict[str, Any]], spoken_reply: str) -> List[Dict[str, Any]]:
+        """最后一条助手回复截断为用户听到的部分，一个字都没听到时删除该回复；
+        LLM的生成被取消而尚未追加回复时，按听到的文本补记"""
+        if messages and messages[-1].get("role") == "assistant" and not messages[-1].get("tool_calls"):
+            reply = messages[-1]
+            content = truncate_to_spoken(reply.get("content") or "", spoken_reply)
+            if content != reply.get("content"):
+                logger.debug(f"回复被打断，记入对话记忆的回复由 {len(reply.get('content') or '')} 字截断为 {len(content)} 字")
+            return messages[:-1] + ([{**reply, "content": content}] if content else [])
+        if spoken_reply:
+            return messages + [{"role": "assistant", "content": spoken_reply}]
+        return messages
+
+    def last_reply(self) -> str:
+        """获取最近一条助手回复的文本"""
+        for message in reversed(self.turns[-1] if self.turns else []):
+            if message.get("role") == "assistant" and message.get("content"):
+                return message["content"]
+        return ""
+
+    def _trim(self) -> None:
+        """将超出轮数或token预算的旧轮次移出窗口（始终保留最新一轮），并在后台压缩进摘要"""
+        summary_tokens = estimate_tokens(self.summary)
+        if len(self.turns) > self.max_turns or summary_tokens + sum(self._turn_tokens) > self.max_tokens:
+            max_turns = max(1, int(self.max_turns * self.trim_ratio))
+            max_tokens = self.max_tokens * self.trim_ratio
+            while len(self.turns) > 1 and (
+                len(self.turns) > max_turns or
+                summary_tokens + sum(self._turn_tokens) > max_tokens
+            ):
+                self._pending_turns.append(self.turns.pop(0))
+                self._turn_tokens.pop(0)
+
+        if self._pending_turns:
+            self._bound_pending()
+            self._schedule_summary()
+
+    def _bound_pending(self) -> None:
+        """摘要持续失败时，等待压缩的轮次会不断累积：超出token预算（max_tokens）后丢弃最旧的轮次，
+        使内存与摘要请求的长度保持有界"""
+        tokens = [sum(estimate_message_tokens(message) for message in turn) for turn in self._pending_turns]
+        dropped = 0
+        while len(self._pending_turns) > 1 and sum(tokens) > self.max_tokens:
+            self._pending_turns.pop(0)
+            tokens.pop(0)
+            dropped += 1
+        if dropped:
+            logger.warning(f"等待压缩的对话轮次超出预算，丢弃最旧的 {dropped} 轮，剩余 {len(self._pending_turns)} 轮")
+
+    def _schedule_summary(self) -> None:
+        if self.summarizer is None:
+            self._pending_turns = []
+            return
+        if self._summary_task is not None and not self._summary_task.done():
+            # 上一次摘要尚未完成，新挤出的轮次留到下一次合并
+            return
+        self._summary_task = asyncio.create_task(self._summarize(), name='memory_summary')
+
+    async def _summarize(self) -> None:
+        turns, self._pending_turns = self._pending_turns, []
+        dialogue = "\n".join(self._format_message(message) for turn in turns for message in turn)
+        dialogue = "\n".join(line for line in dialogue.splitlines() if line)
+        messages = [
+            {"role": "system", "content": SUMMARY_PROMPT.format(max_chars=self.summary_max_chars)},
+            {"role": "user", "content": f"已有摘要：{self.summary or '无'}\n\n新增对话：\n{dialogue}"},
+        ]
+        try:
+            summary = await self.summarizer.acomplete(messages)
+            self.summary = summary.strip()[:self.summary_max_chars]
+            logger.debug(f"对话摘要已更新：{self.summary}")
+        except asyncio.CancelledError:
+            self._pending_turns = turns + self._pending_turns
+            raise
+        except Exception as e:
+            # 摘要失败时放回队列，下次重试；超出预算的最旧轮次被丢弃
+            self._pending_turns = turns + self._pending_turns
+            self._bound_pending()
+            logger.error(f"生成对话摘要失败: {str(e)}")
+
+    @staticmethod
+    def _format_message(message: Dict[str, Any]) -> str:
+        role = message.get("role")
+        content = message.get("content")
+        if not content:
+            return ""
+        if role == "user":
+            return f"用户：{content}"
+        if role == "assistant":
+            return f"助手：{content}"
+        if role == "tool":
+            return f"工具结果（{message.get('name', '')}）：{content[:100]}"
+        return ""
+
+    async def close(self) -> None:
+        """取消尚未完成的摘要任务"""
+        if self._summary_task is not None and not self._summary_task.done():
+            self._summary_task.cancel()
+            try:
+                await self._summary_task
+            except asyncio.CancelledError:
+                pass
@@ -0,0 +1,33 @@
+from typing import List, Dict, AsyncGenerator, Optional, Callable
+from core.tools.handler import ToolHandler
+from core.component.llm.llm_client import AsyncBaseLLMClient
+
+class AsyncLLMClientWrapper(AsyncBaseLLMClient):
+    """LLM客户端包装器基类
+
+    在不修改具体LLM客户端的前提下，为其叠加缓存、超时等能力。
+    默认将所有调用转发给被包装的客户端，子类按需重写astream_chat。
+    """
+    def __init__(self, inner: AsyncBaseLLMClient):
+        self.inner = inner
+
+    def config_tool_call(self, tool_handler: ToolHandler):
+        super().config_tool_call(tool_handler)
+        self.inner.config_tool_call(tool_handler)
+
+    def set_tool_call_listener(self, listener: Optional[Callable[[str], None]]) -> None:
+        super().set_tool_call_listener(listener)
+        self.inner.set_tool_call_listener(listener)
+
+    async def astream_chat(self, messages: List[Dict[str, str]], session_id: str, print_stream: bool = False) -> AsyncGenerator[str, None]:
+        async for text in self.inner.astream_chat(messages, session_id, print_stream):
+            yield text
+
+    async def acomplete(self, messages: List[Dict[str, str]]) -> str:
+        return await self.inner.acomplete(messages)
+
+    async def init(self) -> None:
+        await self.inner.init()
+
+    async def close(self) -> None:
+        await self.inner.close()
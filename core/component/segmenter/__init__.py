@@ -0,0 +1,3 @@
+from core.component.segmenter.text_segmenter import BaseTextSegmenter, PassthroughSegmenter, LatencyAwareSegmenter
+
+__all__ = ["BaseTextSegmenter", "PassthroughSegmenter", "LatencyAwareSegmenter"]
@@ -0,0 +1,196 @@
+import time
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import AsyncGenerator, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 句末标点：在此处切分可得到完整的句子
+STRONG_BREAKS = frozenset("。！？；…\n!?;")
+# 句中停顿：在此处切分可得到完整的分句
+WEAK_BREAKS = frozenset("，、：,:")
+# 紧跟在标点之后、应归入前一段的字符（引号、括号、连续标点）
+TRAILING_CHARS = frozenset("”’」』）)】》\"'。！？…!?.")
+# 以"."结尾但不表示句末的英文缩写
+ABBREVIATIONS = frozenset({
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "no", "fig",
+    "inc", "ltd", "co", "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep",
+    "sept", "oct", "nov", "dec", "approx", "dept", "est", "min", "max",
+})
+
+def _is_period_break(text: str, i: int, final: bool) -> Optional[bool]:
+    """判断 text[i] 处的"."是否为句末，无法确定（位于末尾、后续字符未到达）时返回None"""
+    if i + 1 >= len(text):
+        return True if final else None
+    next_ch = text[i + 1]
+    # 小数点：3.14
+    if next_ch.isdigit() and i > 0 and text[i - 1].isdigit():
+        return False
+    # 域名、版本号、缩写中间的点：example.com、e.g
+    if not (next_ch.isspace() or next_ch in TRAILING_CHARS):
+        return False
+    # 向前取出"."之前的单词
+    start = i
+    while start > 0 and (text[start - 1].isascii() and (text[start - 1].isalpha() or text[start - 1] == ".")):
+        start -= 1
+    word = text[start:i].lower()
+    # 缩写（Mr.、e.g.）与首字母（J. K.）
+    if word in ABBREVIATIONS or "." in word or (len(word) == 1 and word.isalpha()):
+        return False
+    return True
+
+def iter_breaks(text: str, final: bool = False) -> Iterator[Tuple[int, bool]]:
+    """遍历文本中可切分的位置
+
+    Args:
+        text: 待切分的文本
+        final: 文本流是否已结束。未结束时，位于末尾、无法确定含义的"."不视为断点
+
+    Yields:
+        (切分位置, 是否为句末)，切分位置为断点之后（已包含紧随的引号、括号等）的下标
+    """
+    length = len(text)
+    i = 0
+    while i < length:
+        ch = text[i]
+        strong = None
+        if ch in STRONG_BREAKS:
+            strong = True
+        elif ch == ".":
+            is_break = _is_period_break(text, i, final)
+            if is_break is None:
+                return
+            strong = True if is_break else None
+        elif ch in WEAK_BREAKS:
+            # 数字中的分隔符：1,000、12:30
+            between_digits = 0 < i < length - 1 and text[i - 1].isdigit() and text[i + 1].isdigit()
+            if not between_digits:
+                if i + 1 >= length and not final and text[i - 1:i].isdigit():
+                    # 数字后的","可能是千分位，等待下一个字符
+                    return
+                strong = False
+
+        if strong is None:
+            i += 1
+            continue
+
+        end = i + 1
+        while end < length and text[end] in TRAILING_CHARS:
+            end += 1
+        yield end, strong
+        i = end
+
+class BaseTextSegmenter(ABC):
+    """文本分段器：位于LLM文本流与TTS之间，决定何时将累积的文本作为一段送入TTS"""
+
+    @abstractmethod
+    async def asegment(self, text_stream: AsyncGenerator[str, None]) -> AsyncGenerator[str, None]:
+        """将LLM的token流重新组织为适合TTS合成的文本段"""
+        pass
+
+class PassthroughSegmenter(BaseTextSegmenter):
+    """不做分段，LLM输出的每个片段直接送入TTS"""
+    def __init__(self, config: Optional[dict] = None):
+        pass
+
+    async def asegment(self, text_stream: AsyncGenerator[str, None]) -> AsyncGenerator[str, None]:
+        async for text in text_stream:
+            yield text
+
+class LatencyAwareSegmenter(BaseTextSegmenter):
+    """延迟感知的文本分段器
+
+    策略：
+    1. 首段尽快：遇到第一个分句标点（，。！？等）且不少于first_min_chars个字符即输出，
+       或等待超过first_max_wait_ms后立即输出已有文本，以缩短首音频延迟；
+    2. 后续按句：在句末标点处切分，且每段不少于min_chars个字符（过短的句子与下一句合并），
+       以减少TTS帧数并获得更自然的韵律；
+    3. 兜底：超过max_chars在最后一个断点处强制切分；等待超过max_wait_ms则输出已有文本。
+    """
+    def __init__(self, config: Optional[dict] = None):
+        config = config or {}
+        self.first_min_chars: int = config.get("first_min_chars", 2)
+        self.first_max_wait: float = config.get("first_max_wait_ms", 400) / 1000
+        self.min_chars: int = config.get("min_chars", 12)
+        self.max_chars: int = config.get("max_chars", 80)
+        self.max_wait: float = config.get("max_wait_ms", 1000) / 1000
+
+    def _find_cut(self, buffer: str, first: bool, timed_out: bool, final: bool) -> Optional[int]:
+        """返回buffer中应切分的位置，暂不切分时返回None"""
+        if not buffer.strip():
+            return len(buffer) if final and buffer else None
+
+        min_chars = self.first_min_chars if first else self.min_chars
+        breaks: List[Tuple[int, bool]] = []
+        for end, strong in iter_breaks(buffer, final):
+            if end > self.max_chars:
+                break
+            if (first or strong) and end >= min_chars:
+                return end
+            breaks.append((end, strong))
+
+        if final:
+            return len(buffer)
+        if len(buffer) >= self.max_chars or timed_out:
+            if breaks:
+                return breaks[-1][0]
+            # 没有标点时，避免把英文单词从中间切开
+            cut = min(len(buffer), self.max_chars)
+            space = buffer.rfind(" ", 0, cut)
+            return space + 1 if space > 0 and buffer[cut - 1:cut].isascii() and buffer[cut - 1:cut].isalpha() else cut
+        return None
+
+    async def asegment(self, text_stream: AsyncGenerator[str, None]) -> AsyncGenerator[str, None]:
+        loop = asyncio.get_running_loop()
+        iterator = text_stream.__aiter__()
+        pending: Optional[asyncio.Future] = None
+        buffer = ""
+        first = True
+        final = False
+        deadline: Optional[float] = None  # 最长等待计时器，从当前段的第一个非空白字符到达时开始计时
+        start_time = time.perf_counter()
+        segment_count = 0
+
+        try:
+            while True:
+                timed_out = False
+                if not final:
+                    if pending is None:
+                        pending = asyncio.ensure_future(iterator.__anext__())
+                    timeout = None if deadline is None else max(0.0, deadline - loop.time())
+                    done, _ = await asyncio.wait({pending}, timeout=timeout)
+                    if pending in done:
+                        try:
+                            text = pending.result()
+                            buffer += text
+                            # 只有空白（如工具调用前的换行）时不计时，否则超时后无法切分，计时器停在过去而空转
+                            if deadline is None and buffer.strip():
+                                deadline = loop.time() + (self.first_max_wait if first else self.max_wait)
+                        except StopAsyncIteration:
+                            final = True
+                        finally:
+                            pending = None
+                    else:
+                        timed_out = True
+
+                while True:
+                    cut = self._find_cut(buffer, first, timed_out, final)
+                    if cut is None or cut == 0:
+                        break
+                    segment, buffer = buffer[:cut].strip(), buffer[cut:].lstrip()
+                    timed_out = False
+                    deadline = loop.time() + self.max_wait if buffer else None
+                    if segment:
+                        if first:
+                            logger.debug(f"首个文本段延迟: {(time.perf_counter() - start_time) * 1000:.1f} ms")
+                        first = False
+                        segment_count += 1
+                        yield segment
+
+                if final:
+                    break
+        finally:
+            if pending is not None and not pending.done():
+                pending.cancel()
+            logger.debug(f"本轮回复共切分为 {segment_count} 个文本段")
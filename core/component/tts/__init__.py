@@ -1,4 +1,7 @@
 from core.component.tts.base import AsyncBaseTTSClient
 from core.component.tts.doubao import AsyncDouBaoTTSClient
+from core.component.tts.cache import CachedTTSClient
+from core.component.tts.failover import FailoverTTSClient
+from core.component.tts.parallel import ParallelTTSClient
 
-__all__ = ["AsyncBaseTTSClient", "AsyncDouBaoTTSClient"]
\ No newline at end of file
+__all__ = ["AsyncBaseTTSClient", "AsyncDouBaoTTSClient", "CachedTTSClient", "FailoverTTSClient", "ParallelTTSClient"]
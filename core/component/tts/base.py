@@ -1,8 +1,14 @@
 from abc import ABC, abstractmethod
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Callable, Optional
+
+# 分句边界的回调：listener(event, text)，event为EVENT_TTSSentenceStart/EVENT_TTSSentenceEnd，
+# 在该句的首个音频块输出之前（开始）与最后一个音频块输出之后（结束）调用，据此将音频与文本对齐
+SentenceListener = Callable[[int, str], None]
+
 class AsyncBaseTTSClient(ABC):
     @abstractmethod
-    async def astream_tts(self, text_stream: AsyncGenerator[str, None]) -> AsyncGenerator[bytes, None]:
+    async def astream_tts(self, text_stream: AsyncGenerator[str, None],
+                          sentence_listener: Optional[SentenceListener] = None) -> AsyncGenerator[bytes, None]:
         pass
 
     @abstractmethod
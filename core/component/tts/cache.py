@@ -0,0 +1,279 @@
+import os
+import mmap
+import time
+import hashlib
+import asyncio
+import logging
+import aiofiles
+from collections import OrderedDict
+from typing import Dict, Any, AsyncGenerator, Optional, Union
+
+from core.component.tts.base import AsyncBaseTTSClient, SentenceListener
+from core.component.tts.doubao_codec import EVENT_TTSSentenceStart, EVENT_TTSSentenceEnd
+from core.utils.tracer import tracer, MARK_TTS_FIRST_BYTE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_TEXT_CHARS = 30         # 只缓存不超过该长度的分段：问候、确认、报错与补位短语等短句才会重复出现
+DEFAULT_MAX_MEMORY_MB = 32          # 内存LRU的容量上限
+DEFAULT_MAX_DISK_MB = 256           # 磁盘存储的容量上限，超出时删除最久未使用的文件
+DEFAULT_MMAP_MIN_BYTES = 256 * 1024 # 不小于该大小的文件以内存映射读取，更小的文件直接读入内存
+DEFAULT_MAX_MAPPED = 16             # 内存LRU中内存映射条目数的上限：每个映射都占用一个文件描述符
+DEFAULT_CHUNK_BYTES = 9600          # 命中时按块输出音频，24kHz 16位单声道约200ms
+
+def tts_cache_key(text: str, speaker: str, speech_rate: Any, sample_rate: Any, audio_format: str) -> str:
+    """音频缓存键：文本与影响合成结果的参数（说话人、语速、采样率、音频格式）的摘要"""
+    raw = f"{speaker}|{speech_rate}|{sample_rate}|{audio_format}|{text.strip()}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+class TTSAudioStore:
+    """磁盘上的音频存储：每条音频一个文件，以缓存键命名
+
+    较大的文件以只读方式内存映射，较小的文件直接读入内存。总大小超过max_bytes时，
+    按修改时间删除最久未使用的文件（命中时更新修改时间）。
+    """
+    def __init__(self, cache_dir: str, max_bytes: int, mmap_min_bytes: int = DEFAULT_MMAP_MIN_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.mmap_min_bytes = mmap_min_bytes
+        self.evicted = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._disk_bytes = sum(size for _, _, size in self._files())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.audio")
+
+    def _files(self):
+        """磁盘上的音频文件：(修改时间, 路径, 大小)"""
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".audio"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, entry.path, stat.st_size))
+        return files
+
+    def get(self, key: str) -> Optional[Union[bytes, mmap.mmap]]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < self.mmap_min_bytes:
+                    audio = f.read() or None
+                else:
+                    audio = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if audio is not None:
+                os.utime(path)
+            return audio
+        except (FileNotFoundError, ValueError):
+            # ValueError: 空文件无法映射
+            return None
+
+    def put(self, key: str, audio: bytes) -> None:
+        """先写临时文件再重命名，避免读到写了一半的文件"""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        try:
+            self._disk_bytes -= os.path.getsize(path)
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_path, path)
+        self._disk_bytes += len(audio)
+        if self._disk_bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        """删除最久未使用的文件，直到总大小不超过上限"""
+        files = sorted(self._files())
+        self._disk_bytes = sum(size for _, _, size in files)
+        for _, path, size in files:
+            if self._disk_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._disk_bytes -= size
+            self.evicted += 1
+
+class TTSAudioCache:
+    """两级音频缓存：按字节数限制容量的内存LRU + 按字节数限制容量的磁盘存储（可选）
+
+    LRU中的内存映射条目不超过max_mapped个，超出时淘汰最久未使用的映射，避免占用过多文件描述符。
+    """
+    def __init__(self, max_memory_bytes: int, cache_dir: str = "", max_disk_bytes: int = DEFAULT_MAX_DISK_MB * 1024 * 1024,
+                 max_mapped: int = DEFAULT_MAX_MAPPED):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_mapped = max_mapped
+        self.store = TTSAudioStore(cache_dir, max_disk_bytes) if cache_dir else None
+        self._entries: "OrderedDict[str, Union[bytes, mmap.mmap]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._mapped = 0
+
+    def get(self, key: str) -> Optional[Union[bytes, mmap.mmap]]:
+        audio = self._entries.get(key)
+        if audio is not None:
+            self._entries.move_to_end(key)
+            return audio
+        if self.store is not None:
+            audio = self.store.get(key)
+            if audio is not None:
+                self._remember(key, audio)
+        return audio
+
+    def put(self, key: str, audio: bytes) -> None:
+        self._remember(key, audio)
+
+    def _remember(self, key: str, audio: Union[bytes, mmap.mmap]) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._forget(old)
+        self._entries[key] = audio
+        self._memory_bytes += len(audio)
+        self._mapped += isinstance(audio, mmap.mmap)
+        while self._memory_bytes > self.max_memory_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._forget(evicted)
+        if self._mapped > self.max_mapped:
+            for mapped_key in [k for k, v in self._entries.items() if isinstance(v, mmap.mmap)][:self._mapped - self.max_mapped]:
+                self._forget(self._entries.pop(mapped_key))
+
+    def _forget(self, audio: Union[bytes, mmap.mmap]) -> None:
+        # 淘汰的映射不主动关闭：正在输出的分段可能仍持有其视图，引用释放后随之关闭
+        self._memory_bytes -= len(audio)
+        self._mapped -= isinstance(audio, mmap.mmap)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class CachedTTSClient(AsyncBaseTTSClient):
+    """带短句音频缓存的TTS客户端（可选启用）
+
+    文本分段器送来的每个分段单独合成：短分段以（文本、说话人、语速、采样率、音频格式）为键查找缓存，
+    命中时直接按块输出缓存的音频，无需请求TTS服务；未命中时请求内层客户端，完整合成后写入缓存。
+    被打断而未合成完整的分段不会写入缓存。
+    """
+    def __init__(self, inner: AsyncBaseTTSClient, config: Optional[dict] = None):
+        config = config or {}
+        self.inner = inner
+        self.max_text_chars: int = config.get("max_text_chars", DEFAULT_MAX_TEXT_CHARS)
+        self.chunk_bytes: int = config.get("chunk_bytes", DEFAULT_CHUNK_BYTES)
+        self.cache = TTSAudioCache(
+            int(config.get("max_memory_mb", DEFAULT_MAX_MEMORY_MB) * 1024 * 1024),
+            config.get("cache_dir", ""),
+            int(config.get("max_disk_mb", DEFAULT_MAX_DISK_MB) * 1024 * 1024),
+            config.get("max_mapped", DEFAULT_MAX_MAPPED)
+        )
+
+        self.segments = 0
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.saved_ms = 0.0
+        self._miss_first_chunk_ms = 0.0     # 未命中时首个音频块延迟的累计，命中时按其均值计入节省的延迟
+
+    @property
+    def speaker(self) -> str:
+        return getattr(self.inner, "speaker", "")
+
+    @property
+    def audio_sample_rate(self) -> int:
+        return getattr(self.inner, "audio_sample_rate", 0)
+
+    @property
+    def audio_format(self) -> str:
+        return getattr(self.inner, "audio_format", "")
+
+    @property
+    def speech_rate(self) -> int:
+        return getattr(self.inner, "speech_rate", 0)
+
+    def _cache_key(self, text: str) -> Optional[str]:
+        """生成缓存键，过长而不值得缓存的分段返回None"""
+        if len(text.strip()) > self.max_text_chars:
+            return None
+        return tts_cache_key(text, self.speaker, self.speech_rate, self.audio_sample_rate, self.audio_format)
+
+    async def _synthesize(self, text: str) -> AsyncGenerator[Any, None]:
+        """合成一个分段：命中缓存时直接输出，否则请求内层客户端并在完整合成后写入缓存"""
+        self.segments += 1
+        key = self._cache_key(text)
+        audio = self.cache.get(key) if key is not None else None
+        if audio is not None:
+            self.hits += 1
+            self.bytes_saved += len(audio)
+            if self.misses:
+                self.saved_ms += self._miss_first_chunk_ms / self.misses
+            tracer.mark(MARK_TTS_FIRST_BYTE)
+            view = memoryview(audio)
+            for offset in range(0, len(view), self.chunk_bytes):
+                yield view[offset:offset + self.chunk_bytes]
+            return
+
+        async def single_segment():
+            yield text
+
+        start_time = time.perf_counter()
+        first_chunk_ms = None
+        chunks = []
+        async for chunk in self.inner.astream_tts(single_segment()):
+            if first_chunk_ms is None:
+                first_chunk_ms = (time.perf_counter() - start_time) * 1000
+            if key is not None:
+                chunks.append(bytes(chunk))
+            yield chunk
+        if key is None:
+            return
+        self.misses += 1
+        self._miss_first_chunk_ms += first_chunk_ms or 0.0
+        if chunks:
+            audio = b"".join(chunks)
+            self.cache.put(key, audio)
+            if self.cache.store is not None:
+                await asyncio.to_thread(self.cache.store.put, key, audio)
+
+    async def astream_tts(self, text_stream: AsyncGenerator[str, None],
+                          sentence_listener: Optional[SentenceListener] = None) -> AsyncGenerator[bytes, None]:
+        async for text in text_stream:
+            if not text.strip():
+                continue
+            # 逐段合成，每个分段即为一句
+            if sentence_listener is not None:
+                sentence_listener(EVENT_TTSSentenceStart, text)
+            async for chunk in self._synthesize(text):
+                yield chunk
+            if sentence_listener is not None:
+                sentence_listener(EVENT_TTSSentenceEnd, text)
+
+    async def astream_tts_to_file(self, text_stream: AsyncGenerator[str, None], output_path: str) -> None:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        async with aiofiles.open(output_path, "wb") as f:
+            async for audio_chunk in self.astream_tts(text_stream):
+                await f.write(audio_chunk)
+
+    def stats(self) -> Dict[str, Any]:
+        """导出缓存统计：命中率、节省的音频字节数与首包延迟"""
+        lookups = self.hits + self.misses
+        return {
+            "segments": self.segments,
+            "entries": len(self.cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "saved_ms": round(self.saved_ms, 1),
+            "disk_evicted": self.cache.store.evicted if self.cache.store is not None else 0,
+        }
+
+    async def init(self) -> None:
+        if hasattr(self.inner, "init"):
+            await self.inner.init()
+
+    async def close(self) -> None:
+        logger.info(f"TTS音频缓存统计: {self.stats()}")
+        if hasattr(self.inner, "close"):
+            await self.inner.close()
@@ -1,118 +1,231 @@
 import os
 import json
+import time
 import uuid
+import random
 import asyncio
 import logging
 import aiofiles
-import websockets
-from typing import Optional, Dict, Any, AsyncGenerator
+from typing import Optional, Dict, Any, AsyncGenerator, Callable, List
 
-from core.component.tts.base import AsyncBaseTTSClient
+from core.component.tts.base import AsyncBaseTTSClient, SentenceListener
+from core.component.tts.doubao_codec import (
+    AUDIO_ONLY_RESPONSE, ERROR_INFORMATION,
+    EVENT_ConnectionStarted, EVENT_SessionStarted, EVENT_SessionFinished, EVENT_SessionFailed,
+    EVENT_TTSSentenceStart, EVENT_TTSSentenceEnd, EVENT_TTSResponse,
+    START_CONNECTION_FRAME, FINISH_CONNECTION_FRAME, Response, DouBaoRequestEncoder, decode_response
+)
+from core.utils.tracer import tracer, MARK_TTS_FIRST_BYTE
 
 logger = logging.getLogger(__name__)
 
-# 协议版本和头部大小常量
-PROTOCOL_VERSION = 0b0001       # 协议版本号
-DEFAULT_HEADER_SIZE = 0b0001    # 默认头部大小
-
-# 消息类型常量
-FULL_CLIENT_REQUEST = 0b0001    # 客户端完整请求
-AUDIO_ONLY_RESPONSE = 0b1011    # 仅音频响应
-FULL_SERVER_RESPONSE = 0b1001   # 服务器完整响应
-ERROR_INFORMATION = 0b1111      # 错误信息
-
-# 消息类型特定标志
-MsgTypeFlagNoSeq = 0b0000       # 无序列号的非终止包
-MsgTypeFlagPositiveSeq = 0b1    # 序列号大于0的非终止包
-MsgTypeFlagLastNoSeq = 0b10     # 无序列号的最后一个包
-MsgTypeFlagNegativeSeq = 0b11   # 包含事件编号的负序列号
-MsgTypeFlagWithEvent = 0b100    # 包含事件
-
-# 消息序列化方式
-NO_SERIALIZATION = 0b0000       # 无序列化
-JSON = 0b0001                   # JSON序列化
-
-# 消息压缩方式
-COMPRESSION_NO = 0b0000         # 无压缩
-COMPRESSION_GZIP = 0b0001       # GZIP压缩
-
-# 事件类型常量
-# 基础事件
-EVENT_NONE = 0                  # 无事件
-EVENT_Start_Connection = 1      # 开始连接
-EVENT_FinishConnection = 2      # 结束连接
-EVENT_ConnectionStarted = 50    # 连接成功建立
-EVENT_ConnectionFailed = 51     # 连接失败（如权限认证失败）
-EVENT_ConnectionFinished = 52   # 连接结束
-
-# 会话事件（上行）
-EVENT_StartSession = 100        # 开始会话
-EVENT_FinishSession = 102       # 结束会话
-
-# 会话事件（下行）
-EVENT_SessionStarted = 150      # 会话开始
-EVENT_SessionFinished = 152     # 会话结束
-EVENT_SessionFailed = 153       # 会话失败
-
-# 任务事件（上行）
-EVENT_TaskRequest = 200         # 任务请求
-
-# TTS特定事件（下行）
-EVENT_TTSSentenceStart = 350    # 句子开始
-EVENT_TTSSentenceEnd = 351      # 句子结束
-EVENT_TTSResponse = 352         # TTS响应
-
-class Header:
-    """消息头部类"""
-    def __init__(self,
-                 message_type: int = 0,
-                 message_type_specific_flags: int = 0,
-                 serial_method: int = NO_SERIALIZATION):
-        self.protocol_version = PROTOCOL_VERSION
-        self.header_size = DEFAULT_HEADER_SIZE
-        self.message_type = message_type
-        self.message_type_specific_flags = message_type_specific_flags
-        self.serial_method = serial_method
-        self.compression_type = 0
-        self.reserved_data = 0
-
-    def as_bytes(self) -> bytes:
-        return bytes([
-            (self.protocol_version << 4) | self.header_size,
-            (self.message_type << 4) | self.message_type_specific_flags,
-            (self.serial_method << 4) | self.compression_type,
-            self.reserved_data
-        ])
-
-class Optional:
-    """可选信息类"""
-    def __init__(self, event: int = EVENT_NONE, session_id: str = None):
-        self.event = event
-        self.session_id = session_id
-        self.error_code: int = 0
-        self.connection_id: str | None = None
-        self.response_meta_json: str | None = None
-
-    def as_bytes(self) -> bytes:
-        option_bytes = bytearray()
-        if self.event != EVENT_NONE:
-            option_bytes.extend(self.event.to_bytes(4, "big", signed=True))
-        if self.session_id is not None:
-            session_id_bytes = str.encode(self.session_id)
-            size = len(session_id_bytes).to_bytes(4, "big", signed=True)
-            option_bytes.extend(size)
-            option_bytes.extend(session_id_bytes)
-        return option_bytes
-
-class Response:
-    """响应类"""
-    def __init__(self, header: Header, optional: Optional):
-        self.header = header
-        self.optional = optional
-        self.payload: bytes | None = None
+DEFAULT_POOL_SIZE = 2               # 连接池中保持就绪（已完成握手、空闲）的连接数
+DEFAULT_IDLE_REFRESH_S = 60         # 空闲超过该时长的连接在后台替换为新连接，避免使用已被服务端关闭的连接
+DEFAULT_DRAIN_TIMEOUT_S = 10        # 被打断的会话等待EVENT_SessionFinished的最长时间，超时则关闭该连接
+DEFAULT_HEALTH_CHECK_INTERVAL_S = 5 # 连接池的巡检间隔
+DEFAULT_KEEPALIVE_INTERVAL_S = 15   # WebSocket心跳（ping）间隔，及早发现被服务端或网络静默关闭的连接
+DEFAULT_KEEPALIVE_TIMEOUT_S = 10    # 心跳超时时间，超时即视为连接断开
+DEFAULT_RECONNECT_BACKOFF_S = 0.2   # 后台重连的初始退避时间，每次失败翻倍
+DEFAULT_RECONNECT_BACKOFF_MAX_S = 10    # 后台重连的最大退避时间
+DEFAULT_RESUME_RETRIES = 2          # 会话进行中连接断开时，在新连接上恢复会话的最大次数
+
+class TTSConnectionError(ConnectionError):
+    """TTS的WebSocket连接已断开或不可用，可以在新连接上重试"""
+
+def sentence_text(payload: Optional[memoryview]) -> str:
+    """取出分句事件（EVENT_TTSSentenceStart/End）payload中的句子文本，没有时返回空字符串"""
+    try:
+        content = json.loads(bytes(payload)) if payload else {}
+    except ValueError:
+        return ""
+    return content.get("text", "") if isinstance(content, dict) else ""
+
+class DouBaoTTSConnection:
+    """一条已完成StartConnection握手的WebSocket连接
+
+    后台读取任务按session_id将服务器返回的帧分发到各会话的队列，不属于进行中会话的帧直接丢弃。
+    一条连接同一时间只承载一个会话：会话被提前结束（如打断）后，服务器仍会返回剩余的音频，
+    在收到该会话的EVENT_SessionFinished之前，连接处于排空状态，不接受新会话。
+    """
+    def __init__(self, url: str, headers: Dict[str, str], keepalive_interval: Optional[float] = DEFAULT_KEEPALIVE_INTERVAL_S,
+                 keepalive_timeout: Optional[float] = DEFAULT_KEEPALIVE_TIMEOUT_S,
+                 on_lost: Optional[Callable[["DouBaoTTSConnection"], None]] = None):
+        self.url = url
+        self.headers = headers
+        self.keepalive_interval = keepalive_interval
+        self.keepalive_timeout = keepalive_timeout
+        self.on_lost = on_lost      # 连接意外断开（非主动关闭）时的回调
+        self.ws = None
+        self.connection_id = None
+        self._reader_task = None
+        self._sessions: Dict[str, asyncio.Queue] = {}
+        self._draining: Dict[str, float] = {}   # 排空中的会话 -> 开始排空的时间
+        self.last_used = time.monotonic()
+        self.dropped_frames = 0     # 已结束（如被打断）的会话残留的帧，收到后直接丢弃
+
+    @property
+    def alive(self) -> bool:
+        return self.ws is not None and self._reader_task is not None and not self._reader_task.done()
+
+    @property
+    def ready(self) -> bool:
+        """连接可用且空闲，可以立即开始新会话"""
+        return self.alive and not self._sessions and not self._draining
+
+    @property
+    def usable(self) -> bool:
+        """连接可用且没有排空中的会话：空闲，或当前会话正常结束后即可复用"""
+        return self.alive and not self._draining
+
+    def drain_age(self, now: float) -> float:
+        """最早的排空中会话已等待的时长（秒）"""
+        return now - min(self._draining.values()) if self._draining else 0.0
+
+    async def open(self) -> None:
+        """建立WebSocket连接并完成StartConnection握手"""
+        import websockets
+        self.ws = await websockets.connect(
+            self.url,
+            additional_headers={**self.headers, "X-Api-Connect-Id": str(uuid.uuid4())},
+            max_size=1000000000,
+            ping_interval=self.keepalive_interval,
+            ping_timeout=self.keepalive_timeout
+        )
+        try:
+            await self._start_connection()
+            res = await self._parse_response()
+            if res.optional.event != EVENT_ConnectionStarted:
+                raise RuntimeError("Failed to establish connection")
+        except BaseException:
+            ws, self.ws = self.ws, None
+            await ws.close()
+            raise
+        self.connection_id = res.optional.connection_id
+        self.last_used = time.monotonic()
+        self._reader_task = asyncio.create_task(self._reader_loop(), name='tts_reader')
+        logger.debug(f"WebSocket connection established: {self.connection_id}")
+
+    async def close(self) -> None:
+        """结束连接"""
+        if self.ws is None:
+            return
+        try:
+            if self.alive:
+                await self._finish_connection()
+        except Exception as e:
+            logger.debug(f"结束TTS连接失败: {str(e)}")
+        finally:
+            ws, self.ws = self.ws, None
+            if self._reader_task is not None:
+                self._reader_task.cancel()
+                try:
+                    await self._reader_task
+                except asyncio.CancelledError:
+                    pass
+            await ws.close()
+        logger.debug(f"WebSocket connection closed: {self.connection_id}")
+
+    async def _reader_loop(self) -> None:
+        """后台读取任务：按session_id分发服务器返回的帧
+
+        已注册会话的帧放入对应队列；不属于任何进行中会话的帧（被打断的会话仍在返回的音频）直接丢弃，
+        新会话无需排在这些残留音频之后逐帧读取。连接断开时，将TTSConnectionError通知所有进行中的会话，
+        并通过on_lost回调通知连接池。
+        """
+        error: Exception = TTSConnectionError("WebSocket connection closed")
+        try:
+            while True:
+                res = await self._parse_response()
+                session_id = res.optional.session_id
+                if session_id is None:
+                    if res.header.message_type == ERROR_INFORMATION:
+                        # 错误信息不携带session_id，通知所有进行中的会话
+                        message = bytes(res.payload).decode(errors="ignore") if res.payload else ""
+                        for queue in self._sessions.values():
+                            queue.put_nowait(RuntimeError(f"TTS error {res.optional.error_code}: {message}"))
+                    else:
+                        logger.debug(f"收到连接级事件: {res.optional.event}")
+                    continue
+                queue = self._sessions.get(session_id)
+                if queue is not None:
+                    queue.put_nowait(res)
+                    continue
+                self.dropped_frames += 1
+                if session_id in self._draining and res.optional.event in [EVENT_SessionFinished, EVENT_SessionFailed]:
+                    # 被打断的会话已结束，连接重新可用
+                    del self._draining[session_id]
+                    self.last_used = time.monotonic()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = TTSConnectionError(f"TTS连接已断开: {str(e)}")
+            if self.ws is not None:
+                logger.warning(f"TTS连接已断开: {str(e)}")
+        finally:
+            for queue in self._sessions.values():
+                queue.put_nowait(error)
+            # 主动关闭时ws已置空，不通知
+            if self.ws is not None and self.on_lost is not None:
+                self.on_lost(self)
+
+    def open_session(self, session_id: str) -> None:
+        """注册会话的接收队列，须在发送EVENT_StartSession之前调用"""
+        self._sessions[session_id] = asyncio.Queue()
+        self.last_used = time.monotonic()
+
+    def close_session(self, session_id: str, finished: bool) -> None:
+        """注销会话，之后收到的该会话的帧将被丢弃。未收到EVENT_SessionFinished时，连接进入排空状态"""
+        self._sessions.pop(session_id, None)
+        if not finished and self.alive:
+            self._draining[session_id] = time.monotonic()
+        self.last_used = time.monotonic()
+
+    def abort_session(self, session_id: str, error: Exception) -> None:
+        """将异常通知给等待该会话帧的接收方"""
+        queue = self._sessions.get(session_id)
+        if queue is not None:
+            queue.put_nowait(error)
+
+    async def recv(self, session_id: str) -> Response:
+        """从会话的队列中取出下一帧"""
+        item = await self._sessions[session_id].get()
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    async def _start_connection(self):
+        """启动连接"""
+        await self.send(START_CONNECTION_FRAME)
+
+    async def _finish_connection(self):
+        """结束连接"""
+        await self.send(FINISH_CONNECTION_FRAME)
+
+    async def send(self, frame: bytes):
+        """发送已编码的请求帧"""
+        if not self.ws:
+            raise TTSConnectionError("WebSocket connection not established")
+        try:
+            await self.ws.send(frame)
+        except Exception as e:
+            raise TTSConnectionError(f"发送失败: {str(e)}") from e
+
+    async def _parse_response(self) -> Response:
+        """接收并解析响应"""
+        if not self.ws:
+            raise RuntimeError("WebSocket connection not established")
+        return decode_response(await self.ws.recv())
 
 class AsyncDouBaoTTSClient(AsyncBaseTTSClient):
-    """豆包TTS客户端实现"""
+    """豆包TTS客户端实现
+
+    维护一个预先完成握手的WebSocket连接池：每次回复都在一条就绪的连接上开始会话，
+    首包延迟不包含建立连接与StartConnection握手的时间。后台任务定期巡检，
+    替换已断开、排空超时或长时间空闲的连接，并补足可用连接数。
+
+    连接通过心跳保活；连接意外断开时立即移出连接池，并在后台按带抖动的指数退避重连。
+    会话进行中连接断开时，在新连接上从第一个未合成完的句子起重新发送文本，并跳过该句已经输出的音频。
+    """
     
     def __init__(self, config: Dict[str, Any]):
         """
@@ -128,202 +241,221 @@ class AsyncDouBaoTTSClient(AsyncBaseTTSClient):
         self.audio_format = config.get('audio_format', 'pcm')
         self.audio_sample_rate = config.get('audio_sample_rate', 24000)
         self.speech_rate = config.get('speech_rate', 0)
+        # 请求帧的编码器：头部与请求参数预先序列化，发送文本时只拼接文本
+        self._encoder = DouBaoRequestEncoder(self.speaker, self.audio_format, self.audio_sample_rate, self.speech_rate)
+
+        self.pool_size = max(1, config.get('pool_size', DEFAULT_POOL_SIZE))
+        self.idle_refresh = config.get('idle_refresh_s', DEFAULT_IDLE_REFRESH_S)
+        self.drain_timeout = config.get('drain_timeout_s', DEFAULT_DRAIN_TIMEOUT_S)
+        self.health_check_interval = config.get('health_check_interval_s', DEFAULT_HEALTH_CHECK_INTERVAL_S)
+        self.keepalive_interval = config.get('keepalive_interval_s', DEFAULT_KEEPALIVE_INTERVAL_S)
+        self.keepalive_timeout = config.get('keepalive_timeout_s', DEFAULT_KEEPALIVE_TIMEOUT_S)
+        self.reconnect_backoff = config.get('reconnect_backoff_s', DEFAULT_RECONNECT_BACKOFF_S)
+        self.reconnect_backoff_max = config.get('reconnect_backoff_max_s', DEFAULT_RECONNECT_BACKOFF_MAX_S)
+        self.resume_retries = config.get('resume_retries', DEFAULT_RESUME_RETRIES)
         
-        self.ws = None
+        self._pool = []             # List[DouBaoTTSConnection]
+        self._opening = 0           # 正在建立中的连接数
+        self._maintain_task = None
+        self._replenish_task = None
         self._initialized = False
+
+        self.cold_starts = 0        # 没有就绪连接、只能现场建立连接的次数
+        self.replaced = 0           # 因断开、排空超时或空闲而被替换的连接数
+        self._retired_dropped_frames = 0
+        self.disconnects = 0        # 意外断开的连接数
+        self.reconnects = 0         # 为替换断开的连接而重新建立的连接数
+        self.reconnect_failures = 0 # 后台重连失败的次数
+        self.resumed_sessions = 0   # 连接断开后在新连接上恢复的会话次数
+        self.resume_failures = 0    # 超过重试次数等原因未能恢复、回复中断的次数
+        self._resume_ms: List[float] = []   # 每次恢复从断开到重新输出音频的耗时
+        self._lost_pending = 0      # 尚未重建的断开连接数
+        self._background = set()    # 关闭断开连接的后台任务
+
+    @property
+    def dropped_frames(self) -> int:
+        """已结束（如被打断）的会话残留的帧数"""
+        return self._retired_dropped_frames + sum(conn.dropped_frames for conn in self._pool)
         
     async def init(self):
-        """异步初始化，建立WebSocket连接"""
+        """异步初始化，预先建立连接池中的WebSocket连接"""
         if self._initialized:
             return
             
-        await self._connect()
+        errors = await self._fill_pool()
+        if not self._pool:
+            raise errors[0]
+        self._maintain_task = asyncio.create_task(self._maintain_loop(), name='tts_pool_maintain')
         self._initialized = True
         
     async def close(self):
-        """关闭连接并清理资源"""
-        if self._initialized:
-            await self._finish_connection()
-            self._initialized = False
-
-    async def _connect(self) -> None:
-        """建立WebSocket连接"""
-        if self.ws:
+        """关闭连接池并清理资源"""
+        if not self._initialized:
             return
-            
-        ws_header = {
+        self._initialized = False
+        for task in (self._maintain_task, self._replenish_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._maintain_task = self._replenish_task = None
+        await asyncio.gather(*self._background, return_exceptions=True)
+        pool, self._pool = self._pool, []
+        await asyncio.gather(*(conn.close() for conn in pool), return_exceptions=True)
+        self._retired_dropped_frames += sum(conn.dropped_frames for conn in pool)
+        logger.info(f"TTS连接池统计: {self.stats()}")
+
+    def stats(self) -> Dict[str, Any]:
+        """导出连接池统计"""
+        return {
+            "connections": len(self._pool),
+            "ready": sum(1 for conn in self._pool if conn.ready),
+            "cold_starts": self.cold_starts,
+            "replaced": self.replaced,
+            "dropped_frames": self.dropped_frames,
+            "disconnects": self.disconnects,
+            "reconnects": self.reconnects,
+            "reconnect_failures": self.reconnect_failures,
+            "resumed_sessions": self.resumed_sessions,
+            "resume_failures": self.resume_failures,
+            "resume_ms": round(sum(self._resume_ms) / len(self._resume_ms), 1) if self._resume_ms else 0.0,
+        }
+
+    async def _open_connection(self) -> DouBaoTTSConnection:
+        """建立一条新连接并加入连接池"""
+        conn = DouBaoTTSConnection(self.url, {
             "X-Api-App-Key": self.app_id,
             "X-Api-Access-Key": self.token,
             "X-Api-Resource-Id": 'volc.service_type.10029',
-            "X-Api-Connect-Id": str(uuid.uuid4()),
-        }
-        
-        self.ws = await websockets.connect(
-            self.url, 
-            additional_headers=ws_header,
-            max_size=1000000000
-        )
-        
-        # 建立连接
-        await self._start_connection()
-        res = await self._parse_response()
-        if res.optional.event != EVENT_ConnectionStarted:
-            raise RuntimeError("Failed to establish connection")
-        logger.debug("WebSocket connection established")
+        }, self.keepalive_interval, self.keepalive_timeout, self._on_connection_lost)
+        self._opening += 1
+        try:
+            await conn.open()
+        finally:
+            self._opening -= 1
+        self._pool.append(conn)
+        if self._lost_pending:
+            self._lost_pending -= 1
+            self.reconnects += 1
+        return conn
+
+    def _on_connection_lost(self, conn: DouBaoTTSConnection) -> None:
+        """连接意外断开：立即移出连接池并在后台重连，不等到下一次巡检"""
+        if conn not in self._pool:
+            return
+        self._pool.remove(conn)
+        self.disconnects += 1
+        self._lost_pending += 1
+        self.replaced += 1
+        task = asyncio.create_task(self._retire(conn), name='tts_retire')
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        if self._initialized:
+            self._schedule_replenish()
 
-    async def _start_connection(self):
-        """启动连接"""
-        header = Header(
-            message_type=FULL_CLIENT_REQUEST,
-            message_type_specific_flags=MsgTypeFlagWithEvent
-        ).as_bytes()
-        optional = Optional(event=EVENT_Start_Connection).as_bytes()
-        payload = str.encode("{}")
-        await self._send_event(header, optional, payload)
-
-    async def _start_session(self, session_id: str):
-        """启动会话"""
-        header = Header(
-            message_type=FULL_CLIENT_REQUEST,
-            message_type_specific_flags=MsgTypeFlagWithEvent,
-            serial_method=JSON
-        ).as_bytes()
-        optional = Optional(event=EVENT_StartSession, session_id=session_id).as_bytes()
-        payload = self._get_payload(event=EVENT_StartSession)
-        await self._send_event(header, optional, payload)
-
-    async def _send_text(self, text: str, session_id: str):
-        """发送文本"""
-        header = Header(
-            message_type=FULL_CLIENT_REQUEST,
-            message_type_specific_flags=MsgTypeFlagWithEvent,
-            serial_method=JSON
-        ).as_bytes()
-        optional = Optional(event=EVENT_TaskRequest, session_id=session_id).as_bytes()
-        payload = self._get_payload(event=EVENT_TaskRequest, text=text)
-        await self._send_event(header, optional, payload)
-
-    async def _finish_session(self, session_id: str):
-        """结束会话"""
-        header = Header(
-            message_type=FULL_CLIENT_REQUEST,
-            message_type_specific_flags=MsgTypeFlagWithEvent,
-            serial_method=JSON
-        ).as_bytes()
-        optional = Optional(event=EVENT_FinishSession, session_id=session_id).as_bytes()
-        payload = str.encode('{}')
-        await self._send_event(header, optional, payload)
+    async def _fill_pool(self) -> list:
+        """并发建立连接，补足可用连接数，返回建立失败的异常
 
-    async def _finish_connection(self):
-        """结束连接"""
-        if not self.ws:
-            return
-            
-        header = Header(
-            message_type=FULL_CLIENT_REQUEST,
-            message_type_specific_flags=MsgTypeFlagWithEvent,
-            serial_method=JSON
-        ).as_bytes()
-        optional = Optional(event=EVENT_FinishConnection).as_bytes()
-        payload = str.encode('{}')
-        await self._send_event(header, optional, payload)
-        await self.ws.close()
-        self.ws = None
-        logger.debug("WebSocket connection closed")
+        正在使用的连接在会话结束后即可复用，与就绪连接一样计入pool_size；
+        只有排空中（被打断）或已断开的连接需要新连接替补，否则每轮对话都会新建一条连接、巡检时再关闭。
+        """
+        missing = self.pool_size - self._opening - sum(1 for conn in self._pool if conn.usable)
+        if missing <= 0:
+            return []
+        results = await asyncio.gather(*(self._open_connection() for _ in range(missing)), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        for error in errors:
+            logger.error(f"建立TTS连接失败: {str(error)}")
+        return errors
+
+    def _schedule_replenish(self) -> None:
+        """在后台补足可用连接，不阻塞当前会话"""
+        if self._replenish_task is None or self._replenish_task.done():
+            self._replenish_task = asyncio.create_task(self._replenish(), name='tts_pool_replenish')
+
+    async def _replenish(self) -> None:
+        """补足可用连接，失败时按带抖动的指数退避重试，避免网络故障时所有客户端同时重连"""
+        attempt = 0
+        while True:
+            errors = await self._fill_pool()
+            if not errors:
+                return
+            self.reconnect_failures += len(errors)
+            delay = min(self.reconnect_backoff_max, self.reconnect_backoff * 2 ** attempt)
+            attempt += 1
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    async def _retire(self, conn: DouBaoTTSConnection) -> None:
+        """将连接移出连接池并关闭"""
+        if conn in self._pool:
+            self._pool.remove(conn)
+        self._retired_dropped_frames += conn.dropped_frames
+        conn.dropped_frames = 0
+        await conn.close()
+
+    async def _maintain_loop(self) -> None:
+        """定期巡检连接池：替换已断开、排空超时或长时间空闲的连接，关闭多余的就绪连接，补足可用连接数"""
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                await self._maintain()
+            except Exception as e:
+                logger.error(f"TTS连接池巡检失败: {str(e)}")
+
+    async def _maintain(self) -> None:
+        now = time.monotonic()
+        stale = []
+        for conn in list(self._pool):
+            if not conn.alive or conn.drain_age(now) > self.drain_timeout:
+                self.replaced += 1
+                stale.append(conn)
+            elif conn.ready and now - conn.last_used > self.idle_refresh:
+                self.replaced += 1
+                stale.append(conn)
+        for conn in stale:
+            self._pool.remove(conn)
+        # 排空结束后重新就绪的连接可能超出所需数量
+        excess = sum(1 for conn in self._pool if conn.usable) - self.pool_size
+        ready = [conn for conn in self._pool if conn.ready]
+        for conn in ready[len(ready) - excess:] if excess > 0 else []:
+            self._pool.remove(conn)
+            stale.append(conn)
+        # 先建立新连接，再关闭旧连接
+        await self._fill_pool()
+        await asyncio.gather(*(self._retire(conn) for conn in stale), return_exceptions=True)
+
+    async def _acquire(self, session_id: str) -> DouBaoTTSConnection:
+        """取一条就绪的连接并注册会话；连接池中没有就绪连接时现场建立"""
+        await self.init()
+        conn = next((conn for conn in self._pool if conn.ready), None)
+        if conn is None:
+            self.cold_starts += 1
+            logger.warning(f"TTS连接池中没有就绪的连接，现场建立连接，统计: {self.stats()}")
+            conn = await self._open_connection()
+        conn.open_session(session_id)
+        if sum(1 for conn in self._pool if conn.usable) + self._opening < self.pool_size:
+            self._schedule_replenish()
+        return conn
+
+    async def _start_session(self, conn: DouBaoTTSConnection, session_id: str):
+        """启动会话"""
+        await conn.send(self._encoder.start_session(session_id))
 
-    async def _send_event(self, header: bytes, optional: bytes, payload: bytes):
-        """发送事件"""
-        if not self.ws:
-            raise RuntimeError("WebSocket connection not established")
-            
-        request = bytearray(header)
-        request.extend(optional)
-        if payload:
-            payload_size = len(payload).to_bytes(4, 'big', signed=True)
-            request.extend(payload_size)
-            request.extend(payload)
-        await self.ws.send(request)
-
-    def _get_payload(self, event=EVENT_NONE, text='') -> bytes:
-        """生成负载数据"""
-        return str.encode(json.dumps({
-            "user": {"uid": str(uuid.uuid4())},
-            "event": event,
-            "namespace": "BidirectionalTTS",
-            "req_params": {
-                "text": text,
-                "speaker": self.speaker,
-                "audio_params": {
-                    "format": self.audio_format,
-                    "sample_rate": self.audio_sample_rate,
-                    "speech_rate": self.speech_rate
-                }
-            }
-        }))
+    async def _wait_session_started(self, conn: DouBaoTTSConnection, session_id: str) -> None:
+        res = await conn.recv(session_id)
+        if res.optional.event != EVENT_SessionStarted:
+            logger.error(f"会话启动失败: {res.optional.event}, {res.optional.response_meta_json}")
+            raise RuntimeError("会话启动失败")
 
-    async def _parse_response(self) -> Response:
-        """解析响应"""
-        if not self.ws:
-            raise RuntimeError("WebSocket connection not established")
-        
-        res = await self.ws.recv()
+    async def _send_text(self, conn: DouBaoTTSConnection, text: str, session_id: str):
+        """发送文本"""
+        await conn.send(self._encoder.task_request(session_id, text))
 
-        if isinstance(res, str):
-            raise RuntimeError(res)
-            
-        response = Response(Header(), Optional())
-        header = response.header
-        
-        # 解析头部
-        num = 0b00001111
-        header.protocol_version = res[0] >> 4 & num
-        header.header_size = res[0] & 0x0f
-        header.message_type = (res[1] >> 4) & num
-        header.message_type_specific_flags = res[1] & 0x0f
-        header.serial_method = res[2] >> num
-        header.compression_type = res[2] & 0x0f
-        header.reserved_data = res[3]
-        
-        # 解析可选信息和负载
-        offset = 4
-        optional = response.optional
-        if header.message_type in [FULL_SERVER_RESPONSE, AUDIO_ONLY_RESPONSE]:
-            if header.message_type_specific_flags == MsgTypeFlagWithEvent:
-                optional.event = int.from_bytes(res[offset:offset+4], 'big')
-                offset += 4
-                if optional.event != EVENT_NONE:
-                    if optional.event == EVENT_ConnectionStarted:
-                        optional.connection_id, offset = self._read_content(res, offset)
-                    elif optional.event == EVENT_ConnectionFailed:
-                        optional.response_meta_json, offset = self._read_content(res, offset)
-                    elif optional.event in [EVENT_SessionStarted, EVENT_SessionFailed]:
-                        optional.session_id, offset = self._read_content(res, offset)
-                        optional.response_meta_json, offset = self._read_content(res, offset)
-                    else:
-                        optional.session_id, offset = self._read_content(res, offset)
-                        response.payload, offset = self._read_payload(res, offset)
-        elif header.message_type == ERROR_INFORMATION:
-            optional.error_code = int.from_bytes(res[offset:offset+4], "big", signed=True)
-            offset += 4
-            response.payload, offset = self._read_payload(res, offset)
-            
-        return response
-
-    def _read_content(self, res: bytes, offset: int):
-        """读取内容"""
-        content_size = int.from_bytes(res[offset:offset+4], 'big')
-        offset += 4
-        content = res[offset:offset+content_size].decode()
-        offset += content_size
-        return content, offset
-
-    def _read_payload(self, res: bytes, offset: int):
-        """读取负载"""
-        payload_size = int.from_bytes(res[offset:offset+4], 'big')
-        offset += 4
-        payload = res[offset:offset+payload_size]
-        offset += payload_size
-        return payload, offset
+    async def _finish_session(self, conn: DouBaoTTSConnection, session_id: str):
+        """结束会话"""
+        await conn.send(self._encoder.finish_session(session_id))
 
     async def tts_to_file(self, text: str, output_path: str) -> None:
         """
@@ -332,33 +464,36 @@ class AsyncDouBaoTTSClient(AsyncBaseTTSClient):
             text: 要转换的文本
             output_path: 输出音频文件路径
         """
+        conn = None
+        session_id = str(uuid.uuid4()).replace('-', '')
+        finished = False
         try:
-            # 确保已初始化
-            await self.init()
-            
             # 确保输出目录存在
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
             
-            # 开始会话
-            session_id = str(uuid.uuid4()).replace('-', '')
-            await self._start_session(session_id)
-            res = await self._parse_response()
-            if res.optional.event != EVENT_SessionStarted:
-                raise RuntimeError("Failed to start session")
+            # 在就绪的连接上开始会话
+            conn = await self._acquire(session_id)
+            await self._start_session(conn, session_id)
+            try:
+                await self._wait_session_started(conn, session_id)
+            except RuntimeError:
+                finished = True
+                raise
                 
             # 发送文本
-            await self._send_text(text, session_id)
-            await self._finish_session(session_id)
+            await self._send_text(conn, text, session_id)
+            await self._finish_session(conn, session_id)
             
             # 接收并保存音频
             async with aiofiles.open(output_path, mode="wb") as f:
                 while True:
-                    res = await self._parse_response()
+                    res = await conn.recv(session_id)
                     if res.optional.event == EVENT_TTSResponse and res.header.message_type == AUDIO_ONLY_RESPONSE:
                         await f.write(res.payload)
                     elif res.optional.event in [EVENT_TTSSentenceStart, EVENT_TTSSentenceEnd]:
                         continue
                     else:
+                        finished = True
                         break
                         
             logger.info(f"Audio saved to {output_path}")
@@ -366,103 +501,177 @@ class AsyncDouBaoTTSClient(AsyncBaseTTSClient):
         except Exception as e:
             logger.error(f"TTS failed: {str(e)}")
             raise
+        finally:
+            if conn is not None:
+                conn.close_session(session_id, finished)
 
-    async def astream_tts(self, text_stream: AsyncGenerator[str, None]) -> AsyncGenerator[bytes, None]:
+    async def astream_tts(self, text_stream: AsyncGenerator[str, None],
+                          sentence_listener: Optional[SentenceListener] = None) -> AsyncGenerator[bytes, None]:
         """
         将文本流转换为语音流
         Args:
             text_stream: 要转换的文本流
+            sentence_listener: 分句边界的回调，按服务端的EVENT_TTSSentenceStart/End调用
         Returns:    
             AsyncGenerator[bytes, None]: 语音流
         """
-        try:
-            send_text_task = None
-            
-            # 确保已初始化
-            await self.init()
-            
-            # 开始会话
-            session_id = str(uuid.uuid4()).replace('-', '')
-            await self._start_session(session_id)
-            res = await self._parse_response()
-            if res.optional.event != EVENT_SessionStarted:
-                # ! 不能直接抛出异常。
-                # raise RuntimeError("Failed to start session")
-                """
-                解释：
-                打断，指AI回复的过程中，被用户打断。
-
-                无打断事件发生的情况下:
-                1. 先发送EVENT_StartSession，然后等待EVENT_SessionStarted。
-                2. 流式的将llm生成的text token发送给tts。
-                3. 流式的从tts接收audio chunk。并yield给上层。
-                4. llm生成结束后，发送EVENT_FinishSession。
-                   tts会在处理完所有请求（返回所有audio chunk）后，发送EVENT_SessionFinished。
-
-                有打断事件发生的情况下:
-                ...
-                4. 发生打断事件，立即终止发送剩余的text token，并发送EVENT_FinishSession。
-                   但服务器会在处理完历史请求后，才返回EVENT_SessionFinished。
-                
-                考虑一种情形：某次llm的回复非常长，在流式请求tts的过程中，被用户打断。
-                直到再一次进入astream_tts()中，打算发送新的EVENT_StartSession时，tts服务器依然没处理完上一次的请求。
-                此时等来的就不是EVENT_SessionStarted，而是EVENT_TTSResponse。
-                为此必须一直等，直到EVENT_SessionStarted的到来。
-                """
-                # 等待EVENT_SessionStarted的到来，最多等待3秒
-                start_time = asyncio.get_event_loop().time()
+        # 文本流只能读取一次，读到的文本保存下来，连接断开后在新连接上重新发送
+        texts: List[str] = []
+        texts_done = False
+        texts_changed = asyncio.Event()
+
+        async def read_texts():
+            nonlocal texts_done
+            try:
+                async for text in text_stream:
+                    if text.strip():
+                        texts.append(text)
+                        texts_changed.set()
+            finally:
+                texts_done = True
+                texts_changed.set()
+
+        # 给tts发送text token，恢复会话时从回复文本的第start个字符开始发送
+        async def send_texts(conn: DouBaoTTSConnection, session_id: str, start: int):
+            sent = 0
+            try:
                 while True:
-                    # if asyncio.get_event_loop().time() - start_time > 3:
-                    #     raise asyncio.TimeoutError("等待会话开始超时")
-                    res = await self._parse_response()
-                    if res.optional.event == EVENT_SessionStarted:
-                        break
-                    elif res.optional.event == EVENT_SessionFailed:
-                        logger.error(f"会话启动失败: {res.optional.event}")
-                        raise RuntimeError("会话启动失败")
-                    await asyncio.sleep(0.1)
-                
-            # 给tts发送text token
-            async def async_send_text_task(text_stream: AsyncGenerator[str, None], session_id: str):
-                try:
-                    async for text in text_stream:
-                        if not text.strip():
+                    if sent < len(texts):
+                        text = texts[sent]
+                        sent += 1
+                        if start >= len(text):
+                            start -= len(text)
                             continue
+                        text, start = text[start:], 0
                         # 发送文本
-                        await self._send_text(text, session_id)
-                except Exception as e:
-                    logger.error(f"发送文本失败: {str(e)}")
-                    raise
-                finally:
-                    # 结束会话并等待确认，即使任务被取消也会执行
-                    await self._finish_session(session_id)
-
-            # 创建异步任务，允许被用户打断
-            send_text_task = asyncio.create_task(async_send_text_task(text_stream, session_id), name='send_text_task')
-            
-            # 接收tts返回的audio chunk
+                        if text.strip():
+                            await self._send_text(conn, text, session_id)
+                    elif texts_done:
+                        break
+                    else:
+                        texts_changed.clear()
+                        await texts_changed.wait()
+            except Exception as e:
+                # 由接收方抛出，连接断开时据此恢复会话
+                logger.error(f"发送文本失败: {str(e)}")
+                conn.abort_session(session_id, e)
+            finally:
+                # 结束会话，即使任务被取消也会执行
+                try:
+                    await self._finish_session(conn, session_id)
+                except TTSConnectionError:
+                    pass
+
+        # 创建异步任务，允许被用户打断
+        read_text_task = asyncio.create_task(read_texts(), name='read_text_task')
+        delivered = 0       # 已输出的音频字节数
+        retries = 0
+        lost_at = None      # 连接断开的时间，恢复后统计重新输出音频的耗时
+        notified = 0        # 已通知的分句事件数，恢复的会话重新合成时不重复通知
+        # 已合成完整的句子：在回复文本中的结束位置、音频字节数与分句事件数。
+        # 连接断开时只从第一个未合成完的句子重新发送文本，并只跳过该句已输出的音频：
+        # 重新合成的音频与原来的不一定逐字节相同，已完整输出的句子不再重新合成，拼接误差限于当前句
+        done_chars, done_bytes, done_events = 0, 0, 0
+        try:
             while True:
-                res = await self._parse_response()
-                if res.optional.event == EVENT_TTSResponse and res.header.message_type == AUDIO_ONLY_RESPONSE:
-                    yield res.payload   
-                elif res.optional.event in [EVENT_TTSSentenceStart, EVENT_TTSSentenceEnd]:
-                    continue
-                else:
-                    break
+                send_text_task = None
+                conn = None
+                session_id = str(uuid.uuid4()).replace('-', '')
+                finished = False
+                skip = delivered - done_bytes
+                events = done_events
+                sentence_end = None     # 当前句在回复文本中的结束位置，无法与发送的文本对应时为None
+                try:
+                    # 在就绪的连接上开始会话。上一次回复被打断时，其残留音频在原连接上排空，不影响本次会话
+                    conn = await self._acquire(session_id)
+                    await self._start_session(conn, session_id)
+                    try:
+                        await self._wait_session_started(conn, session_id)
+                    except RuntimeError:
+                        finished = True
+                        raise
+
+                    send_text_task = asyncio.create_task(send_texts(conn, session_id, done_chars), name='send_text_task')
+
+                    # 接收tts返回的audio chunk
+                    while True:
+                        res = await conn.recv(session_id)
+                        if res.optional.event == EVENT_TTSResponse and res.header.message_type == AUDIO_ONLY_RESPONSE:
+                            payload = res.payload
+                            if skip:
+                                # 恢复的会话重新合成了已经输出的音频
+                                if len(payload) <= skip:
+                                    skip -= len(payload)
+                                    continue
+                                payload, skip = payload[skip:], 0
+                            if lost_at is not None:
+                                self._resume_ms.append((time.perf_counter() - lost_at) * 1000)
+                                lost_at = None
+                            tracer.mark(MARK_TTS_FIRST_BYTE)
+                            delivered += len(payload)
+                            yield payload
+                        elif res.optional.event in [EVENT_TTSSentenceStart, EVENT_TTSSentenceEnd]:
+                            events += 1
+                            text = sentence_text(res.payload)
+                            if res.optional.event == EVENT_TTSSentenceStart:
+                                sentence_end = self._locate_sentence(texts, done_chars, text)
+                            elif sentence_end is not None:
+                                done_chars, done_bytes, done_events = sentence_end, delivered, events
+                                sentence_end = None
+                            if events > notified:
+                                notified = events
+                                if sentence_listener is not None:
+                                    sentence_listener(res.optional.event, text)
+                            continue
+                        else:
+                            finished = True
+                            break
 
-            await send_text_task
-                
+                    await send_text_task
+                    await read_text_task
+                    return
+                except TTSConnectionError as e:
+                    # 只有pcm可以按字节数跳过当前句已输出的音频，其他格式只能在句子边界处无缝恢复
+                    if retries >= self.resume_retries or (delivered > done_bytes and self.audio_format != "pcm"):
+                        self.resume_failures += 1
+                        raise
+                    retries += 1
+                    self.resumed_sessions += 1
+                    lost_at = lost_at or time.perf_counter()
+                    logger.warning(f"TTS连接在会话中断开（{str(e)}），在新连接上从回复文本的第{done_chars}个字符恢复会话，"
+                                   f"跳过该句已输出的{delivered - done_bytes}字节，第{retries}次重试")
+                finally:
+                    # 如果任务未完成，意味着打断事件发生，此时需要手动取消任务
+                    if send_text_task and not send_text_task.done():
+                        send_text_task.cancel()
+                        try:
+                            await send_text_task
+                        except asyncio.CancelledError:
+                            logger.debug("已取消发送文本任务")
+                    if conn is not None:
+                        conn.close_session(session_id, finished)
         except Exception as e:
             logger.error(f"Streaming TTS failed: {str(e)}")
             raise
         finally:
-            # 如果任务未完成，意味着打断事件发生，此时需要手动取消任务
-            if send_text_task and not send_text_task.done():
-                send_text_task.cancel()
+            if not read_text_task.done():
+                read_text_task.cancel()
                 try:
-                    await send_text_task
+                    await read_text_task
                 except asyncio.CancelledError:
-                    logger.debug("已取消发送文本任务")
+                    pass
+
+    @staticmethod
+    def _locate_sentence(texts: List[str], start: int, sentence: str) -> Optional[int]:
+        """服务端开始合成的句子紧接在回复文本的第start个字符之后时，返回该句的结束位置，否则返回None"""
+        sentence = sentence.strip()
+        if not sentence:
+            return None
+        reply = "".join(texts)
+        index = reply.find(sentence, start)
+        if index < 0 or reply[start:index].strip():
+            return None
+        return index + len(sentence)
 
     async def astream_tts_to_file(self, text_stream: AsyncGenerator[str, None], output_path: str) -> None:
         """
@@ -0,0 +1,245 @@
+import json
+import uuid
+import struct
+from typing import Union
+
+# 豆包双向流式TTS协议的二进制帧编解码
+# 帧格式：4字节头部 | [4字节事件号] | [4字节长度 + session_id] | [4字节长度 + 负载]，整数均为大端序。
+# - 编码：各事件的头部与事件号预先计算；请求参数（说话人、音频参数）预先序列化为模板，发送文本时只拼接转义后的文本；
+# - 解码：基于memoryview与struct.unpack_from按偏移读取，音频负载以memoryview返回，不复制。
+
+# 协议版本和头部大小常量
+PROTOCOL_VERSION = 0b0001       # 协议版本号
+DEFAULT_HEADER_SIZE = 0b0001    # 默认头部大小
+
+# 消息类型常量
+FULL_CLIENT_REQUEST = 0b0001    # 客户端完整请求
+AUDIO_ONLY_RESPONSE = 0b1011    # 仅音频响应
+FULL_SERVER_RESPONSE = 0b1001   # 服务器完整响应
+ERROR_INFORMATION = 0b1111      # 错误信息
+
+# 消息类型特定标志
+MsgTypeFlagNoSeq = 0b0000       # 无序列号的非终止包
+MsgTypeFlagPositiveSeq = 0b1    # 序列号大于0的非终止包
+MsgTypeFlagLastNoSeq = 0b10     # 无序列号的最后一个包
+MsgTypeFlagNegativeSeq = 0b11   # 包含事件编号的负序列号
+MsgTypeFlagWithEvent = 0b100    # 包含事件
+
+# 消息序列化方式
+NO_SERIALIZATION = 0b0000       # 无序列化
+JSON = 0b0001                   # JSON序列化
+
+# 消息压缩方式
+COMPRESSION_NO = 0b0000         # 无压缩
+COMPRESSION_GZIP = 0b0001       # GZIP压缩
+
+# 事件类型常量
+# 基础事件
+EVENT_NONE = 0                  # 无事件
+EVENT_Start_Connection = 1      # 开始连接
+EVENT_FinishConnection = 2      # 结束连接
+EVENT_ConnectionStarted = 50    # 连接成功建立
+EVENT_ConnectionFailed = 51     # 连接失败（如权限认证失败）
+EVENT_ConnectionFinished = 52   # 连接结束
+
+# 会话事件（上行）
+EVENT_StartSession = 100        # 开始会话
+EVENT_FinishSession = 102       # 结束会话
+
+# 会话事件（下行）
+EVENT_SessionStarted = 150      # 会话开始
+EVENT_SessionFinished = 152     # 会话结束
+EVENT_SessionFailed = 153       # 会话失败
+
+# 任务事件（上行）
+EVENT_TaskRequest = 200         # 任务请求
+
+# TTS特定事件（下行）
+EVENT_TTSSentenceStart = 350    # 句子开始
+EVENT_TTSSentenceEnd = 351      # 句子结束
+EVENT_TTSResponse = 352         # TTS响应
+
+class Header:
+    """消息头部类"""
+    __slots__ = ("protocol_version", "header_size", "message_type", "message_type_specific_flags",
+                 "serial_method", "compression_type", "reserved_data")
+
+    def __init__(self,
+                 message_type: int = 0,
+                 message_type_specific_flags: int = 0,
+                 serial_method: int = NO_SERIALIZATION):
+        self.protocol_version = PROTOCOL_VERSION
+        self.header_size = DEFAULT_HEADER_SIZE
+        self.message_type = message_type
+        self.message_type_specific_flags = message_type_specific_flags
+        self.serial_method = serial_method
+        self.compression_type = 0
+        self.reserved_data = 0
+
+    def as_bytes(self) -> bytes:
+        return bytes([
+            (self.protocol_version << 4) | self.header_size,
+            (self.message_type << 4) | self.message_type_specific_flags,
+            (self.serial_method << 4) | self.compression_type,
+            self.reserved_data
+        ])
+
+class Optional:
+    """可选信息类"""
+    __slots__ = ("event", "session_id", "error_code", "connection_id", "response_meta_json")
+
+    def __init__(self, event: int = EVENT_NONE, session_id: str = None):
+        self.event = event
+        self.session_id = session_id
+        self.error_code: int = 0
+        self.connection_id: str | None = None
+        self.response_meta_json: str | None = None
+
+    def as_bytes(self) -> bytes:
+        option_bytes = bytearray()
+        if self.event != EVENT_NONE:
+            option_bytes.extend(self.event.to_bytes(4, "big", signed=True))
+        if self.session_id is not None:
+            session_id_bytes = str.encode(self.session_id)
+            size = len(session_id_bytes).to_bytes(4, "big", signed=True)
+            option_bytes.extend(size)
+            option_bytes.extend(session_id_bytes)
+        return option_bytes
+
+class Response:
+    """响应类，payload为指向原始帧的memoryview，不复制音频数据"""
+    __slots__ = ("header", "optional", "payload")
+
+    def __init__(self, header: Header, optional: Optional):
+        self.header = header
+        self.optional = optional
+        self.payload: memoryview | None = None
+
+_U32 = struct.Struct(">I")
+_I32 = struct.Struct(">i")
+_HEADER = struct.Struct(">BBBB")
+_HEADER_EVENT = struct.Struct(">BBBBI")     # 头部 + 事件号
+_AUDIO_WITH_EVENT = (AUDIO_ONLY_RESPONSE << 4) | MsgTypeFlagWithEvent
+
+# 预先计算的头部：不序列化（StartConnection）与JSON序列化
+HEADER_WITH_EVENT = Header(FULL_CLIENT_REQUEST, MsgTypeFlagWithEvent).as_bytes()
+HEADER_WITH_EVENT_JSON = Header(FULL_CLIENT_REQUEST, MsgTypeFlagWithEvent, JSON).as_bytes()
+
+def _sized(data: bytes) -> bytes:
+    """加上4字节长度前缀"""
+    return _I32.pack(len(data)) + data
+
+_EMPTY_JSON = _sized(b"{}")
+START_CONNECTION_FRAME = HEADER_WITH_EVENT + _I32.pack(EVENT_Start_Connection) + _EMPTY_JSON
+FINISH_CONNECTION_FRAME = HEADER_WITH_EVENT_JSON + _I32.pack(EVENT_FinishConnection) + _EMPTY_JSON
+_START_SESSION_PREFIX = HEADER_WITH_EVENT_JSON + _I32.pack(EVENT_StartSession)
+_FINISH_SESSION_PREFIX = HEADER_WITH_EVENT_JSON + _I32.pack(EVENT_FinishSession)
+_TASK_REQUEST_PREFIX = HEADER_WITH_EVENT_JSON + _I32.pack(EVENT_TaskRequest)
+
+_TEXT_PLACEHOLDER = "__TEXT__"
+
+class DouBaoRequestEncoder:
+    """客户端请求帧的编码器
+
+    请求参数在构造时序列化为模板，TaskRequest只需把转义后的文本拼接到模板中；
+    当前会话的session_id字段也只编码一次。
+    """
+    def __init__(self, speaker: str, audio_format: str, sample_rate: int, speech_rate: int):
+        self.uid = str(uuid.uuid4())
+        self.speaker = speaker
+        self.audio_format = audio_format
+        self.sample_rate = sample_rate
+        self.speech_rate = speech_rate
+        self._start_session_payload = _sized(self._payload(EVENT_StartSession, "").encode())
+        template = self._payload(EVENT_TaskRequest, _TEXT_PLACEHOLDER).encode()
+        self._task_head, self._task_tail = template.split(json.dumps(_TEXT_PLACEHOLDER).encode())
+        self._session_id = None
+        self._session_field = b""
+
+    def _payload(self, event: int, text: str) -> str:
+        return json.dumps({
+            "user": {"uid": self.uid},
+            "event": event,
+            "namespace": "BidirectionalTTS",
+            "req_params": {
+                "text": text,
+                "speaker": self.speaker,
+                "audio_params": {
+                    "format": self.audio_format,
+                    "sample_rate": self.sample_rate,
+                    "speech_rate": self.speech_rate
+                }
+            }
+        }, ensure_ascii=False)
+
+    def _session(self, session_id: str) -> bytes:
+        if session_id != self._session_id:
+            self._session_id = session_id
+            self._session_field = _sized(session_id.encode())
+        return self._session_field
+
+    def start_session(self, session_id: str) -> bytes:
+        return b"".join((_START_SESSION_PREFIX, self._session(session_id), self._start_session_payload))
+
+    def task_request(self, session_id: str, text: str) -> bytes:
+        text_json = json.dumps(text, ensure_ascii=False).encode()
+        size = len(self._task_head) + len(text_json) + len(self._task_tail)
+        return b"".join((_TASK_REQUEST_PREFIX, self._session(session_id), _I32.pack(size),
+                         self._task_head, text_json, self._task_tail))
+
+    def finish_session(self, session_id: str) -> bytes:
+        return b"".join((_FINISH_SESSION_PREFIX, self._session(session_id), _EMPTY_JSON))
+
+def _read_sized(view: memoryview, offset: int):
+    """读取带4字节长度前缀的字段，返回（memoryview, 新偏移）"""
+    (size,) = _U32.unpack_from(view, offset)
+    offset += 4
+    return view[offset:offset + size], offset + size
+
+def decode_response(frame: Union[bytes, bytearray, str]) -> Response:
+    """解析服务器下行帧。音频负载为指向frame的memoryview，session_id等短字段解码为str"""
+    if isinstance(frame, str):
+        raise RuntimeError(frame)
+    view = memoryview(frame)
+    b0, b1, b2, b3 = _HEADER.unpack_from(view, 0)
+    header = Header(b1 >> 4, b1 & 0x0f, b2 >> 4)
+    header.protocol_version = b0 >> 4
+    header.header_size = b0 & 0x0f
+    header.compression_type = b2 & 0x0f
+    header.reserved_data = b3
+    response = Response(header, Optional())
+    optional = response.optional
+
+    if b1 == _AUDIO_WITH_EVENT:
+        # 快速路径：音频帧占绝大多数，依次为事件号、session_id与音频负载
+        _, _, _, _, optional.event = _HEADER_EVENT.unpack_from(view, 0)
+        (size,) = _U32.unpack_from(view, 8)
+        optional.session_id = str(view[12:12 + size], "utf-8")
+        response.payload, _ = _read_sized(view, 12 + size)
+        return response
+
+    offset = 4
+    if header.message_type in (FULL_SERVER_RESPONSE, AUDIO_ONLY_RESPONSE):
+        if header.message_type_specific_flags == MsgTypeFlagWithEvent:
+            (optional.event,) = _U32.unpack_from(view, offset)
+            offset += 4
+            event = optional.event
+            if event == EVENT_ConnectionStarted:
+                content, offset = _read_sized(view, offset)
+                optional.connection_id = str(content, "utf-8")
+            elif event == EVENT_ConnectionFailed:
+                content, offset = _read_sized(view, offset)
+                optional.response_meta_json = str(content, "utf-8")
+            elif event in (EVENT_SessionStarted, EVENT_SessionFailed):
+                content, offset = _read_sized(view, offset)
+                optional.session_id = str(content, "utf-8")
+                content, offset = _read_sized(view, offset)
+                optional.response_meta_json = str(content, "utf-8")
+            elif event != EVENT_NONE:
+                content, offset = _read_sized(view, offset)
+                optional.session_id = str(content, "utf-8")
+                response.payload, offset = _read_sized(view, offset)
+    elif header.message_type == ERROR_INFORMATION:
+        (optional.error_code,) = _I32.unpack_from(view, offset)
+        response.payload, offset = _read_sized(view, offset + 4)
+    return response
@@ -0,0 +1,140 @@
+import os
+import asyncio
+import logging
+import aiofiles
+from typing import Dict, Any, AsyncGenerator, Optional
+
+from core.component.tts.base import AsyncBaseTTSClient, SentenceListener
+from core.component.tts.doubao_codec import EVENT_TTSSentenceStart, EVENT_TTSSentenceEnd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIRST_AUDIO_MS = 1500   # 主TTS单个分段首个音频块的最长等待时间
+DEFAULT_COOLDOWN_S = 30         # 主TTS失败后改用备用后端的时长，之后再重新尝试主TTS
+
+class FailoverTTSClient(AsyncBaseTTSClient):
+    """带备用后端的TTS客户端（可选启用）
+
+    逐段合成：每个分段先请求主TTS（如云端TTS），主TTS报错或超过首包等待时间时，该分段改由备用后端
+    （如本地TTS）合成，并在冷却时间内直接使用备用后端，避免每个分段都等待超时。
+    主TTS已输出部分音频后才失败时，不重新合成该分段，以免重复播放。
+    """
+    def __init__(self, primary: AsyncBaseTTSClient, fallback: AsyncBaseTTSClient, config: Optional[dict] = None):
+        config = config or {}
+        # 播放端按主TTS的音频格式与采样率处理音频流，两个后端必须一致
+        for attr in ("audio_format", "audio_sample_rate"):
+            if getattr(primary, attr, None) != getattr(fallback, attr, None):
+                raise ValueError(f"备用TTS的{attr}与主TTS不一致: {getattr(fallback, attr, None)} != {getattr(primary, attr, None)}")
+        self.primary = primary
+        self.fallback = fallback
+        self.first_audio_timeout: float = config.get("first_audio_timeout_ms", DEFAULT_FIRST_AUDIO_MS) / 1000
+        self.cooldown: float = config.get("cooldown_s", DEFAULT_COOLDOWN_S)
+        self._primary_down_until = 0.0     # 事件循环时间，在此之前直接使用备用后端
+
+        self.segments = 0
+        self.primary_failures = 0
+        self.timeouts = 0
+        self.fallback_segments = 0
+
+    @property
+    def speaker(self) -> str:
+        return getattr(self.primary, "speaker", "")
+
+    @property
+    def audio_sample_rate(self) -> int:
+        return getattr(self.primary, "audio_sample_rate", 0)
+
+    @property
+    def audio_format(self) -> str:
+        return getattr(self.primary, "audio_format", "")
+
+    @property
+    def speech_rate(self) -> int:
+        return getattr(self.primary, "speech_rate", 0)
+
+    async def _synthesize(self, text: str) -> AsyncGenerator[Any, None]:
+        """合成一个分段：优先使用主TTS，失败或超时则改用备用后端"""
+        async def single_segment():
+            yield text
+
+        self.segments += 1
+        loop = asyncio.get_running_loop()
+        if loop.time() >= self._primary_down_until:
+            stream = self.primary.astream_tts(single_segment())
+            started = False
+            try:
+                chunk = await asyncio.wait_for(stream.__anext__(), self.first_audio_timeout)
+                started = True
+                yield chunk
+                async for chunk in stream:
+                    yield chunk
+                return
+            except StopAsyncIteration:
+                return
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    self.timeouts += 1
+                self.primary_failures += 1
+                self._primary_down_until = loop.time() + self.cooldown
+                logger.warning(f"主TTS合成失败（{e!r}），{self.cooldown}秒内改用备用TTS，统计: {self.stats()}")
+                if started:
+                    # 已经播放了部分音频，重新合成会重复
+                    return
+            finally:
+                await stream.aclose()
+
+        self.fallback_segments += 1
+        async for chunk in self.fallback.astream_tts(single_segment()):
+            yield chunk
+
+    async def astream_tts(self, text_stream: AsyncGenerator[str, None],
+                          sentence_listener: Optional[SentenceListener] = None) -> AsyncGenerator[bytes, None]:
+        async for text in text_stream:
+            if not text.strip():
+                continue
+            # 逐段合成，每个分段即为一句
+            if sentence_listener is not None:
+                sentence_listener(EVENT_TTSSentenceStart, text)
+            async for chunk in self._synthesize(text):
+                yield chunk
+            if sentence_listener is not None:
+                sentence_listener(EVENT_TTSSentenceEnd, text)
+
+    async def astream_tts_to_file(self, text_stream: AsyncGenerator[str, None], output_path: str) -> None:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        async with aiofiles.open(output_path, "wb") as f:
+            async for audio_chunk in self.astream_tts(text_stream):
+                await f.write(audio_chunk)
+
+    def stats(self) -> Dict[str, Any]:
+        """导出主TTS的失败次数（含超时）与改由备用后端合成的分段数"""
+        return {
+            "segments": self.segments,
+            "primary_failures": self.primary_failures,
+            "timeouts": self.timeouts,
+            "fallback_segments": self.fallback_segments,
+        }
+
+    async def init(self) -> None:
+        async def init_client(client: AsyncBaseTTSClient) -> None:
+            if hasattr(client, "init"):
+                await client.init()
+
+        primary_error, fallback_error = await asyncio.gather(
+            init_client(self.primary), init_client(self.fallback), return_exceptions=True
+        )
+        if primary_error is not None and fallback_error is not None:
+            raise primary_error
+        if fallback_error is not None:
+            logger.error(f"备用TTS初始化失败: {fallback_error!r}")
+        if primary_error is not None:
+            # 主TTS初始化失败（如网络不可用）时先使用备用后端，冷却后再重试
+            logger.error(f"主TTS初始化失败，改用备用TTS: {primary_error!r}")
+            self._primary_down_until = asyncio.get_running_loop().time() + self.cooldown
+
+    async def close(self) -> None:
+        logger.info(f"TTS备用后端统计: {self.stats()}")
+        await asyncio.gather(
+            *(client.close() for client in (self.primary, self.fallback) if hasattr(client, "close")),
+            return_exceptions=True
+        )
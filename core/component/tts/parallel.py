@@ -0,0 +1,160 @@
+import os
+import time
+import asyncio
+import logging
+import aiofiles
+from typing import Dict, Any, AsyncGenerator, Optional, List
+
+from core.component.tts.base import AsyncBaseTTSClient, SentenceListener
+from core.component.tts.doubao_codec import EVENT_TTSSentenceStart, EVENT_TTSSentenceEnd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 2     # 同时合成的分段数（含正在播放的分段），为1时与逐段串行合成相同
+
+class ParallelTTSClient(AsyncBaseTTSClient):
+    """多分段并行合成的TTS客户端（可选启用）
+
+    长回复经同一个会话逐段合成时，后面分段的播放受限于合成速度。本客户端将每个分段作为独立的
+    会话交给内层客户端合成（豆包TTS上即为连接池中的不同连接），正在播放的分段与其后的分段
+    最多max_concurrency个同时合成，音频按分段顺序输出：第一个分段边合成边输出，后面分段的音频
+    先缓存，轮到时立即输出。被打断时取消所有尚未输出完的分段。
+
+    并行的分段各自占用一条连接。被打断时这些连接都要等服务端结束会话（排空）后才能复用，
+    豆包TTS的pool_size应不小于2 * max_concurrency，否则打断后的下一轮回复需要现场建立连接。
+    """
+    def __init__(self, inner: AsyncBaseTTSClient, config: Optional[dict] = None):
+        config = config or {}
+        self.inner = inner
+        self.max_concurrency: int = max(1, config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY))
+
+        self.segments = 0
+        self.cancelled_segments = 0     # 被打断时尚未输出完而取消的分段数
+        self.max_in_flight = 0          # 同时合成的最大分段数
+        self.audio_bytes = 0
+        self.busy_seconds = 0.0         # 有分段在合成或输出的墙钟时间，用于统计吞吐
+        self._in_flight = 0
+
+    @property
+    def speaker(self) -> str:
+        return getattr(self.inner, "speaker", "")
+
+    @property
+    def audio_sample_rate(self) -> int:
+        return getattr(self.inner, "audio_sample_rate", 0)
+
+    @property
+    def audio_format(self) -> str:
+        return getattr(self.inner, "audio_format", "")
+
+    @property
+    def speech_rate(self) -> int:
+        return getattr(self.inner, "speech_rate", 0)
+
+    async def _synthesize(self, text: str, queue: asyncio.Queue) -> None:
+        """合成一个分段，音频块依次放入queue，结束时放入None，失败时放入异常"""
+        async def single_segment():
+            yield text
+
+        self._in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            async for chunk in self.inner.astream_tts(single_segment()):
+                queue.put_nowait(chunk)
+            queue.put_nowait(None)
+        except Exception as e:
+            queue.put_nowait(e)
+        finally:
+            self._in_flight -= 1
+
+    async def astream_tts(self, text_stream: AsyncGenerator[str, None],
+                          sentence_listener: Optional[SentenceListener] = None) -> AsyncGenerator[bytes, None]:
+        """
+        将文本流转换为语音流
+        Args:
+            text_stream: 要转换的文本流
+            sentence_listener: 分句边界的回调，每个分段作为一句、按输出顺序通知
+        Returns:
+            AsyncGenerator[bytes, None]: 按分段顺序输出的语音流
+        """
+        # 按顺序排列的分段：(文本, 音频队列)，文本流结束时放入None
+        segments: asyncio.Queue = asyncio.Queue()
+        # 正在合成或等待输出的分段数不超过max_concurrency，输出完一个分段才开始合成下一个
+        slots = asyncio.Semaphore(self.max_concurrency)
+        tasks: List[asyncio.Task] = []
+
+        async def schedule():
+            try:
+                async for text in text_stream:
+                    if not text.strip():
+                        continue
+                    await slots.acquire()
+                    queue: asyncio.Queue = asyncio.Queue()
+                    task = asyncio.create_task(self._synthesize(text, queue), name='tts_segment_task')
+                    tasks.append(task)
+                    segments.put_nowait((text, queue))
+            except Exception as e:
+                segments.put_nowait(e)
+            finally:
+                segments.put_nowait(None)
+
+        schedule_task = asyncio.create_task(schedule(), name='tts_schedule_task')
+        start_time = time.perf_counter()
+        finished = 0
+        try:
+            while True:
+                segment = await segments.get()
+                if segment is None:
+                    break
+                if isinstance(segment, Exception):
+                    raise segment
+                text, queue = segment
+                self.segments += 1
+                if sentence_listener is not None:
+                    sentence_listener(EVENT_TTSSentenceStart, text)
+                while True:
+                    chunk = await queue.get()
+                    if chunk is None:
+                        break
+                    if isinstance(chunk, Exception):
+                        raise chunk
+                    self.audio_bytes += len(chunk)
+                    yield chunk
+                if sentence_listener is not None:
+                    sentence_listener(EVENT_TTSSentenceEnd, text)
+                finished += 1
+                slots.release()
+        finally:
+            # 被打断或出错：取消文本读取与所有尚未输出完的分段
+            self.busy_seconds += time.perf_counter() - start_time
+            pending = [schedule_task] + [task for task in tasks[finished:] if not task.done()]
+            self.cancelled_segments += max(0, len(tasks) - finished)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def astream_tts_to_file(self, text_stream: AsyncGenerator[str, None], output_path: str) -> None:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        async with aiofiles.open(output_path, "wb") as f:
+            async for audio_chunk in self.astream_tts(text_stream):
+                await f.write(audio_chunk)
+
+    def stats(self) -> Dict[str, Any]:
+        """导出并行合成统计：吞吐（每秒墙钟时间输出的音频秒数，pcm时统计）与取消的分段数"""
+        audio_seconds = self.audio_bytes / 2 / self.audio_sample_rate if self.audio_format == "pcm" and self.audio_sample_rate else 0.0
+        return {
+            "segments": self.segments,
+            "cancelled_segments": self.cancelled_segments,
+            "max_in_flight": self.max_in_flight,
+            "audio_seconds": round(audio_seconds, 2),
+            "throughput": round(audio_seconds / self.busy_seconds, 2) if self.busy_seconds else 0.0,
+        }
+
+    async def init(self) -> None:
+        if hasattr(self.inner, "init"):
+            await self.inner.init()
+
+    async def close(self) -> None:
+        logger.info(f"TTS并行合成统计: {self.stats()}")
+        if hasattr(self.inner, "close"):
+            await self.inner.close()
@@ -0,0 +1,165 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+import aiofiles
+import numpy as np
+from scipy.signal import resample_poly
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, AsyncGenerator, Optional
+
+from core.component.tts.base import AsyncBaseTTSClient, SentenceListener
+from core.component.tts.doubao_codec import EVENT_TTSSentenceStart, EVENT_TTSSentenceEnd
+from core.utils.tracer import tracer, MARK_TTS_FIRST_BYTE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NUM_THREADS = 2         # onnxruntime的推理线程数
+DEFAULT_SAMPLE_RATE = 24000     # 输出采样率，与扬声器及云端TTS保持一致，模型采样率不同时重采样
+DEFAULT_CHUNK_MS = 200          # 输出音频块的时长
+
+class AsyncSherpaOnnxTTSClient(AsyncBaseTTSClient):
+    """基于sherpa-onnx的本地TTS客户端，不依赖网络（可作为主TTS，或云端TTS的备用后端）
+
+    加载VITS类的ONNX模型（Piper、MeloTTS、vits-zh-aishell3等）。文本分段器送来的每个分段
+    在专用的工作线程中逐段合成，模型每合成完一句即通过回调送出，按块输出16位单声道PCM，
+    不必等整段合成结束。被打断时在下一句开始前停止合成。
+    """
+    def __init__(self, config: Dict[str, Any], engine: Any = None):
+        """
+        Args:
+            config: 配置信息，包含模型、词表等文件路径
+            engine: 已创建的合成引擎（需提供sample_rate与generate()），为None时按配置加载sherpa-onnx模型
+        """
+        self.model = config.get("model", "")
+        self.speaker_id = config.get("speaker_id", 0)
+        self.speed = config.get("speed", 1.0)
+        self.audio_format = "pcm"
+        self.audio_sample_rate = config.get("audio_sample_rate", DEFAULT_SAMPLE_RATE)
+        self.speech_rate = self.speed
+        self.engine = engine if engine is not None else self._load(config)
+        self.chunk_bytes = self.audio_sample_rate * config.get("chunk_ms", DEFAULT_CHUNK_MS) // 1000 * 2
+        # 同一时间只合成一个分段，分段按顺序排队
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sherpa_tts")
+
+        self.segments = 0
+        self.audio_seconds = 0.0
+        self.synthesis_seconds = 0.0
+        self._first_audio_ms = 0.0
+
+    @property
+    def speaker(self) -> str:
+        return f"{os.path.basename(self.model)}#{self.speaker_id}"
+
+    def _load(self, config: Dict[str, Any]):
+        # 延迟导入sherpa_onnx，仅在使用本地TTS时才需要
+        import sherpa_onnx
+        tts_config = sherpa_onnx.OfflineTtsConfig(
+            model=sherpa_onnx.OfflineTtsModelConfig(
+                vits=sherpa_onnx.OfflineTtsVitsModelConfig(
+                    model=self.model,
+                    lexicon=config.get("lexicon") or "",
+                    tokens=config.get("tokens") or "",
+                    data_dir=config.get("data_dir") or "",
+                    dict_dir=config.get("dict_dir") or "",
+                ),
+                num_threads=config.get("num_threads", DEFAULT_NUM_THREADS),
+                provider=config.get("provider", "cpu"),
+            ),
+            rule_fsts=config.get("rule_fsts") or "",
+            max_num_sentences=1,    # 每句合成完立即回调，降低首包延迟
+        )
+        if not tts_config.validate():
+            raise ValueError(f"sherpa-onnx TTS模型配置无效，请检查模型文件: {self.model}")
+        engine = sherpa_onnx.OfflineTts(tts_config)
+        logger.info(f"本地TTS模型已加载: {self.model}，采样率: {engine.sample_rate}，说话人数: {engine.num_speakers}")
+        return engine
+
+    def _to_pcm(self, samples) -> bytes:
+        """float32样本转为16位PCM，模型采样率与输出采样率不同时重采样"""
+        samples = np.asarray(samples, dtype=np.float32)
+        if self.engine.sample_rate != self.audio_sample_rate:
+            samples = resample_poly(samples, self.audio_sample_rate, self.engine.sample_rate)
+        return (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+
+    async def _synthesize(self, text: str) -> AsyncGenerator[bytes, None]:
+        """在工作线程中合成一个分段，边合成边输出音频块"""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stopped = threading.Event()
+
+        def on_samples(samples, progress) -> int:
+            # 在工作线程中调用：1表示继续合成，0表示停止
+            if stopped.is_set():
+                return 0
+            loop.call_soon_threadsafe(queue.put_nowait, self._to_pcm(samples))
+            return 1
+
+        def generate() -> None:
+            start = time.perf_counter()
+            audio = self.engine.generate(text, sid=self.speaker_id, speed=self.speed, callback=on_samples)
+            # 实时率只统计模型推理的耗时，不含播放端消费音频的时间
+            self.synthesis_seconds += time.perf_counter() - start
+            self.audio_seconds += len(audio.samples) / self.engine.sample_rate
+
+        self.segments += 1
+        start_time = time.perf_counter()
+        future = loop.run_in_executor(self._executor, generate)
+        # 回调送出的音频先于完成通知入队
+        future.add_done_callback(lambda _: queue.put_nowait(None))
+        first = True
+        try:
+            while True:
+                pcm = await queue.get()
+                if pcm is None:
+                    break
+                if first:
+                    first = False
+                    self._first_audio_ms += (time.perf_counter() - start_time) * 1000
+                    tracer.mark(MARK_TTS_FIRST_BYTE)
+                for offset in range(0, len(pcm), self.chunk_bytes):
+                    yield pcm[offset:offset + self.chunk_bytes]
+            future.result()
+        finally:
+            stopped.set()
+
+    async def astream_tts(self, text_stream: AsyncGenerator[str, None],
+                          sentence_listener: Optional[SentenceListener] = None) -> AsyncGenerator[bytes, None]:
+        """
+        将文本流转换为语音流
+        Args:
+            text_stream: 要转换的文本流
+            sentence_listener: 分句边界的回调，每个分段作为一句通知
+        Returns:
+            AsyncGenerator[bytes, None]: 16位单声道PCM流
+        """
+        async for text in text_stream:
+            if not text.strip():
+                continue
+            # 逐段合成，每个分段即为一句
+            if sentence_listener is not None:
+                sentence_listener(EVENT_TTSSentenceStart, text)
+            async for chunk in self._synthesize(text):
+                yield chunk
+            if sentence_listener is not None:
+                sentence_listener(EVENT_TTSSentenceEnd, text)
+
+    async def astream_tts_to_file(self, text_stream: AsyncGenerator[str, None], output_path: str) -> None:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        async with aiofiles.open(output_path, "wb") as f:
+            async for audio_chunk in self.astream_tts(text_stream):
+                await f.write(audio_chunk)
+
+    def stats(self) -> Dict[str, Any]:
+        """导出合成统计：实时率（合成耗时/音频时长）与平均首包延迟"""
+        return {
+            "segments": self.segments,
+            "audio_seconds": round(self.audio_seconds, 2),
+            "rtf": round(self.synthesis_seconds / self.audio_seconds, 3) if self.audio_seconds else 0.0,
+            "first_audio_ms": round(self._first_audio_ms / self.segments, 1) if self.segments else 0.0,
+        }
+
+    async def close(self) -> None:
+        logger.info(f"本地TTS统计: {self.stats()}")
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,6 +1,5 @@
 import logging
 from abc import ABC, abstractmethod
-import torch
 import numpy as np
 
 logger = logging.getLogger(__name__)
@@ -41,6 +40,10 @@ class SileroVADClient(BaseVADClient):
             source = 'local'
         device = config.get("device", "cpu")
         
+        # 延迟导入torch，仅在选用SileroVAD时才需要承担其导入耗时
+        import torch
+        self.torch = torch
+
         # 加载 Silero VAD 模型
         model, utils = torch.hub.load(
             repo_or_dir=model_dir,  # 本地路径 或 GitHub仓库地址
@@ -56,7 +59,7 @@ class SileroVADClient(BaseVADClient):
     def is_speech(self, frame) -> bool:
         try:
             # 将音频数据转换为适合模型的格式
-            audio_tensor = torch.from_numpy(np.frombuffer(frame, dtype=np.int16).astype(np.float32) / 32768.0)
+            audio_tensor = self.torch.from_numpy(np.frombuffer(frame, dtype=np.int16).astype(np.float32) / 32768.0)
             
             # 确保音频是单声道
             if len(audio_tensor.shape) > 1:
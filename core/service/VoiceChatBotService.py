@@ -2,18 +2,30 @@ import queue
 import uuid
 import logging
 import asyncio
-from typing import Optional, List, Dict
+from typing import Optional, List
 from core.utils.config import ConfigLoader
-from core.component.audio import AudioHandler
+from core.component.audio import AudioHandler, FillerPlayer, SpokenTextTracker, decode_audio_stream
 from core.component.factory import ComponentFactory
 from core.component.vad import BaseVADClient
 from core.component.asr import BaseASRClient
 from core.component.llm import AsyncBaseLLMClient
+from core.component.llm.memory import ConversationMemory
 from core.component.tts import AsyncBaseTTSClient
+from core.component.segmenter import BaseTextSegmenter
 from core.tools.handler import ToolHandler
+from core.service.speculative import SpeculativeTurn, SpeculationStats, DEFAULT_SILENCE_MS
+from core.utils.tracer import tracer, current_session
 
 logger = logging.getLogger(__name__)
 
+# TODO 系统提示词中增加工具调用指南，以提升工具调用成功率
+SYSTEM_PROMPT = "你是一个友好的语音对话助手。请注意：\
+    1. 使用口语化表达，避免书面语；\
+    2. 回答要简短精炼，通常不超过50字，除非用户提出需要详细回答；\
+    3. 语气要自然亲切，像朋友间对话；\
+    4. 适时使用语气词增加对话自然度；\
+    5. 如果用户说话不完整或有噪音，要学会根据上下文理解和确认。"
+
 class VoiceChatBotService():
     config: ConfigLoader
 
@@ -22,12 +34,24 @@ class VoiceChatBotService():
     asr_client: Optional[BaseASRClient] = None
     llm_client: Optional[AsyncBaseLLMClient] = None
     tts_client: Optional[AsyncBaseTTSClient] = None
+    segmenter: Optional[BaseTextSegmenter] = None
 
-    chag_log: List[Dict[str, str]] = []
+    memory: Optional[ConversationMemory] = None
+    filler: Optional[FillerPlayer] = None
+    speculative: Optional[SpeculativeTurn] = None  # 进行中的推测执行
     is_ai_speaking: bool = False  # 添加标志位表示AI是否正在说话
 
     def __init__(self, config):
         self.config = config
+        # 推测执行：静默达到silence_ms时，基于初步的ASR结果提前开始LLM生成
+        speculative_config = self.config.get_base_config().get("speculative", {})
+        self.speculative_enabled: bool = speculative_config.get("enabled", False)
+        self.speculative_silence_ms: int = speculative_config.get("silence_ms", DEFAULT_SILENCE_MS)
+        self.speculation_stats = SpeculationStats()
+        # ASR模型不支持并发推理，推测执行与最终识别串行执行
+        self._asr_lock = asyncio.Lock()
+        # 单轮端到端延迟追踪：端点 -> ASR完成 -> LLM首token -> TTS首包 -> 扬声器首帧
+        tracer.configure(self.config.get_base_config().get("trace", {}))
 
     async def init(self):
         """初始化所有组件"""
@@ -41,23 +65,40 @@ class VoiceChatBotService():
         self.asr_client = components['asr']
         self.llm_client = components['llm']
         self.tts_client = components['tts']
+        self.segmenter = components['segmenter']
 
         self.llm_client.config_tool_call(self.tool_handler)
-        await self.audio_handler.init()
-        await self.tts_client.init()
+        # 对话记忆：保留最近若干轮原文，旧轮次由LLM在后台压缩为摘要
+        self.memory = ConversationMemory(
+            SYSTEM_PROMPT,
+            self.config.get_base_config().get("memory", {}),
+            summarizer=self.llm_client
+        )
+        # 并发初始化：音频设备就绪等待与TTS的WebSocket握手相互重叠
+        await ComponentFactory.init_components(components)
+
+        # 补位音频：工具调用开始或LLM首token过慢时播放，启动时预先合成
+        self.filler = FillerPlayer(self.audio_handler, self.config.get_base_config().get("filler", {}))
+        await self.filler.prepare(self.tts_client)
+        self.llm_client.set_tool_call_listener(self.filler.on_tool_call)
+
+    async def _recognize(self, speech_chunks: List[bytes], session_id: str) -> str:
+        """在线程中执行ASR，不阻塞事件循环"""
+        async with self._asr_lock:
+            return await asyncio.to_thread(self.asr_client.speech_to_text, speech_chunks, session_id)
+
+    async def _discard_speculation(self, aborted: bool) -> None:
+        """取消进行中的推测执行并计入统计"""
+        speculative, self.speculative = self.speculative, None
+        if speculative is None:
+            return
+        await speculative.cancel()
+        tracer.discard(speculative.session_id)
+        self.speculation_stats.record_discarded(speculative, aborted)
+        logger.debug(f"推测执行{'中止（用户继续说话）' if aborted else '未被采纳（识别结果不一致）'}，统计: {self.speculation_stats.summary()}")
 
     async def pipeline(self):
-        # TODO 系统提示词中增加工具调用指南，以提升工具调用成功率
-        self.chag_log.append({
-            "role": "system",
-            "content": "你是一个友好的语音对话助手。请注意：\
-                1. 使用口语化表达，避免书面语；\
-                2. 回答要简短精炼，通常不超过50字，除非用户提出需要详细回答；\
-                3. 语气要自然亲切，像朋友间对话；\
-                4. 适时使用语气词增加对话自然度；\
-                5. 如果用户说话不完整或有噪音，要学会根据上下文理解和确认。"
-        })
-        logger.info(self.chag_log)
+        logger.info(self.memory.system_message)
 
         print("AI助手已启动，正在聆听...\n")
         logger.info("AI助手已启动，正在聆听...")
@@ -93,49 +134,108 @@ class VoiceChatBotService():
                         speech_chunks.append(audio_chunk)
                         triggered = True
                         silence_duration = 0
+                        # 用户还在说话，之前的推测作废
+                        if self.speculative is not None:
+                            await self._discard_speculation(aborted=True)
                     else:
                         if triggered:
                             # TODO check
                             speech_chunks.append(audio_chunk)
                             silence_duration += 30 # 30ms
+                            # 用户可能已经说完话：提前识别并开始LLM生成，输出暂不播放
+                            if (self.speculative_enabled and self.speculative is None
+                                    and self.speculative_silence_ms < silence_duration <= 300):
+                                self.speculation_stats.started += 1
+                                self.speculative = SpeculativeTurn(
+                                    self._recognize, self.llm_client, self.memory,
+                                    speech_chunks.copy(), str(uuid.uuid4())
+                                )
                             # 如果检测到说话，且随后沉默时间超过300ms，则粗略的认为用户已经说完话
                             if silence_duration > 300:
                                 triggered = False
                                 silence_duration = 0
                                 logger.debug("VAD triggered")
 
+                                # 从用户说完话开始，统计扬声器的静默时长与各阶段的延迟
+                                session_id = str(uuid.uuid4())
+                                tracer.start_turn(session_id)
+                                self.audio_handler.begin_turn(session_id)
+                                self.filler.start_turn()
+
                                 # 将speech_chunks中的音频块转换为文本
                                 _speech_chunks = speech_chunks.copy()
                                 speech_chunks = []
-                                session_id = str(uuid.uuid4())
-                                asr_text = self.asr_client.speech_to_text(_speech_chunks, session_id)
+                                asr_text = await self._recognize(_speech_chunks, session_id)
                                 logger.info(f"User: {asr_text}")
                                 print(f"User: {asr_text}")
-                                self.chag_log.append({
-                                    "role": "user",
-                                    "content": asr_text
-                                })
+
+                                speculative, self.speculative = self.speculative, None
+                                if speculative is not None:
+                                    await speculative.transcript()
+                                if speculative is not None and speculative.matches(asr_text):
+                                    # 采纳推测结果：LLM已经提前开始生成，直接使用
+                                    gained_ms = self.speculation_stats.record_accepted(speculative)
+                                    logger.info(f"采纳推测执行，LLM提前 {gained_ms:.1f} ms 启动，统计: {self.speculation_stats.summary()}")
+                                    tracer.merge(session_id, speculative.session_id)
+                                    session_id = speculative.session_id
+                                    self.memory.add_user_message(speculative.text, speculative.user_message)
+                                    messages = speculative.messages
+                                    llm_stream = speculative.stream(print_stream=True)
+                                else:
+                                    if speculative is not None:
+                                        self.speculative = speculative
+                                        await self._discard_speculation(aborted=False)
+                                    self.memory.add_user_message(asr_text)
+                                    messages = self.memory.build_prompt()
+                                    llm_stream = self.llm_client.astream_chat(messages, session_id, print_stream=True)
 
                                 # llm流式回复
                                 self.is_ai_speaking = True
                                 
-                                async def ai_response_task():
+                                async def ai_response_task(session_id, messages, llm_stream):
+                                    # TTS等不接收session_id的组件通过current_session打点
+                                    current_session.set(session_id)
+                                    completed = False
+                                    # 记录每句文本对应的音频位置，被打断时据此确定用户实际听到的文本
+                                    spoken = SpokenTextTracker(getattr(self.tts_client, "audio_sample_rate", 24000))
                                     try:
-                                        llm_generator = self.llm_client.astream_chat(self.chag_log, session_id, print_stream=True)
-                                        # 双向流式tts：一边流式的发送llm的text token，一边流式的接收tts的音频片段
-                                        tts_generator = self.tts_client.astream_tts(llm_generator)
+                                        llm_generator = self.filler.watch(llm_stream)
+                                        # 文本分段：首个分句尽快送入TTS，之后按整句送入，减少TTS帧数
+                                        text_generator = spoken.track_text(self.segmenter.asegment(llm_generator))
+                                        # 双向流式tts：一边流式的发送分段后的文本，一边流式的接收tts的音频片段
+                                        tts_generator = self.tts_client.astream_tts(text_generator, spoken.on_sentence)
+                                        # 按TTS的音频格式转换为PCM（如增量解码Ogg/Opus）
+                                        pcm_generator = spoken.track_audio(decode_audio_stream(
+                                            tts_generator,
+                                            getattr(self.tts_client, "audio_format", "pcm"),
+                                            getattr(self.tts_client, "audio_sample_rate", 24000)
+                                        ))
                                         # 扬声器流式播放
-                                        await self.audio_handler.astream_play(tts_generator)
+                                        await self.audio_handler.astream_play(pcm_generator)
+                                        completed = True
                                     except Exception as e:
                                         logger.error(f"AI response task failed: {str(e)}")
                                     finally:
                                         # 清空扬声器buffer中的历史数据，即使任务被取消也会执行
                                         self.audio_handler.ostream_buffer = queue.Queue() # 清空扬声器buffer中的历史数据
-                                        logger.info("AI: " + self.chag_log[-1]["content"])
+                                        fillers = self.filler.end_turn()
+                                        logger.info(f"本轮扬声器静默统计: {self.audio_handler.end_turn()}, 补位音频: {fillers}")
+                                        # 将本轮的回复与工具调用记入对话记忆，超出预算的旧轮次在后台压缩；
+                                        # 被打断时只记入已经送入扬声器的部分
+                                        spoken_reply = None
+                                        if not completed:
+                                            spoken_reply = spoken.spoken_text(self.audio_handler.played_bytes)
+                                            logger.info(f"回复被打断，已播放 {len(spoken_reply)} 字，"
+                                                        f"未播放 {spoken.unspoken_chars(self.audio_handler.played_bytes)} 字")
+                                        self.memory.commit(messages, spoken_reply)
+                                        logger.info("AI: " + self.memory.last_reply())
+                                        if self.speculative_enabled:
+                                            self.speculation_stats.record_reply(self.memory.last_reply())
+                                        tracer.finish_turn(session_id, interrupted=not completed)
                                         self.is_ai_speaking = False
 
                                 # 创建异步任务，允许被用户打断
-                                asyncio.create_task(ai_response_task(), name='ai_response')
+                                asyncio.create_task(ai_response_task(session_id, messages, llm_stream), name='ai_response')
 
                                 # 清空麦克风buffer中堆积的音频块
                                 self.audio_handler.istream_buffer = queue.Queue()
@@ -148,5 +248,12 @@ class VoiceChatBotService():
 
     async def close(self):
         logger.info("pipeline结束")
-        await self.audio_handler.cleanup_resource()
+        await self._discard_speculation(aborted=True)
+        if self.speculative_enabled:
+            logger.info(f"推测执行统计: {self.speculation_stats.summary()}")
+        await self.memory.close()
+        self.audio_handler.cleanup_resource()
         await self.tts_client.close()
+        await self.llm_client.close()
+        await self.tool_handler.close()
+        tracer.close()
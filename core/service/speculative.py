@@ -0,0 +1,138 @@
+import time
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, AsyncGenerator, Callable, Awaitable
+
+from core.component.llm.cache import normalize_query
+from core.component.llm.llm_client import tool_call_gate
+from core.component.llm.memory import ConversationMemory, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SILENCE_MS = 150    # 静默超过该时长即认为用户"可能"已说完，开始推测执行
+
+# 推测执行输出结束的标记
+_END = object()
+
+class SpeculativeTurn:
+    """一次推测执行
+
+    在端点检测确认用户说完话之前，先对已有的音频做一次ASR，并以识别结果提前开始LLM生成，
+    生成的文本暂存在队列中、不播放。最终的ASR结果与之一致时采纳（stream()依次输出已缓存与后续的文本），
+    否则取消。工具调用可能有副作用，推测期间LLM发起的工具调用暂缓执行，采纳后才开始执行，未被采纳时随之取消。
+    """
+    def __init__(self, recognize: Callable[[List[bytes], str], Awaitable[str]], llm_client, memory: ConversationMemory,
+                 speech_chunks: List[bytes], session_id: str):
+        self.llm_client = llm_client
+        self.memory = memory
+        self.session_id = session_id
+        self.text: Optional[str] = None
+        self.messages: Optional[List[Dict[str, Any]]] = None
+        self.user_message: Optional[Dict[str, Any]] = None
+        self.generated = ""
+        self.llm_started_at: Optional[float] = None
+
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._transcribed = asyncio.Event()
+        self._accepted = asyncio.Event()
+        self._task = asyncio.create_task(self._run(recognize, speech_chunks), name='speculative_turn')
+
+    async def _run(self, recognize, speech_chunks: List[bytes]) -> None:
+        try:
+            self.text = await recognize(speech_chunks, self.session_id)
+        except Exception as e:
+            logger.error(f"推测执行的语音识别失败: {str(e)}")
+        finally:
+            self._transcribed.set()
+        if not self.text or not self.text.strip():
+            await self._queue.put(_END)
+            return
+        self.messages, self.user_message = self.memory.build_speculative_prompt(self.text)
+        self.llm_started_at = time.perf_counter()
+        # 只作用于本任务及LLM客户端在其中创建的任务
+        tool_call_gate.set(self._accepted)
+        try:
+            async for text in self.llm_client.astream_chat(self.messages, self.session_id):
+                self.generated += text
+                await self._queue.put(text)
+            await self._queue.put(_END)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self._queue.put(e)
+
+    async def transcript(self) -> Optional[str]:
+        """等待推测执行的ASR结果"""
+        await self._transcribed.wait()
+        return self.text
+
+    def matches(self, final_text: str) -> bool:
+        """最终的ASR结果与推测时的识别结果归一化后一致，且LLM已经开始生成"""
+        return (self.messages is not None and not self._task.cancelled()
+                and normalize_query(final_text) == normalize_query(self.text or ""))
+
+    async def stream(self, print_stream: bool = False) -> AsyncGenerator[str, None]:
+        """采纳后调用：开始执行暂缓的工具调用，依次输出已缓存与后续生成的文本"""
+        self._accepted.set()
+        if print_stream:
+            print("AI: ", end="", flush=True)
+        try:
+            while True:
+                item = await self._queue.get()
+                if item is _END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                if print_stream:
+                    print(item, end="", flush=True)
+                yield item
+        finally:
+            if print_stream:
+                print("\n")
+            await self.cancel()
+
+    async def cancel(self) -> None:
+        if not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+class SpeculationStats:
+    """推测执行的统计：采纳率、LLM提前启动的时长与浪费的生成token比例"""
+    def __init__(self):
+        self.started = 0
+        self.accepted = 0
+        self.rejected = 0           # 最终的ASR结果与推测不一致
+        self.aborted = 0            # 用户继续说话
+        self.gained_ms: List[float] = []
+        self.wasted_tokens = 0
+        self.useful_tokens = 0
+
+    def record_accepted(self, turn: SpeculativeTurn) -> float:
+        self.accepted += 1
+        gained_ms = (time.perf_counter() - turn.llm_started_at) * 1000
+        self.gained_ms.append(gained_ms)
+        return gained_ms
+
+    def record_discarded(self, turn: SpeculativeTurn, aborted: bool) -> None:
+        if aborted:
+            self.aborted += 1
+        else:
+            self.rejected += 1
+        self.wasted_tokens += estimate_tokens(turn.generated)
+
+    def record_reply(self, reply: str) -> None:
+        self.useful_tokens += estimate_tokens(reply)
+
+    def summary(self) -> Dict[str, Any]:
+        total_tokens = self.wasted_tokens + self.useful_tokens
+        return {
+            "started": self.started,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "aborted": self.aborted,
+            "avg_gained_ms": round(sum(self.gained_ms) / len(self.gained_ms), 1) if self.gained_ms else 0.0,
+            "wasted_token_ratio": round(self.wasted_tokens / total_tokens, 3) if total_tokens else 0.0,
+        }
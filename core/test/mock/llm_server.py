@@ -0,0 +1,281 @@
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTFT_MS = 300           # 首token延迟
+DEFAULT_INTER_TOKEN_MS = 30     # token间隔
+DEFAULT_CHUNK_CHARS = 2         # 每个token包含的字符数
+DEFAULT_REPLY = "好的，我明白了。这是一个来自模拟服务器的回复，用于离线测试流式输出、文本分段与TTS衔接的延迟。"
+
+class MockLLMServer:
+    """本地模拟LLM服务器，可编排时序与回复内容
+
+    同时实现两种流式接口：
+    - OpenAI兼容：POST /v1/chat/completions（SSE，支持tool_calls的增量下发与stream_options.include_usage）
+    - Ollama兼容：POST /api/chat（NDJSON，工具调用整条下发）
+
+    配置示例（可写入yaml/json文件，通过 --script 加载）：
+        ttft_ms: 300            # 首token延迟
+        inter_token_ms: 30      # token间隔
+        chunk_chars: 2          # 每个token的字符数
+        jitter_ms: 0            # 延迟的随机抖动幅度（使用固定种子，结果可复现）
+        seed: 0
+        default_reply: ...      # 没有规则命中时的回复
+        rules:                  # 按顺序匹配最后一条用户消息
+          - match: 天气
+            tool_call: {name: get_current_weather, arguments: {city: 深圳}}
+            reply: 深圳今天晴，气温二十六度。   # 收到工具结果后的回复
+          - match: 对比
+            tool_calls:                           # 同一轮回复中依次下发多个工具调用
+              - {name: get_current_weather, arguments: {city: 深圳}}
+              - {name: get_current_weather, arguments: {city: 北京}}
+            reply: 深圳晴，北京多云。
+          - match: 你好
+            reply: 你好呀，有什么可以帮你？
+
+    每个请求的实际时序记录在 self.request_log 中，供基准测试对比。
+    """
+    def __init__(self, config: Optional[dict] = None):
+        config = config or {}
+        self.ttft: float = config.get("ttft_ms", DEFAULT_TTFT_MS) / 1000
+        self.inter_token: float = config.get("inter_token_ms", DEFAULT_INTER_TOKEN_MS) / 1000
+        self.chunk_chars: int = config.get("chunk_chars", DEFAULT_CHUNK_CHARS)
+        self.jitter: float = config.get("jitter_ms", 0) / 1000
+        self.default_reply: str = config.get("default_reply", DEFAULT_REPLY)
+        self.rules: List[Dict[str, Any]] = config.get("rules", [])
+        self._rng = random.Random(config.get("seed", 0))
+
+        self.request_log: List[Dict[str, Any]] = []
+        self._runner: Optional[web.AppRunner] = None
+        self.port: Optional[int] = None
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.handle_openai_chat)
+        app.router.add_get("/v1/models", self.handle_openai_models)
+        app.router.add_post("/api/chat", self.handle_ollama_chat)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """启动服务器，port为0时自动选择空闲端口，返回实际监听的端口"""
+        self._runner = web.AppRunner(self.build_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        logger.info(f"模拟LLM服务器已启动: http://{host}:{self.port}")
+        return self.port
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _delay(self, base: float) -> float:
+        if not self.jitter:
+            return base
+        return max(0.0, base + self._rng.uniform(-self.jitter, self.jitter))
+
+    def _plan(self, messages: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], str]:
+        """根据消息决定本次的输出：(工具调用列表, 回复文本)，二者只有一个生效"""
+        last_user = next((m for m in reversed(messages) if m.get("role") == "user"), None)
+        text = (last_user or {}).get("content") or ""
+        rule = next((r for r in self.rules if r.get("match", "") in text), None)
+        if rule is None:
+            return [], self.default_reply
+        tool_calls = rule.get("tool_calls") or ([rule["tool_call"]] if rule.get("tool_call") else [])
+        # 最后一条消息是工具结果时，说明工具调用已经完成，输出最终回复
+        if tool_calls and messages[-1].get("role") != "tool":
+            return tool_calls, ""
+        return [], rule.get("reply", self.default_reply)
+
+    def _chunks(self, text: str) -> List[str]:
+        return [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+
+    def _log_request(self, api: str, messages: List[Dict[str, Any]], tool_calls, reply: str) -> Dict[str, Any]:
+        record = {
+            "api": api,
+            "messages": len(messages),
+            "tool_call": tool_calls[0]["name"] if tool_calls else None,
+            "tool_calls": len(tool_calls),
+            "reply_chars": len(reply),
+            "received_at": time.perf_counter(),
+        }
+        self.request_log.append(record)
+        return record
+
+    async def handle_openai_models(self, request: web.Request) -> web.Response:
+        return web.json_response({"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "mock"}]})
+
+    async def handle_openai_chat(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        messages = body.get("messages", [])
+        model = body.get("model", "mock")
+        tool_calls, reply = self._plan(messages)
+        if tool_calls and not body.get("tools"):
+            tool_calls, reply = [], self.default_reply
+        record = self._log_request("openai", messages, tool_calls, reply)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        usage = {"prompt_tokens": sum(len(m.get("content") or "") for m in messages), "completion_tokens": len(reply)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if body.get("max_tokens") is not None:
+            reply = reply[:body["max_tokens"]]
+
+        if not body.get("stream"):
+            await asyncio.sleep(self._delay(self.ttft) + self.inter_token * len(self._chunks(reply)))
+            message = {"role": "assistant", "content": reply}
+            if tool_calls:
+                message = {"role": "assistant", "content": None, "tool_calls": [self._openai_tool_call(tool_call) for tool_call in tool_calls]}
+            return web.json_response({
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if tool_calls else "stop"}],
+                "usage": usage,
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+
+        async def send(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> None:
+            chunk = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+
+        await asyncio.sleep(self._delay(self.ttft))
+        record["first_token_at"] = time.perf_counter()
+        await send({"role": "assistant", "content": ""})
+        if tool_calls:
+            for index, tool_call in enumerate(tool_calls):
+                call = self._openai_tool_call(tool_call)
+                # 与OpenAI一致：逐个下发工具调用，先下发id与函数名，再分多次下发参数
+                await send({"tool_calls": [{"index": index, "id": call["id"], "type": "function", "function": {"name": call["function"]["name"], "arguments": ""}}]})
+                for part in self._chunks(call["function"]["arguments"]):
+                    await asyncio.sleep(self._delay(self.inter_token))
+                    await send({"tool_calls": [{"index": index, "function": {"arguments": part}}]})
+            await send({}, "tool_calls")
+        else:
+            for i, part in enumerate(self._chunks(reply)):
+                if i:
+                    await asyncio.sleep(self._delay(self.inter_token))
+                await send({"content": part})
+            await send({}, "stop")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model, "choices": [], "usage": usage}
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        record["finished_at"] = time.perf_counter()
+        await response.write_eof()
+        return response
+
+    @staticmethod
+    def _openai_tool_call(tool_call: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": f"call_{uuid.uuid4().hex[:12]}",
+            "type": "function",
+            "function": {"name": tool_call["name"], "arguments": json.dumps(tool_call.get("arguments", {}), ensure_ascii=False)},
+        }
+
+    async def handle_ollama_chat(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        messages = body.get("messages") or []
+        model = body.get("model", "mock")
+        start_ns = time.perf_counter_ns()
+
+        def message_chunk(message: Dict[str, Any], done: bool = False, **extra) -> Dict[str, Any]:
+            return {"model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "message": message, "done": done, **extra}
+
+        if not messages:
+            # 与Ollama一致：消息为空时只加载模型
+            return web.json_response(message_chunk({"role": "assistant", "content": ""}, True, done_reason="load"))
+
+        tool_calls, reply = self._plan(messages)
+        if tool_calls and not body.get("tools"):
+            tool_calls, reply = [], self.default_reply
+        record = self._log_request("ollama", messages, tool_calls, reply)
+
+        def final_chunk() -> Dict[str, Any]:
+            total_ns = time.perf_counter_ns() - start_ns
+            return message_chunk({"role": "assistant", "content": ""}, True,
+                done_reason="stop", total_duration=total_ns, load_duration=0,
+                prompt_eval_count=sum(len(m.get("content") or "") for m in messages),
+                prompt_eval_duration=int(self.ttft * 1e9),
+                eval_count=len(reply), eval_duration=max(0, total_ns - int(self.ttft * 1e9)))
+
+        tool_message = {"role": "assistant", "content": "", "tool_calls": [
+            {"function": {"name": tool_call["name"], "arguments": tool_call.get("arguments", {})}} for tool_call in tool_calls
+        ]} if tool_calls else None
+
+        if body.get("stream") is False:
+            await asyncio.sleep(self._delay(self.ttft) + self.inter_token * len(self._chunks(reply)))
+            result = final_chunk()
+            result["message"] = tool_message or {"role": "assistant", "content": reply}
+            return web.json_response(result)
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+
+        async def send(chunk: Dict[str, Any]) -> None:
+            await response.write((json.dumps(chunk, ensure_ascii=False) + "\n").encode())
+
+        await asyncio.sleep(self._delay(self.ttft))
+        record["first_token_at"] = time.perf_counter()
+        if tool_message:
+            await send(message_chunk(tool_message))
+        else:
+            for i, part in enumerate(self._chunks(reply)):
+                if i:
+                    await asyncio.sleep(self._delay(self.inter_token))
+                await send(message_chunk({"role": "assistant", "content": part}))
+        await send(final_chunk())
+        record["finished_at"] = time.perf_counter()
+        await response.write_eof()
+        return response
+
+def load_script(path: str) -> dict:
+    """加载yaml或json格式的时序与回复脚本"""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        import yaml
+        return yaml.safe_load(f) or {}
+
+async def serve(config: dict, host: str, port: int) -> None:
+    server = MockLLMServer(config)
+    port = await server.start(host, port)
+    print(f"OpenAI兼容接口: http://{host}:{port}/v1    Ollama兼容接口: http://{host}:{port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地模拟LLM服务器（OpenAI/Ollama兼容的流式接口）")
+    parser.add_argument('--host', type=str, default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=11435)
+    parser.add_argument('--script', type=str, default=None, help='时序与回复脚本（yaml/json）')
+    parser.add_argument('--ttft-ms', type=float, default=None, help='首token延迟，覆盖脚本中的配置')
+    parser.add_argument('--inter-token-ms', type=float, default=None, help='token间隔，覆盖脚本中的配置')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    config = load_script(args.script) if args.script else {}
+    if args.ttft_ms is not None:
+        config["ttft_ms"] = args.ttft_ms
+    if args.inter_token_ms is not None:
+        config["inter_token_ms"] = args.inter_token_ms
+    try:
+        asyncio.run(serve(config, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
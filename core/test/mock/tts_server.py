@@ -0,0 +1,241 @@
+import json
+import math
+import time
+import uuid
+import array
+import random
+import struct
+import asyncio
+import argparse
+import logging
+from typing import List, Dict, Any, Optional
+
+from websockets.asyncio.server import serve, ServerConnection
+from websockets.exceptions import ConnectionClosed
+
+from core.component.tts.doubao_codec import (
+    FULL_SERVER_RESPONSE, AUDIO_ONLY_RESPONSE, MsgTypeFlagWithEvent, JSON,
+    EVENT_Start_Connection, EVENT_FinishConnection, EVENT_StartSession, EVENT_FinishSession, EVENT_TaskRequest,
+    EVENT_ConnectionStarted, EVENT_ConnectionFinished, EVENT_SessionStarted, EVENT_SessionFinished, EVENT_SessionFailed,
+    EVENT_TTSSentenceStart, EVENT_TTSSentenceEnd, EVENT_TTSResponse
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIRST_BYTE_MS = 150     # 会话收到第一段文本到返回首个音频帧的延迟
+DEFAULT_RTF = 0.3               # 实时率：合成1秒音频所需的时间（秒）
+DEFAULT_CHUNK_MS = 100          # 每个音频帧包含的音频时长
+DEFAULT_MS_PER_CHAR = 220       # 每个字符对应的音频时长（中文正常语速约每秒4~5个字）
+DEFAULT_SAMPLE_RATE = 24000
+TONE_HZ = 440                   # 合成音频为该频率的正弦波
+
+_U32 = struct.Struct(">I")
+
+def _sized(data: bytes) -> bytes:
+    return _U32.pack(len(data)) + data
+
+def server_frame(message_type: int, event: int, *fields: bytes) -> bytes:
+    """构造服务器下行帧：头部 | 事件号 | 各字段（4字节长度 + 内容）"""
+    header = bytes([0x11, (message_type << 4) | MsgTypeFlagWithEvent, JSON << 4, 0])
+    return b"".join((header, _U32.pack(event), *(_sized(field) for field in fields)))
+
+def parse_client_frame(frame: bytes) -> Dict[str, Any]:
+    """解析客户端请求帧：连接级事件只有负载，会话级事件依次为session_id与负载"""
+    (event,) = _U32.unpack_from(frame, 4)
+    offset = 8
+    session_id = None
+    if event not in (EVENT_Start_Connection, EVENT_FinishConnection):
+        (size,) = _U32.unpack_from(frame, offset)
+        session_id = frame[offset + 4:offset + 4 + size].decode()
+        offset += 4 + size
+    (size,) = _U32.unpack_from(frame, offset)
+    payload = frame[offset + 4:offset + 4 + size]
+    return {"event": event, "session_id": session_id, "payload": json.loads(payload) if payload else {}}
+
+class MockTTSSession:
+    """服务器端的一个会话：按收到的顺序逐段合成文本，FinishSession后合成完剩余文本再返回SessionFinished"""
+    def __init__(self, session_id: str, sample_rate: int):
+        self.session_id = session_id
+        self.sample_rate = sample_rate
+        self.texts: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+        self.record: Dict[str, Any] = {
+            "session_id": session_id,
+            "texts": [],
+            "started_at": time.perf_counter(),
+            "first_audio_at": None,
+            "finished_at": None,
+            "audio_bytes": 0,
+        }
+
+class MockTTSServer:
+    """本地模拟豆包双向流式TTS服务器（WebSocket二进制协议）
+
+    实现与 core/component/tts/doubao.py 交互所需的事件：
+    StartConnection/FinishConnection、StartSession/FinishSession、TaskRequest，
+    下行返回ConnectionStarted、SessionStarted/SessionFinished、每段文本的SentenceStart/SentenceEnd与仅音频帧。
+    音频为正弦波PCM（16位单声道，采样率取自请求参数），时长按文本字数计算。
+
+    配置示例：
+        first_byte_ms: 150      # 会话首个音频帧的延迟
+        rtf: 0.3                # 实时率，0表示不限速
+        chunk_ms: 100           # 每个音频帧的音频时长
+        ms_per_char: 220        # 每个字符的音频时长
+        jitter_ms: 0            # 每帧延迟的随机抖动幅度（使用固定种子，结果可复现）
+        seed: 0
+
+    与真实服务一致，一条连接同一时间只承载一个会话；会话被提前结束（FinishSession）后，
+    服务器仍会合成并返回已收到的全部文本。每个会话的实际时序记录在 self.session_log 中。
+    """
+    def __init__(self, config: Optional[dict] = None):
+        config = config or {}
+        self.first_byte: float = config.get("first_byte_ms", DEFAULT_FIRST_BYTE_MS) / 1000
+        self.rtf: float = config.get("rtf", DEFAULT_RTF)
+        self.chunk_ms: int = config.get("chunk_ms", DEFAULT_CHUNK_MS)
+        self.ms_per_char: float = config.get("ms_per_char", DEFAULT_MS_PER_CHAR)
+        self.jitter: float = config.get("jitter_ms", 0) / 1000
+        self._rng = random.Random(config.get("seed", 0))
+        self._tones: Dict[int, bytes] = {}
+
+        self.session_log: List[Dict[str, Any]] = []
+        self.connections = 0            # 累计建立的连接数
+        self.rejected_sessions = 0      # 连接上已有会话时被拒绝的StartSession数
+        self._active: List[ServerConnection] = []
+        self._server = None
+        self.port: Optional[int] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """启动服务器，port为0时自动选择空闲端口，返回实际监听的端口"""
+        self._server = await serve(self.handle_connection, host, port, max_size=None)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"模拟TTS服务器已启动: ws://{host}:{self.port}")
+        return self.port
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def drop_connections(self) -> None:
+        """主动断开所有客户端连接，模拟网络中断或服务端重启"""
+        await asyncio.gather(*(ws.close() for ws in list(self._active)), return_exceptions=True)
+
+    def _delay(self, base: float) -> float:
+        if not self.jitter:
+            return base
+        return max(0.0, base + self._rng.uniform(-self.jitter, self.jitter))
+
+    def _tone(self, sample_rate: int) -> bytes:
+        """一秒的正弦波PCM，按采样率缓存"""
+        tone = self._tones.get(sample_rate)
+        if tone is None:
+            samples = array.array("h", (int(8000 * math.sin(2 * math.pi * TONE_HZ * i / sample_rate)) for i in range(sample_rate)))
+            tone = self._tones[sample_rate] = samples.tobytes()
+        return tone
+
+    def audio_chunks(self, text: str, sample_rate: int) -> List[bytes]:
+        """按字数生成一段文本的音频帧"""
+        tone = self._tone(sample_rate)
+        total = int(len(text) * self.ms_per_char * sample_rate / 1000) * 2
+        chunk_bytes = sample_rate * self.chunk_ms // 1000 * 2
+        chunks = []
+        for offset in range(0, total, chunk_bytes):
+            size = min(chunk_bytes, total - offset)
+            start = offset % len(tone)
+            chunk = tone[start:start + size]
+            while len(chunk) < size:
+                chunk += tone[:size - len(chunk)]
+            chunks.append(chunk)
+        return chunks
+
+    async def handle_connection(self, ws: ServerConnection) -> None:
+        self.connections += 1
+        self._active.append(ws)
+        session: Optional[MockTTSSession] = None
+        try:
+            async for frame in ws:
+                request = parse_client_frame(frame)
+                event = request["event"]
+                session_id = request["session_id"]
+                if event == EVENT_Start_Connection:
+                    await ws.send(server_frame(FULL_SERVER_RESPONSE, EVENT_ConnectionStarted, uuid.uuid4().hex.encode()))
+                elif event == EVENT_FinishConnection:
+                    await ws.send(server_frame(FULL_SERVER_RESPONSE, EVENT_ConnectionFinished, b"", b"{}"))
+                    break
+                elif event == EVENT_StartSession:
+                    if session is not None and not session.task.done():
+                        self.rejected_sessions += 1
+                        meta = json.dumps({"message": "connection already has an active session"}).encode()
+                        await ws.send(server_frame(FULL_SERVER_RESPONSE, EVENT_SessionFailed, session_id.encode(), meta))
+                        continue
+                    audio_params = request["payload"].get("req_params", {}).get("audio_params", {})
+                    session = MockTTSSession(session_id, audio_params.get("sample_rate", DEFAULT_SAMPLE_RATE))
+                    self.session_log.append(session.record)
+                    session.task = asyncio.create_task(self._synthesize(ws, session))
+                    await ws.send(server_frame(FULL_SERVER_RESPONSE, EVENT_SessionStarted, session_id.encode(), b"{}"))
+                elif session is not None and session_id == session.session_id:
+                    if event == EVENT_TaskRequest:
+                        text = request["payload"].get("req_params", {}).get("text", "")
+                        session.record["texts"].append(text)
+                        session.texts.put_nowait(text)
+                    elif event == EVENT_FinishSession:
+                        session.texts.put_nowait(None)
+        except ConnectionClosed:
+            pass
+        finally:
+            if session is not None and session.task is not None:
+                session.task.cancel()
+            self._active.remove(ws)
+
+    async def _synthesize(self, ws: ServerConnection, session: MockTTSSession) -> None:
+        """逐段合成：首个音频帧在first_byte后返回，之后每帧按实时率限速"""
+        try:
+            await self._run_session(ws, session)
+        except ConnectionClosed:
+            logger.debug(f"连接已断开，会话中止: {session.session_id}")
+
+    async def _run_session(self, ws: ServerConnection, session: MockTTSSession) -> None:
+        record = session.record
+        sid = session.session_id.encode()
+        while True:
+            text = await session.texts.get()
+            if text is None:
+                break
+            await ws.send(server_frame(FULL_SERVER_RESPONSE, EVENT_TTSSentenceStart, sid, json.dumps({"text": text}, ensure_ascii=False).encode()))
+            for chunk in self.audio_chunks(text, session.sample_rate):
+                if record["first_audio_at"] is None:
+                    await asyncio.sleep(self._delay(self.first_byte))
+                    record["first_audio_at"] = time.perf_counter()
+                elif self.rtf:
+                    await asyncio.sleep(self._delay(self.chunk_ms / 1000 * self.rtf))
+                await ws.send(server_frame(AUDIO_ONLY_RESPONSE, EVENT_TTSResponse, sid, chunk))
+                record["audio_bytes"] += len(chunk)
+            await ws.send(server_frame(FULL_SERVER_RESPONSE, EVENT_TTSSentenceEnd, sid, b"{}"))
+        record["finished_at"] = time.perf_counter()
+        await ws.send(server_frame(FULL_SERVER_RESPONSE, EVENT_SessionFinished, sid, b"{}"))
+
+async def serve_forever(config: dict, host: str, port: int) -> None:
+    server = MockTTSServer(config)
+    port = await server.start(host, port)
+    print(f"豆包TTS兼容接口: ws://{host}:{port}（将DouBaoTTS.base_url指向该地址）")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地模拟豆包双向流式TTS服务器")
+    parser.add_argument('--host', type=str, default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=11436)
+    parser.add_argument('--first-byte-ms', type=float, default=DEFAULT_FIRST_BYTE_MS, help='会话首个音频帧的延迟')
+    parser.add_argument('--rtf', type=float, default=DEFAULT_RTF, help='实时率，0表示不限速')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='每帧延迟的随机抖动幅度')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    config = {"first_byte_ms": args.first_byte_ms, "rtf": args.rtf, "jitter_ms": args.jitter_ms}
+    try:
+        asyncio.run(serve_forever(config, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,97 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+import pytest
+from core.component.factory import ComponentFactory
+from core.utils.redirect import suppress_stderr, redirect_to_logger_low_level
+
+class FakeConfig:
+    """只提供工厂用到的接口：每种组件选中名为Fake的实现"""
+    def __init__(self, component_configs):
+        self.component_configs = component_configs
+
+    def get_cls_name(self, component_type):
+        return "Fake"
+
+    def get_component_config(self, component_type, name):
+        return self.component_configs[component_type]
+
+class FakeComponent:
+    """构造耗时delay秒，fail为真时构造失败；init_fail为真时初始化失败"""
+    def __init__(self, config):
+        time.sleep(config.get("delay", 0))
+        if config.get("fail"):
+            raise ValueError(f"cannot create {config['name']}")
+        self.config = config
+
+    async def init(self):
+        await asyncio.sleep(self.config.get("delay", 0))
+        if self.config.get("init_fail"):
+            raise ConnectionError(f"cannot init {self.config['name']}")
+
+@pytest.fixture
+def fake_factory(monkeypatch):
+    monkeypatch.setattr(ComponentFactory, "_component_registry", {"A": {"Fake": FakeComponent}, "B": {"Fake": FakeComponent}, "C": {"Fake": FakeComponent}})
+    monkeypatch.setattr(ComponentFactory, "_component_keys", {"a": "A", "b": "B", "c": "C"})
+
+def test_components_are_created_and_initialized_in_parallel(fake_factory):
+    config = FakeConfig({name: {"name": name, "delay": 0.2} for name in "ABC"})
+    start_time = time.perf_counter()
+    components = asyncio.run(ComponentFactory.create_components(config))
+    assert sorted(components) == ["a", "b", "c"]
+    asyncio.run(ComponentFactory.init_components(components))
+    # 三个组件各耗时0.2秒（创建与初始化各一次），并行执行时总耗时接近0.4秒
+    assert time.perf_counter() - start_time < 0.8
+
+def test_create_errors_are_aggregated(fake_factory):
+    config = FakeConfig({"A": {"name": "A"}, "B": {"name": "B", "fail": True}, "C": {"name": "C", "fail": True}})
+    with pytest.raises(RuntimeError) as error:
+        asyncio.run(ComponentFactory.create_components(config))
+    # 一次报告所有失败的组件，而不是只报告第一个
+    assert "b: ValueError('cannot create B')" in str(error.value)
+    assert "c: ValueError('cannot create C')" in str(error.value)
+    assert "a:" not in str(error.value)
+
+def test_init_errors_are_aggregated(fake_factory, caplog):
+    config = FakeConfig({"A": {"name": "A", "init_fail": True}, "B": {"name": "B"}, "C": {"name": "C", "init_fail": True}})
+    components = asyncio.run(ComponentFactory.create_components(config))
+    with caplog.at_level(logging.INFO, logger="core.component.factory"):
+        with pytest.raises(RuntimeError) as error:
+            asyncio.run(ComponentFactory.init_components(components))
+    assert "a: ConnectionError('cannot init A')" in str(error.value)
+    assert "c: ConnectionError('cannot init C')" in str(error.value)
+    # 耗时明细只写入日志
+    assert "组件初始化耗时" in caplog.text
+
+def test_concurrent_redirects_do_not_block_each_other_and_restore_fds():
+    stdout_target = os.fstat(1)
+    stderr_target = os.fstat(2)
+    logger = logging.getLogger("test_redirect")
+    inside = threading.Barrier(3, timeout=2)
+    errors = []
+
+    def wait_inside():
+        try:
+            inside.wait()
+        except threading.BrokenBarrierError as e:
+            errors.append(e)
+
+    def capture():
+        with redirect_to_logger_low_level(logger):
+            os.write(1, b"native output\n")
+            wait_inside()
+
+    def suppress():
+        with suppress_stderr():
+            wait_inside()
+
+    threads = [threading.Thread(target=capture), threading.Thread(target=suppress), threading.Thread(target=capture)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    # 三个重定向同时处于生效状态（Barrier未超时），全部退出后恢复原始的stdout/stderr
+    assert not errors and not any(thread.is_alive() for thread in threads)
+    assert os.fstat(1) == stdout_target and os.fstat(2) == stderr_target
@@ -0,0 +1,113 @@
+import asyncio
+from core.component.llm.memory import ConversationMemory
+
+class FakeSummarizer:
+    """模拟LLM摘要：截取已有摘要与新增对话的末尾"""
+    def __init__(self):
+        self.calls = 0
+
+    async def acomplete(self, messages):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return messages[-1]["content"][-150:]
+
+def test_prompt_tokens_plateau():
+    """200轮对话的浸泡测试：每轮的prompt token数应趋于平稳，而不是持续增长"""
+    async def soak():
+        summarizer = FakeSummarizer()
+        memory = ConversationMemory("你是一个语音助手。", {"max_turns": 6, "max_tokens": 800}, summarizer)
+        prompt_tokens = []
+        for i in range(200):
+            memory.add_user_message(f"第{i}轮：今天深圳的天气怎么样？明天适合出门吗？")
+            messages = memory.build_prompt()
+            prompt_tokens.append(memory.prompt_tokens())
+            # 模拟LLM追加工具调用、工具结果与回复
+            messages.append({"role": "assistant", "content": None, "tool_calls": [
+                {"id": f"call_{i}", "type": "function", "function": {"name": "get_current_weather", "arguments": '{"city": "深圳"}'}}
+            ]})
+            messages.append({"role": "tool", "name": "get_current_weather", "content": "深圳：晴，26℃，湿度60%", "tool_call_id": f"call_{i}"})
+            messages.append({"role": "assistant", "content": f"第{i}轮回复：今天深圳晴，26度，挺适合出门的。"})
+            memory.commit(messages)
+            # 两轮对话之间让出事件循环，后台摘要任务在此期间运行
+            await asyncio.sleep(0)
+        await memory.close()
+        return memory, summarizer, prompt_tokens
+
+    memory, summarizer, prompt_tokens = asyncio.run(soak())
+
+    assert len(memory.turns) <= 6
+    assert summarizer.calls > 0 and memory.summary
+    assert max(prompt_tokens[100:]) <= 800 + 100
+    # 后半段与前半段稳定期的峰值一致，说明prompt token已经平稳
+    assert max(prompt_tokens[150:]) <= max(prompt_tokens[20:100]) + 10
+
+def test_commit_keeps_tool_calls_in_turn():
+    async def run():
+        memory = ConversationMemory("system", {"max_turns": 2})
+        for i in range(3):
+            memory.add_user_message(f"q{i}")
+            messages = memory.build_prompt()
+            messages.append({"role": "assistant", "content": f"a{i}"})
+            memory.commit(messages)
+        return memory
+
+    memory = asyncio.run(run())
+    # 无摘要器时，旧轮次直接丢弃，保留的轮次完整且以用户消息开头
+    assert [turn[0]["content"] for turn in memory.turns] == ["q1", "q2"]
+    assert memory.last_reply() == "a2"
+    assert memory.build_prompt()[0]["role"] == "system"
+
+def test_trim_ratio_keeps_prefix_stable():
+    """trim_ratio小于1时一次多裁剪几轮，之后若干轮的prompt前缀保持不变"""
+    async def run():
+        memory = ConversationMemory("system", {"max_turns": 8, "trim_ratio": 0.5})
+        prefix_changes = 0
+        last_first_user = None
+        for i in range(40):
+            memory.add_user_message(f"q{i}")
+            messages = memory.build_prompt()
+            if messages[1]["content"] != last_first_user:
+                prefix_changes += 1
+                last_first_user = messages[1]["content"]
+            messages.append({"role": "assistant", "content": f"a{i}"})
+            memory.commit(messages)
+        return memory, prefix_changes
+
+    memory, prefix_changes = asyncio.run(run())
+    assert len(memory.turns) <= 8
+    # 逐轮裁剪时前缀每轮都会变化（约32次），按比例裁剪后只有少数几次
+    assert prefix_changes <= 10
+
+class FailingSummarizer:
+    """模拟持续失败的LLM摘要，记录每次摘要请求的长度"""
+    def __init__(self):
+        self.prompt_chars = []
+
+    async def acomplete(self, messages):
+        self.prompt_chars.append(sum(len(message["content"]) for message in messages))
+        await asyncio.sleep(0)
+        raise ConnectionError("summarizer unavailable")
+
+def test_failing_summarizer_keeps_memory_bounded():
+    """摘要持续失败时，等待压缩的轮次与摘要请求的长度保持有界，而不是无限累积"""
+    async def soak():
+        summarizer = FailingSummarizer()
+        memory = ConversationMemory("你是一个语音助手。", {"max_turns": 4, "max_tokens": 300}, summarizer)
+        pending = []
+        for i in range(200):
+            memory.add_user_message(f"第{i}轮：今天深圳的天气怎么样？明天适合出门吗？")
+            messages = memory.build_prompt()
+            messages.append({"role": "assistant", "content": f"第{i}轮回复：今天深圳晴，26度，挺适合出门的。"})
+            memory.commit(messages)
+            await asyncio.sleep(0)
+            pending.append(len(memory._pending_turns))
+        await memory.close()
+        return memory, summarizer, pending
+
+    memory, summarizer, pending = asyncio.run(soak())
+    assert not memory.summary and summarizer.prompt_chars
+    assert max(pending[100:]) <= max(pending[:100])
+    # 摘要请求的长度不随失败次数增长（每轮约90字，预算内最多保留数轮）
+    assert max(summarizer.prompt_chars) < 1000
+    # 等待压缩的轮次不超过token预算
+    assert max(pending) <= 300 // 30
@@ -0,0 +1,143 @@
+import json
+import time
+import argparse
+from core.component.tts.doubao_codec import (
+    Header, Optional, Response, DouBaoRequestEncoder, decode_response,
+    START_CONNECTION_FRAME, FINISH_CONNECTION_FRAME,
+    FULL_CLIENT_REQUEST, FULL_SERVER_RESPONSE, AUDIO_ONLY_RESPONSE, ERROR_INFORMATION, MsgTypeFlagWithEvent, JSON,
+    EVENT_Start_Connection, EVENT_FinishConnection, EVENT_StartSession, EVENT_FinishSession, EVENT_TaskRequest,
+    EVENT_ConnectionStarted, EVENT_SessionStarted, EVENT_TTSResponse
+)
+
+SESSION_ID = "0123456789abcdef0123456789abcdef"
+PARAMS = ("zh_female_wanwanxiaohe_moon_bigtts", "pcm", 24000, 0)
+
+def legacy_encode(event: int, session_id=None, payload: bytes = b"", serial_method: int = JSON) -> bytes:
+    """逐帧构造Header/Optional对象与bytearray的原始编码方式，作为对照"""
+    request = bytearray(Header(FULL_CLIENT_REQUEST, MsgTypeFlagWithEvent, serial_method).as_bytes())
+    request.extend(Optional(event=event, session_id=session_id).as_bytes())
+    if payload:
+        request.extend(len(payload).to_bytes(4, 'big', signed=True))
+        request.extend(payload)
+    return bytes(request)
+
+def legacy_payload(encoder: DouBaoRequestEncoder, event: int, text: str) -> bytes:
+    return str.encode(json.dumps({
+        "user": {"uid": encoder.uid},
+        "event": event,
+        "namespace": "BidirectionalTTS",
+        "req_params": {
+            "text": text,
+            "speaker": encoder.speaker,
+            "audio_params": {
+                "format": encoder.audio_format,
+                "sample_rate": encoder.sample_rate,
+                "speech_rate": encoder.speech_rate
+            }
+        }
+    }))
+
+def legacy_read(res: bytes, offset: int):
+    size = int.from_bytes(res[offset:offset+4], 'big')
+    offset += 4
+    return res[offset:offset+size], offset + size
+
+def legacy_decode(res: bytes) -> Response:
+    """按切片与int.from_bytes逐字段解析、复制负载的原始解码方式，作为对照"""
+    response = Response(Header(), Optional())
+    header = response.header
+    header.protocol_version = res[0] >> 4 & 0x0f
+    header.header_size = res[0] & 0x0f
+    header.message_type = (res[1] >> 4) & 0x0f
+    header.message_type_specific_flags = res[1] & 0x0f
+    header.serial_method = res[2] >> 4
+    header.compression_type = res[2] & 0x0f
+    header.reserved_data = res[3]
+    offset = 4
+    optional = response.optional
+    if header.message_type in [FULL_SERVER_RESPONSE, AUDIO_ONLY_RESPONSE]:
+        if header.message_type_specific_flags == MsgTypeFlagWithEvent:
+            optional.event = int.from_bytes(res[offset:offset+4], 'big')
+            offset += 4
+            if optional.event == EVENT_TTSResponse:
+                session_id, offset = legacy_read(res, offset)
+                optional.session_id = session_id.decode()
+                response.payload, offset = legacy_read(res, offset)
+    return response
+
+def server_frame(message_type: int, event: int, *fields: bytes) -> bytes:
+    frame = bytearray([0x11, (message_type << 4) | MsgTypeFlagWithEvent, JSON << 4, 0])
+    frame.extend(event.to_bytes(4, "big"))
+    for field in fields:
+        frame.extend(len(field).to_bytes(4, "big"))
+        frame.extend(field)
+    return bytes(frame)
+
+def test_encoded_frames_match_protocol():
+    encoder = DouBaoRequestEncoder(*PARAMS)
+    assert START_CONNECTION_FRAME == legacy_encode(EVENT_Start_Connection, payload=b"{}", serial_method=0)
+    assert FINISH_CONNECTION_FRAME == legacy_encode(EVENT_FinishConnection, payload=b"{}")
+    assert encoder.finish_session(SESSION_ID) == legacy_encode(EVENT_FinishSession, SESSION_ID, b"{}")
+
+    # 负载不再把中文转义为\uXXXX，按JSON解析后与原始方式一致
+    for event, frame, text in [
+        (EVENT_StartSession, encoder.start_session(SESSION_ID), ""),
+        (EVENT_TaskRequest, encoder.task_request(SESSION_ID, '你好，"世界"\n'), '你好，"世界"\n'),
+    ]:
+        legacy = legacy_encode(event, SESSION_ID, legacy_payload(encoder, event, text))
+        prefix = 4 + 4 + 4 + len(SESSION_ID)
+        assert frame[:prefix] == legacy[:prefix]
+        size = int.from_bytes(frame[prefix:prefix + 4], "big")
+        assert size == len(frame) - prefix - 4
+        assert json.loads(frame[prefix + 4:]) == json.loads(legacy[prefix + 4:])
+
+def test_decode_returns_payload_view_without_copy():
+    audio = bytes(range(256)) * 16
+    frame = server_frame(AUDIO_ONLY_RESPONSE, EVENT_TTSResponse, SESSION_ID.encode(), audio)
+    res = decode_response(frame)
+    assert res.header.message_type == AUDIO_ONLY_RESPONSE
+    assert res.optional.event == EVENT_TTSResponse
+    assert res.optional.session_id == SESSION_ID
+    assert isinstance(res.payload, memoryview) and res.payload.obj is frame
+    assert res.payload == audio
+
+    res = decode_response(server_frame(FULL_SERVER_RESPONSE, EVENT_ConnectionStarted, b"conn-1"))
+    assert res.optional.connection_id == "conn-1" and res.optional.session_id is None
+    res = decode_response(server_frame(FULL_SERVER_RESPONSE, EVENT_SessionStarted, SESSION_ID.encode(), b'{"a":1}'))
+    assert res.optional.session_id == SESSION_ID and res.optional.response_meta_json == '{"a":1}'
+
+    error = bytes([0x11, ERROR_INFORMATION << 4, JSON << 4, 0]) + (45000001).to_bytes(4, "big") + (5).to_bytes(4, "big") + b"error"
+    res = decode_response(error)
+    assert res.optional.error_code == 45000001 and res.payload == b"error"
+
+def run_benchmark(frames: int, audio_bytes: int):
+    """对比原始方式与编解码模块的吞吐（帧/秒）：编码一条文本请求帧，解码一条音频帧"""
+    encoder = DouBaoRequestEncoder(*PARAMS)
+    text = "今天深圳晴，"
+    audio_frame = server_frame(AUDIO_ONLY_RESPONSE, EVENT_TTSResponse, SESSION_ID.encode(), b"\x00" * audio_bytes)
+
+    def measure(fn) -> float:
+        start_time = time.perf_counter()
+        for _ in range(frames):
+            fn()
+        return frames / (time.perf_counter() - start_time)
+
+    results = {
+        "encode": (
+            measure(lambda: legacy_encode(EVENT_TaskRequest, SESSION_ID, legacy_payload(encoder, EVENT_TaskRequest, text))),
+            measure(lambda: encoder.task_request(SESSION_ID, text)),
+        ),
+        "decode": (
+            measure(lambda: legacy_decode(audio_frame)),
+            measure(lambda: decode_response(audio_frame)),
+        ),
+    }
+    for name, (legacy, codec) in results.items():
+        print(f"{name}  原始方式: {legacy:10.0f} 帧/秒   编解码模块: {codec:10.0f} 帧/秒   提升: {codec / legacy:.2f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frames', type=int, default=200000, help='每项测量的帧数')
+    parser.add_argument('--audio-bytes', type=int, default=9600, help='音频帧的负载大小（24kHz 16位PCM 200ms约9600字节）')
+    args = parser.parse_args()
+    run_benchmark(args.frames, args.audio_bytes)
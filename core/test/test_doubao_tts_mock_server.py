@@ -0,0 +1,144 @@
+import time
+import asyncio
+import argparse
+import statistics
+from typing import List
+from core.component.tts.doubao import AsyncDouBaoTTSClient
+from core.test.mock.tts_server import MockTTSServer
+
+SCRIPT = {"first_byte_ms": 50, "rtf": 0.2, "chunk_ms": 100, "ms_per_char": 200}
+SAMPLE_RATE = 24000
+
+async def text_stream(*texts: str):
+    for text in texts:
+        yield text
+
+def create_client(port: int, pool_size: int = 2) -> AsyncDouBaoTTSClient:
+    return AsyncDouBaoTTSClient({
+        "base_url": f"ws://127.0.0.1:{port}",
+        "audio_sample_rate": SAMPLE_RATE,
+        "pool_size": pool_size,
+    })
+
+def with_server(test, script: dict = SCRIPT, pool_size: int = 2):
+    """启动模拟服务器与连接到它的真实TTS客户端，执行test(client, server)"""
+    async def run():
+        server = MockTTSServer(script)
+        port = await server.start()
+        client = create_client(port, pool_size)
+        try:
+            await client.init()
+            await test(client, server)
+        finally:
+            await client.close()
+            await server.stop()
+    asyncio.run(run())
+
+def test_streaming_audio_matches_text_length():
+    async def test(client, server):
+        start_time = time.perf_counter()
+        first = None
+        audio = bytearray()
+        async for chunk in client.astream_tts(text_stream("你好，", "今天天气不错。")):
+            if first is None:
+                first = time.perf_counter() - start_time
+            audio.extend(chunk)
+        # 每字200ms的16位单声道PCM
+        assert len(audio) == 10 * 200 * SAMPLE_RATE // 1000 * 2
+        assert first >= SCRIPT["first_byte_ms"] / 1000
+        record = server.session_log[-1]
+        assert record["texts"] == ["你好，", "今天天气不错。"]
+        assert record["finished_at"] is not None
+
+    with_server(test)
+
+def test_interrupted_session_drains_on_server():
+    async def test(client, server):
+        stream = client.astream_tts(text_stream("这是一段会被打断的很长很长的回复。"))
+        await stream.__anext__()
+        await stream.aclose()
+        # 下一轮在另一条就绪连接上开始，不等待被打断的会话
+        audio = b"".join([chunk async for chunk in client.astream_tts(text_stream("好的"))])
+        assert len(audio) == 2 * 200 * SAMPLE_RATE // 1000 * 2
+        assert server.rejected_sessions == 0
+        # 服务器合成完被打断会话的剩余文本（约0.7秒）后返回SessionFinished，残留音频被客户端丢弃
+        for _ in range(100):
+            if all(record["finished_at"] is not None for record in server.session_log):
+                break
+            await asyncio.sleep(0.02)
+        assert all(record["finished_at"] is not None for record in server.session_log)
+        assert client.dropped_frames > 0
+        assert client.stats()["ready"] >= 1
+
+    with_server(test)
+
+def test_dropped_connections_are_replaced():
+    async def test(client, server):
+        await server.drop_connections()
+        await asyncio.sleep(0.05)
+        # 断开的连接在后台立即重连
+        assert client.stats()["ready"] == 2
+        assert client.disconnects == 2 and client.reconnects == 2
+        audio = b"".join([chunk async for chunk in client.astream_tts(text_stream("好的"))])
+        assert len(audio) > 0
+        assert server.connections >= 4
+
+    with_server(test)
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+async def run_benchmark(turns: int, interrupt_ms: float, script: dict):
+    """离线基准：
+    - 打断与会话轮换：每轮播放interrupt_ms后打断，紧接着开始下一轮，统计各连接池大小下下一轮的首包延迟；
+    - 吞吐：连续完整合成，统计每秒墙钟时间合成的音频秒数。
+    """
+    server = MockTTSServer(script)
+    port = await server.start()
+    reply = "好的，我来为你查询一下今天深圳的天气情况，请稍等片刻。"
+    try:
+        for pool_size in (1, 2):
+            client = create_client(port, pool_size)
+            await client.init()
+            first_ms = []
+            try:
+                for _ in range(turns):
+                    start_time = time.perf_counter()
+                    stream = client.astream_tts(text_stream(reply))
+                    await stream.__anext__()
+                    first_ms.append((time.perf_counter() - start_time) * 1000)
+                    await asyncio.sleep(interrupt_ms / 1000)
+                    await stream.aclose()
+                stats = client.stats()
+            finally:
+                await client.close()
+            print(f"连接池大小 {pool_size}: 打断后下一轮首包 p50 {statistics.median(first_ms):7.1f} ms   "
+                  f"p95 {percentile(first_ms, 0.95):7.1f} ms   冷启动 {stats['cold_starts']}   丢弃残留帧 {stats['dropped_frames']}")
+
+        client = create_client(port, 2)
+        await client.init()
+        try:
+            start_time = time.perf_counter()
+            audio_bytes = 0
+            for _ in range(turns):
+                async for chunk in client.astream_tts(text_stream(reply)):
+                    audio_bytes += len(chunk)
+            elapsed = time.perf_counter() - start_time
+        finally:
+            await client.close()
+        audio_s = audio_bytes / 2 / SAMPLE_RATE
+        print(f"吞吐: {turns}轮合成音频 {audio_s:.1f} s，耗时 {elapsed:.1f} s，{audio_s / elapsed:.2f}倍实时")
+    finally:
+        await server.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--turns', type=int, default=20)
+    parser.add_argument('--interrupt-ms', type=float, default=200, help='每轮开始播放后多久打断')
+    parser.add_argument('--first-byte-ms', type=float, default=150)
+    parser.add_argument('--rtf', type=float, default=0.3)
+    parser.add_argument('--jitter-ms', type=float, default=20)
+    args = parser.parse_args()
+    script = {"first_byte_ms": args.first_byte_ms, "rtf": args.rtf, "jitter_ms": args.jitter_ms}
+    asyncio.run(run_benchmark(args.turns, args.interrupt_ms, script))
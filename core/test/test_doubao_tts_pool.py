@@ -0,0 +1,111 @@
+import time
+import asyncio
+from core.component.tts.doubao import AsyncDouBaoTTSClient
+from core.test.test_doubao_tts_session_mux import install_fake_websockets, text_stream, FRAMES_PER_CHAR, FRAME_INTERVAL
+
+CONNECT_DELAY = 0.1     # 模拟建立连接与握手的耗时（秒）
+
+async def first_chunk_latency(client: AsyncDouBaoTTSClient, text: str = "你好") -> float:
+    start_time = time.perf_counter()
+    stream = client.astream_tts(text_stream(text))
+    async for _ in stream:
+        elapsed = time.perf_counter() - start_time
+        break
+    async for _ in stream:
+        pass
+    return elapsed
+
+def test_first_audio_does_not_include_handshake(monkeypatch):
+    connections = install_fake_websockets(monkeypatch, connect_delay=CONNECT_DELAY)
+
+    async def run():
+        client = AsyncDouBaoTTSClient({"pool_size": 2})
+        await client.init()
+        try:
+            assert len(connections) == 2
+            assert client.stats()["ready"] == 2
+            for _ in range(3):
+                assert await first_chunk_latency(client) < CONNECT_DELAY
+                # 等待后台补足就绪连接
+                await asyncio.sleep(CONNECT_DELAY * 1.5)
+            assert client.cold_starts == 0
+        finally:
+            await client.close()
+
+    asyncio.run(run())
+
+def test_busy_connections_count_toward_pool_size(monkeypatch):
+    connections = install_fake_websockets(monkeypatch)
+
+    async def run():
+        client = AsyncDouBaoTTSClient({"pool_size": 2})
+        await client.init()
+        try:
+            # 正在使用的连接在会话结束后即可复用：连续多轮回复不建立新连接
+            for _ in range(5):
+                chunks = [chunk async for chunk in client.astream_tts(text_stream("好"))]
+                assert b"".join(chunks).decode() == "好好"
+                await asyncio.sleep(0.01)
+            await client._maintain()
+            assert len(connections) == 2 and client.replaced == 0
+            assert client.stats()["ready"] == 2
+        finally:
+            await client.close()
+
+    asyncio.run(run())
+
+def test_interrupted_connection_drains_before_reuse(monkeypatch):
+    install_fake_websockets(monkeypatch)
+    long_reply = "这是一段会被打断的很长的回复。" * 2
+
+    async def run():
+        client = AsyncDouBaoTTSClient({"pool_size": 1})
+        await client.init()
+        try:
+            stream = client.astream_tts(text_stream(long_reply))
+            await stream.__anext__()
+            await stream.aclose()
+            interrupted = client._pool[0]
+            assert not interrupted.ready
+            # 下一轮在另一条连接上开始
+            chunks = [chunk async for chunk in client.astream_tts(text_stream("好的"))]
+            assert b"".join(chunks).decode() == "好好的的"
+            assert interrupted in client._pool
+            # 服务器返回完剩余音频与EVENT_SessionFinished后，原连接重新就绪
+            await asyncio.sleep(len(long_reply) * FRAMES_PER_CHAR * FRAME_INTERVAL + 0.1)
+            assert interrupted.ready
+            # 巡检时关闭多余的就绪连接
+            await client._maintain()
+            assert client.stats()["ready"] == 1
+            assert len(client._pool) == 1
+        finally:
+            await client.close()
+
+    asyncio.run(run())
+
+def test_dead_and_idle_connections_are_replaced(monkeypatch):
+    connections = install_fake_websockets(monkeypatch)
+
+    async def run():
+        client = AsyncDouBaoTTSClient({"pool_size": 2, "idle_refresh_s": 0.2})
+        await client.init()
+        try:
+            # 服务端断开一条连接：立即移出连接池并在后台重连，无需等待巡检
+            await connections[0].close()
+            await asyncio.sleep(0.01)
+            assert client.stats()["ready"] == 2
+            assert client.disconnects == 1 and client.reconnects == 1
+            assert client.replaced == 1
+
+            # 空闲过久的连接在巡检时替换为新连接
+            await asyncio.sleep(0.25)
+            await client._maintain()
+            assert client.replaced == 3
+            assert client.stats()["ready"] == 2
+            assert len(connections) == 5
+            chunks = [chunk async for chunk in client.astream_tts(text_stream("好"))]
+            assert b"".join(chunks).decode() == "好好"
+        finally:
+            await client.close()
+
+    asyncio.run(run())
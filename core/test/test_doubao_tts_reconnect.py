@@ -0,0 +1,151 @@
+import time
+import asyncio
+import argparse
+import statistics
+import pytest
+from core.component.tts.doubao import AsyncDouBaoTTSClient, TTSConnectionError
+from core.test.mock.tts_server import MockTTSServer
+from core.test.test_doubao_tts_mock_server import text_stream, SAMPLE_RATE
+
+SCRIPT = {"first_byte_ms": 20, "rtf": 0.2, "chunk_ms": 100, "ms_per_char": 100}
+REPLY = ("好的，我来为你查询一下。", "今天深圳晴，最高气温二十八度。")
+
+def create_client(port: int, **config) -> AsyncDouBaoTTSClient:
+    return AsyncDouBaoTTSClient({
+        "base_url": f"ws://127.0.0.1:{port}",
+        "audio_sample_rate": SAMPLE_RATE,
+        "reconnect_backoff_s": 0.02,
+        "reconnect_backoff_max_s": 0.1,
+        **config,
+    })
+
+async def synthesize(client: AsyncDouBaoTTSClient, server: MockTTSServer = None, drop_after: int = 0) -> bytes:
+    """合成REPLY，drop_after > 0时在收到该数量的音频块后由服务端断开所有连接"""
+    chunks = []
+    async for chunk in client.astream_tts(text_stream(*REPLY)):
+        chunks.append(bytes(chunk))
+        if len(chunks) == drop_after:
+            await server.drop_connections()
+    return b"".join(chunks)
+
+def test_session_resumes_on_fresh_connection_without_gaps_or_repeats():
+    async def run():
+        server = MockTTSServer(SCRIPT)
+        port = await server.start()
+        client = create_client(port)
+        try:
+            await client.init()
+            expected = await synthesize(client)
+            # 播放到一半时连接断开：在新连接上恢复，输出的音频与未断开时逐字节一致
+            audio = await synthesize(client, server, drop_after=5)
+            assert audio == expected
+            stats = client.stats()
+            assert stats["resumed_sessions"] == 1 and stats["resume_failures"] == 0
+            assert stats["resume_ms"] > 0
+            # 断开的连接在后台重连（恢复会话时现场建立的连接可能使就绪连接暂时多于pool_size，巡检时关闭）
+            await asyncio.sleep(0.1)
+            assert client.stats()["ready"] >= 2
+            assert client.reconnects == client.disconnects
+        finally:
+            await client.close()
+            await server.stop()
+
+    asyncio.run(run())
+
+def test_resume_resends_only_from_the_unfinished_sentence():
+    async def run():
+        server = MockTTSServer(SCRIPT)
+        port = await server.start()
+        client = create_client(port)
+        try:
+            await client.init()
+            expected = await synthesize(client)
+            # 第一句（12个字，每块100ms共12块）已完整输出，在第二句中途断开
+            sessions = len(server.session_log)
+            audio = await synthesize(client, server, drop_after=15)
+            assert audio == expected
+            # 恢复的会话只重新合成第二句，已输出的第一句不再合成
+            resumed = server.session_log[sessions + 1]
+            assert resumed["texts"] == [REPLY[1]]
+            assert resumed["audio_bytes"] == len(expected) * len(REPLY[1]) // len("".join(REPLY))
+            assert client.stats()["resumed_sessions"] == 1
+        finally:
+            await client.close()
+            await server.stop()
+
+    asyncio.run(run())
+
+def test_resume_gives_up_after_retry_limit():
+    async def run():
+        server = MockTTSServer(SCRIPT)
+        port = await server.start()
+        client = create_client(port, resume_retries=0)
+        try:
+            await client.init()
+            with pytest.raises(TTSConnectionError):
+                await synthesize(client, server, drop_after=2)
+            assert client.resume_failures == 1
+        finally:
+            await client.close()
+            await server.stop()
+
+    asyncio.run(run())
+
+def test_background_reconnect_backs_off_until_server_returns():
+    async def run():
+        server = MockTTSServer(SCRIPT)
+        port = await server.start()
+        client = create_client(port, pool_size=1)
+        try:
+            await client.init()
+            # 服务端重启：停止期间重连失败并退避重试，恢复后连接池自动补足
+            await server.stop()
+            await server.drop_connections()
+            await asyncio.sleep(0.3)
+            assert client.reconnect_failures >= 2
+            assert client.stats()["ready"] == 0
+            await server.start(port=port)
+            await asyncio.sleep(0.3)
+            assert client.stats()["ready"] == 1
+            assert len(await synthesize(client)) > 0
+        finally:
+            await client.close()
+            await server.stop()
+
+    asyncio.run(run())
+
+async def run_benchmark(turns: int, drop_every: int):
+    """每隔drop_every轮在回复中途断开连接，统计恢复耗时（断开到重新输出音频），以及有无断开时回复内最大音频间隔的对比"""
+    server = MockTTSServer({"first_byte_ms": 150, "rtf": 0.3, "jitter_ms": 20})
+    port = await server.start()
+    client = create_client(port)
+    gaps = {"正常": [], "断开": []}
+    try:
+        await client.init()
+        for turn in range(turns):
+            drop = drop_every and turn % drop_every == drop_every - 1
+            last, max_gap, count = None, 0.0, 0
+            async for _ in client.astream_tts(text_stream(*REPLY)):
+                now = time.perf_counter()
+                if last is not None:
+                    max_gap = max(max_gap, now - last)
+                last = now
+                count += 1
+                if drop and count == 5:
+                    await server.drop_connections()
+            gaps["断开" if drop else "正常"].append(max_gap * 1000)
+            await asyncio.sleep(0.2)
+        for name, values in gaps.items():
+            if values:
+                print(f"{name}: {len(values)}轮，回复内最大音频间隔 p50 {statistics.median(values):7.1f} ms   最大 {max(values):7.1f} ms")
+        print(f"连接池统计: {client.stats()}")
+    finally:
+        await client.close()
+        await server.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--turns', type=int, default=20)
+    parser.add_argument('--drop-every', type=int, default=4, help='每隔多少轮在回复中途断开一次连接')
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.turns, args.drop_every))
@@ -0,0 +1,122 @@
+import sys
+import json
+import time
+import types
+import asyncio
+from core.component.tts.doubao import AsyncDouBaoTTSClient
+from core.component.tts.doubao_codec import (
+    FULL_SERVER_RESPONSE, AUDIO_ONLY_RESPONSE, MsgTypeFlagWithEvent, JSON,
+    EVENT_Start_Connection, EVENT_ConnectionStarted, EVENT_StartSession, EVENT_SessionStarted,
+    EVENT_TaskRequest, EVENT_TTSResponse, EVENT_FinishSession, EVENT_SessionFinished, EVENT_FinishConnection
+)
+
+FRAMES_PER_CHAR = 2     # 每个字返回的音频帧数
+FRAME_INTERVAL = 0.005  # 服务器逐帧返回的间隔（秒）
+
+def server_frame(message_type: int, event: int, *fields: bytes) -> bytes:
+    """按双向流式协议构造服务器下行帧：头部、事件号，以及若干带长度前缀的字段"""
+    frame = bytearray([0x11, (message_type << 4) | MsgTypeFlagWithEvent, JSON << 4, 0])
+    frame.extend(event.to_bytes(4, "big"))
+    for field in fields:
+        frame.extend(len(field).to_bytes(4, "big"))
+        frame.extend(field)
+    return bytes(frame)
+
+class FakeWebSocket:
+    """按顺序处理请求的模拟服务器：与真实服务一样，上一个会话的音频全部返回之后才响应新会话"""
+    def __init__(self):
+        self._requests: asyncio.Queue = asyncio.Queue()
+        self._responses: asyncio.Queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._serve())
+
+    async def send(self, data: bytes) -> None:
+        await self._requests.put(bytes(data))
+
+    async def recv(self) -> bytes:
+        item = await self._responses.get()
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    async def close(self) -> None:
+        self._task.cancel()
+        self._responses.put_nowait(ConnectionError("connection closed"))
+
+    async def _serve(self) -> None:
+        while True:
+            data = await self._requests.get()
+            event = int.from_bytes(data[4:8], "big")
+            if event == EVENT_Start_Connection:
+                await self._responses.put(server_frame(FULL_SERVER_RESPONSE, EVENT_ConnectionStarted, b"conn"))
+                continue
+            if event == EVENT_FinishConnection:
+                continue
+            size = int.from_bytes(data[8:12], "big")
+            session_id = data[12:12 + size]
+            if event == EVENT_StartSession:
+                await self._responses.put(server_frame(FULL_SERVER_RESPONSE, EVENT_SessionStarted, session_id, b"{}"))
+            elif event == EVENT_TaskRequest:
+                text = json.loads(data[12 + size + 4:])["req_params"]["text"]
+                for ch in text:
+                    for _ in range(FRAMES_PER_CHAR):
+                        await asyncio.sleep(FRAME_INTERVAL)
+                        await self._responses.put(server_frame(AUDIO_ONLY_RESPONSE, EVENT_TTSResponse, session_id, ch.encode()))
+            elif event == EVENT_FinishSession:
+                await self._responses.put(server_frame(FULL_SERVER_RESPONSE, EVENT_SessionFinished, session_id, b"{}"))
+
+def install_fake_websockets(monkeypatch, connect_delay: float = 0.0) -> list:
+    """用模拟服务器替换websockets.connect，connect_delay模拟建立连接的耗时，返回已建立的连接列表"""
+    connections = []
+
+    async def connect(url, **kwargs):
+        await asyncio.sleep(connect_delay)
+        ws = FakeWebSocket()
+        connections.append(ws)
+        return ws
+    monkeypatch.setitem(sys.modules, "websockets", types.SimpleNamespace(connect=connect))
+    return connections
+
+async def text_stream(*texts: str):
+    for text in texts:
+        yield text
+
+def test_stream_tts_demultiplexes_sessions(monkeypatch):
+    install_fake_websockets(monkeypatch)
+
+    async def run():
+        client = AsyncDouBaoTTSClient({})
+        try:
+            chunks = [chunk async for chunk in client.astream_tts(text_stream("你好，", "世界"))]
+            assert b"".join(chunks).decode() == "".join(ch * FRAMES_PER_CHAR for ch in "你好，世界")
+            assert all(conn.ready for conn in client._pool)
+        finally:
+            await client.close()
+
+    asyncio.run(run())
+
+def test_interrupted_session_does_not_delay_next_session(monkeypatch):
+    install_fake_websockets(monkeypatch)
+    long_reply = "这是一段很长的回复，用户在播放过程中打断了它。" * 2
+
+    async def run():
+        client = AsyncDouBaoTTSClient({})
+        try:
+            # 第一轮：收到两帧后被打断
+            stream = client.astream_tts(text_stream(long_reply))
+            assert await stream.__anext__()
+            assert await stream.__anext__()
+            await stream.aclose()
+
+            # 第二轮：只收到本会话的音频，上一会话的残留帧被丢弃
+            start_time = time.perf_counter()
+            chunks = [chunk async for chunk in client.astream_tts(text_stream("好的"))]
+            elapsed = time.perf_counter() - start_time
+            assert b"".join(chunks).decode() == "好好的的"
+            assert client.dropped_frames > 0
+            # 残留音频在原连接上排空，第二轮不必等待服务器返回完上一会话的音频
+            tail = len(long_reply) * FRAMES_PER_CHAR * FRAME_INTERVAL
+            assert elapsed < tail / 2
+        finally:
+            await client.close()
+
+    asyncio.run(run())
@@ -0,0 +1,112 @@
+import asyncio
+from core.component.audio.filler import FillerPlayer, FILLER_TOOL_CALL, FILLER_SLOW_FIRST_TOKEN
+from core.component.llm.llm_client import tool_call_gate
+from core.component.audio.silence import SilenceStats, FRAME_SILENCE, FRAME_AUDIO, FRAME_FILLER
+
+class FakeTTSClient:
+    speaker = "fake"
+    audio_sample_rate = 24000
+
+    def __init__(self):
+        self.calls = 0
+
+    async def astream_tts(self, text_stream):
+        async for text in text_stream:
+            self.calls += 1
+            yield text.encode()
+
+class FakeAudioHandler:
+    def __init__(self):
+        self.played = []
+        self.stopped = 0
+
+    def play_filler(self, pcm: bytes) -> bool:
+        self.played.append(pcm.decode())
+        return True
+
+    def stop_filler(self, fade: bool = True) -> None:
+        self.stopped += 1
+
+async def fake_llm_stream(first_token_delay: float):
+    await asyncio.sleep(first_token_delay)
+    for text in ["好的，", "今天是晴天。"]:
+        yield text
+
+CONFIG = {
+    "first_token_timeout_ms": 50,
+    "phrases": {FILLER_TOOL_CALL: ["我查一下。"], FILLER_SLOW_FIRST_TOKEN: ["嗯，"]},
+}
+
+def run_turn(first_token_delay: float, tool_call: bool = False, config: dict = CONFIG):
+    async def run():
+        audio_handler = FakeAudioHandler()
+        player = FillerPlayer(audio_handler, config)
+        await player.prepare(FakeTTSClient())
+        player.start_turn()
+        if tool_call:
+            player.on_tool_call("get_current_weather")
+        text = "".join([t async for t in player.watch(fake_llm_stream(first_token_delay))])
+        return text, player.end_turn(), audio_handler.played
+    return asyncio.run(run())
+
+def test_no_filler_when_first_token_is_fast():
+    text, fillers, played = run_turn(0.0)
+    assert text == "好的，今天是晴天。"
+    assert fillers == [] and played == []
+
+def test_filler_when_first_token_is_late():
+    _, fillers, played = run_turn(0.2)
+    assert fillers == [FILLER_SLOW_FIRST_TOKEN]
+    assert played == ["嗯，"]
+
+def test_filler_on_tool_call_and_max_per_turn():
+    _, fillers, played = run_turn(0.2, tool_call=True, config=dict(CONFIG, max_per_turn=1))
+    assert fillers == [FILLER_TOOL_CALL]
+    assert played == ["我查一下。"]
+
+def test_speculative_tool_call_plays_after_acceptance():
+    async def run():
+        audio_handler = FakeAudioHandler()
+        player = FillerPlayer(audio_handler, dict(CONFIG, first_token_timeout_ms=0))
+        await player.prepare(FakeTTSClient())
+        accepted, rejected = asyncio.Event(), asyncio.Event()
+
+        async def speculate(gate: asyncio.Event):
+            tool_call_gate.set(gate)
+            player.on_tool_call("get_current_weather")
+
+        # 推测执行在用户说完话（start_turn）之前就发起了工具调用
+        await asyncio.gather(speculate(accepted), speculate(rejected))
+        player.start_turn()
+        await asyncio.sleep(0.01)
+        assert audio_handler.played == []
+        # 采纳后工具调用开始执行，补位音频随之播放；未被采纳的在本轮结束时丢弃
+        accepted.set()
+        await asyncio.sleep(0.01)
+        assert audio_handler.played == ["我查一下。"]
+        assert player.end_turn() == [FILLER_TOOL_CALL]
+        await asyncio.sleep(0.01)
+        assert not player._deferred
+    asyncio.run(run())
+
+def test_library_disk_cache(tmp_path):
+    async def run():
+        tts_client = FakeTTSClient()
+        for _ in range(2):
+            player = FillerPlayer(FakeAudioHandler(), dict(CONFIG, cache_dir=str(tmp_path)))
+            await player.prepare(tts_client)
+            assert player.library.pick(FILLER_TOOL_CALL) == "我查一下。".encode()
+        return tts_client.calls
+    # 第二次启动直接从磁盘加载，不再合成
+    assert asyncio.run(run()) == 2
+
+def test_silence_stats():
+    stats = SilenceStats(frame_ms=30)
+    frames = [FRAME_SILENCE] * 10 + [FRAME_FILLER] * 5 + [FRAME_SILENCE] * 3 + [FRAME_AUDIO] * 20 + [FRAME_SILENCE] * 4
+    for kind in frames:
+        stats.record(kind)
+    summary = stats.summary()
+    assert summary["first_audio_ms"] == 300
+    assert summary["filler_ms"] == 150
+    # 结尾的静默不计入间隙
+    assert summary["gap_ms"] == summary["max_gap_ms"] == 90
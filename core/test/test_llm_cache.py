@@ -0,0 +1,92 @@
+import asyncio
+from typing import List, Dict
+from core.component.llm import AsyncBaseLLMClient, CachedLLMClient
+from core.component.llm.cache import normalize_query
+
+class FakeLLMClient(AsyncBaseLLMClient):
+    """按固定回复输出的LLM客户端，记录实际请求次数"""
+    model_name = "fake"
+
+    def __init__(self, reply: str = "你好，有什么可以帮你？", use_tool: bool = False):
+        self.reply = reply
+        self.use_tool = use_tool
+        self.calls = 0
+
+    async def astream_chat(self, messages: List[Dict[str, str]], session_id: str, print_stream: bool = False):
+        self.calls += 1
+        if self.use_tool:
+            messages.append({"role": "tool", "name": "get_current_weather", "content": "晴"})
+        for i in range(0, len(self.reply), 2):
+            yield self.reply[i:i + 2]
+        messages.append({"role": "assistant", "content": self.reply})
+
+    async def acomplete(self, messages: List[Dict[str, str]]) -> str:
+        return ""
+
+def chat(client: CachedLLMClient, text: str) -> str:
+    async def run():
+        messages = [{"role": "system", "content": "你是语音助手"}, {"role": "user", "content": text}]
+        reply = "".join([t async for t in client.astream_chat(messages, "session")])
+        assert messages[-1] == {"role": "assistant", "content": reply}
+        return reply
+    return asyncio.run(run())
+
+def test_normalize_query():
+    assert normalize_query("你好呀！") == normalize_query("你好") == "你好"
+    assert normalize_query("ＨＥＬＬＯ， World") == "helloworld"
+
+def test_repeated_query_hits_cache():
+    inner = FakeLLMClient()
+    client = CachedLLMClient(inner)
+    assert chat(client, "你好！") == chat(client, "你好啊") == inner.reply
+    assert inner.calls == 1
+    stats = client.cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+def test_follow_up_after_different_context_does_not_hit():
+    inner = FakeLLMClient()
+    client = CachedLLMClient(inner)
+
+    def follow_up(question: str, answer: str) -> None:
+        messages = [
+            {"role": "system", "content": "你是语音助手"},
+            {"role": "user", "content": question},
+            {"role": "assistant", "content": answer},
+            {"role": "user", "content": "为什么"},
+        ]
+        async def run():
+            return "".join([t async for t in client.astream_chat(messages, "session")])
+        assert asyncio.run(run()) == inner.reply
+
+    follow_up("今天适合跑步吗", "不太适合。")
+    follow_up("深圳房价高吗", "挺高的。")
+    # 同样的追问在不同的上文下各自请求LLM，上文相同时才命中
+    assert inner.calls == 2
+    follow_up("今天适合跑步吗", "不太适合。")
+    assert inner.calls == 2 and client.cache.stats()["hits"] == 1
+
+def test_tool_calls_and_time_queries_are_not_cached():
+    inner = FakeLLMClient(use_tool=True)
+    client = CachedLLMClient(inner)
+    chat(client, "今天深圳天气怎么样")
+    chat(client, "今天深圳天气怎么样")
+    assert inner.calls == 2
+
+    inner = FakeLLMClient()
+    client = CachedLLMClient(inner)
+    chat(client, "现在几点了")
+    chat(client, "现在几点了")
+    assert inner.calls == 2
+
+def test_lru_and_ttl():
+    inner = FakeLLMClient()
+    client = CachedLLMClient(inner, {"max_entries": 1})
+    chat(client, "你好")
+    chat(client, "谢谢")
+    chat(client, "你好")
+    assert inner.calls == 3
+
+    client = CachedLLMClient(inner, {"ttl": 0})
+    chat(client, "你好")
+    chat(client, "你好")
+    assert inner.calls == 5
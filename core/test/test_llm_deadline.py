@@ -0,0 +1,99 @@
+import asyncio
+from typing import List, Dict
+from core.component.llm import AsyncBaseLLMClient, DeadlineLLMClient
+from core.component.llm.deadline import DEFAULT_APOLOGY
+
+class FakeLLMClient(AsyncBaseLLMClient):
+    """模拟LLM后端：按脚本输出，每一项为(等待秒数, 文本)；文本为None时模拟一次工具调用。非流式补全耗时complete_delay秒"""
+    def __init__(self, script, complete_delay: float = 0.0):
+        self.script = script
+        self.complete_delay = complete_delay
+        self.calls = 0
+        self.cancelled = 0
+
+    async def astream_chat(self, messages: List[Dict[str, str]], session_id: str, print_stream: bool = False):
+        self.calls += 1
+        reply = ""
+        try:
+            for delay, text in self.script:
+                await asyncio.sleep(delay)
+                if text is None:
+                    self._notify_tool_call("get_current_weather")
+                    continue
+                reply += text
+                yield text
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            messages.append({"role": "assistant", "content": reply})
+
+    async def acomplete(self, messages: List[Dict[str, str]]) -> str:
+        await asyncio.sleep(self.complete_delay)
+        return "摘要"
+
+CONFIG = {"first_token_ms": 100, "inter_token_ms": 100, "tool_grace_ms": 300}
+
+def chat(client: DeadlineLLMClient):
+    async def run():
+        messages = [{"role": "user", "content": "你好"}]
+        reply = "".join([t async for t in client.astream_chat(messages, "session")])
+        return reply, messages
+    return asyncio.run(run())
+
+def test_fast_stream_passes_through():
+    client = DeadlineLLMClient(FakeLLMClient([(0.01, "你好，"), (0.01, "我在。")]), CONFIG)
+    reply, messages = chat(client)
+    assert reply == "你好，我在。"
+    assert messages[-1]["content"] == reply
+    assert client.stats()["hits"] == {"first_token": 0, "inter_token": 0}
+
+def test_first_token_deadline_falls_back():
+    primary = FakeLLMClient([(1.0, "太慢了")])
+    fallback = FakeLLMClient([(0.01, "来自备用后端。")])
+    client = DeadlineLLMClient(primary, CONFIG, fallback)
+    reply, messages = chat(client)
+    assert reply == "来自备用后端。"
+    assert primary.cancelled == 1
+    # 被取消的后端追加的不完整消息不会进入对话记录
+    assert len(messages) == 2 and messages[-1]["content"] == reply
+    assert client.stats() == {"hits": {"first_token": 1, "inter_token": 0}, "fallbacks": 1, "apologies": 0}
+
+def test_inter_token_stall_ends_with_apology():
+    client = DeadlineLLMClient(FakeLLMClient([(0.01, "好的，"), (1.0, "卡住了")]), CONFIG, FakeLLMClient([(0.01, "不应使用")]))
+    reply, messages = chat(client)
+    # 已经输出了部分回复时不换后端，直接致歉
+    assert reply == "好的，" + DEFAULT_APOLOGY
+    assert messages[-1]["content"] == reply
+    assert client.stats()["hits"]["inter_token"] == 1 and client.fallbacks == 0
+
+def test_tool_call_extends_deadline():
+    notified = []
+    client = DeadlineLLMClient(FakeLLMClient([(0.01, None), (0.2, "深圳今天晴。")]), CONFIG)
+    client.set_tool_call_listener(notified.append)
+    reply, _ = chat(client)
+    assert reply == "深圳今天晴。"
+    assert notified == ["get_current_weather"]
+
+def test_timeout_after_tool_call_does_not_fall_back():
+    notified = []
+    fallback = FakeLLMClient([(0.01, None), (0.01, "来自备用后端。")])
+    client = DeadlineLLMClient(FakeLLMClient([(0.01, None), (1.0, "太慢了")]), CONFIG, fallback)
+    client.set_tool_call_listener(notified.append)
+    reply, messages = chat(client)
+    # 已经执行了工具，换后端会再次执行，直接致歉
+    assert reply == DEFAULT_APOLOGY
+    assert fallback.calls == 0 and notified == ["get_current_weather"]
+    assert messages[-1]["content"] == DEFAULT_APOLOGY
+    assert client.stats() == {"hits": {"first_token": 1, "inter_token": 0}, "fallbacks": 0, "apologies": 1}
+
+def test_complete_uses_its_own_timeout():
+    # 非流式补全需要等待整段输出，不受首token与token间隔截止时间的限制
+    client = DeadlineLLMClient(FakeLLMClient([], complete_delay=0.3), CONFIG)
+    assert asyncio.run(client.acomplete([{"role": "user", "content": "总结一下"}])) == "摘要"
+    client = DeadlineLLMClient(FakeLLMClient([], complete_delay=0.3), dict(CONFIG, complete_ms=100))
+    try:
+        asyncio.run(client.acomplete([{"role": "user", "content": "总结一下"}]))
+        assert False, "应当超时"
+    except asyncio.TimeoutError:
+        pass
@@ -0,0 +1,49 @@
+import time
+import asyncio
+import argparse
+import statistics
+from core.utils.config import ConfigLoader
+from core.component.factory import ComponentFactory
+
+async def measure_first_token(llm_client, prompt: str) -> float:
+    """返回一次请求的首token延迟，单位为毫秒"""
+    messages = [{"role": "user", "content": prompt}]
+    start_time = time.perf_counter()
+    first_token_ms = None
+    async for _ in llm_client.astream_chat(messages, session_id="bench"):
+        if first_token_ms is None:
+            first_token_ms = (time.perf_counter() - start_time) * 1000
+    return first_token_ms
+
+async def run_first_token_benchmark(config: ConfigLoader, rounds: int = 5):
+    """对比冷启动（无预热）与预热后的首token延迟"""
+    llm_name = config.get_cls_name("LLM")
+    llm_config = dict(config.get_cls_config("LLM"))
+    prompt = "你好"
+
+    # 冷启动：不预热，首个请求需要建立连接（Ollama还需加载模型）
+    llm_config["warmup"] = False
+    client = ComponentFactory.create("LLM", llm_name, llm_config)
+    cold_ms = await measure_first_token(client, prompt)
+    # 连接复用：同一客户端的后续请求
+    reuse_ms = [await measure_first_token(client, prompt) for _ in range(rounds)]
+    await client.close()
+
+    # 预热：init()中完成握手与模型加载
+    llm_config["warmup"] = True
+    client = ComponentFactory.create("LLM", llm_name, llm_config)
+    await client.init()
+    warm_ms = await measure_first_token(client, prompt)
+    await client.close()
+
+    print(f"LLM: {llm_name}")
+    print(f"冷启动首token延迟:   {cold_ms:.1f} ms")
+    print(f"预热后首token延迟:   {warm_ms:.1f} ms")
+    print(f"连接复用首token延迟: 中位数 {statistics.median(reuse_ms):.1f} ms, 最大 {max(reuse_ms):.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--config', type=str, default='config.yml', help='Path to config file')
+    parser.add_argument('--rounds', type=int, default=5, help='连接复用的测试轮数')
+    args = parser.parse_args()
+    asyncio.run(run_first_token_benchmark(ConfigLoader(args.config), args.rounds))
@@ -0,0 +1,156 @@
+import time
+import random
+import asyncio
+import argparse
+from typing import List, Dict
+from core.component.llm import AsyncBaseLLMClient, HedgedLLMClient
+
+class FakeLLMClient(AsyncBaseLLMClient):
+    """模拟LLM后端：首token延迟可以是固定值或按调用次序变化的函数，可选直接报错
+
+    tool_delay不为None时，先执行一次耗时tool_delay秒的工具调用（记入tool_runs），再输出回复
+    """
+    def __init__(self, name: str, first_token_delay=0.0, fail: bool = False, tool_delay=None, tool_runs=None, init_fail: bool = False):
+        self.name = name
+        self.first_token_delay = first_token_delay
+        self.fail = fail
+        self.tool_delay = tool_delay
+        self.tool_runs = tool_runs if tool_runs is not None else []
+        self.init_fail = init_fail
+        self.calls = 0
+        self.cancelled = 0
+
+    async def astream_chat(self, messages: List[Dict[str, str]], session_id: str, print_stream: bool = False):
+        self.calls += 1
+        delay = self.first_token_delay(self.calls) if callable(self.first_token_delay) else self.first_token_delay
+        try:
+            await asyncio.sleep(delay)
+            if self.fail:
+                raise ConnectionError(f"{self.name} unavailable")
+            if self.tool_delay is not None:
+                self._notify_tool_call("get_current_weather")
+                self.tool_runs.append(self.name)
+                await asyncio.sleep(self.tool_delay)
+            reply = f"来自{self.name}的回复。"
+            for ch in reply:
+                yield ch
+            messages.append({"role": "assistant", "content": reply})
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+    async def acomplete(self, messages: List[Dict[str, str]]) -> str:
+        return ""
+
+    async def init(self) -> None:
+        if self.init_fail:
+            raise ConnectionError(f"{self.name} unavailable")
+
+def chat(client: HedgedLLMClient, messages: List[Dict[str, str]]) -> str:
+    async def run():
+        return "".join([t async for t in client.astream_chat(messages, "session")])
+    return asyncio.run(run())
+
+def test_fast_primary_is_not_hedged():
+    primary, secondary = FakeLLMClient("primary", 0.01), FakeLLMClient("secondary", 0.01)
+    client = HedgedLLMClient(primary, secondary, {"hedge_delay_ms": 100})
+    messages = [{"role": "user", "content": "你好"}]
+    assert chat(client, messages) == "来自primary的回复。"
+    assert secondary.calls == 0
+    assert messages[-1]["content"] == "来自primary的回复。"
+
+def test_slow_primary_loses_and_is_cancelled():
+    primary, secondary = FakeLLMClient("primary", 1.0), FakeLLMClient("secondary", 0.01)
+    client = HedgedLLMClient(primary, secondary, {"hedge_delay_ms": 50})
+    messages = [{"role": "user", "content": "你好"}]
+    start_time = time.perf_counter()
+    assert chat(client, messages) == "来自secondary的回复。"
+    assert time.perf_counter() - start_time < 0.5
+    assert primary.cancelled == 1
+    # 只写回胜出者追加的消息
+    assert len(messages) == 2 and messages[-1]["content"] == "来自secondary的回复。"
+    assert client.stats()["wins"] == {"primary": 0, "secondary": 1}
+
+def test_primary_error_fails_over_immediately():
+    primary, secondary = FakeLLMClient("primary", 0.0, fail=True), FakeLLMClient("secondary", 0.01)
+    client = HedgedLLMClient(primary, secondary, {"hedge_delay_ms": 1000})
+    start_time = time.perf_counter()
+    assert chat(client, [{"role": "user", "content": "你好"}]) == "来自secondary的回复。"
+    assert time.perf_counter() - start_time < 0.5
+
+def test_both_backends_fail():
+    client = HedgedLLMClient(FakeLLMClient("primary", fail=True), FakeLLMClient("secondary", fail=True))
+    try:
+        chat(client, [{"role": "user", "content": "你好"}])
+        assert False, "应当抛出异常"
+    except ConnectionError:
+        pass
+
+def test_slow_tool_runs_once_and_is_not_hedged():
+    tool_runs, notified = [], []
+    # 主后端很快开始执行工具，工具耗时远超对冲延迟：不再请求备用后端
+    primary = FakeLLMClient("primary", 0.01, tool_delay=0.3, tool_runs=tool_runs)
+    secondary = FakeLLMClient("secondary", 0.01, tool_delay=0.3, tool_runs=tool_runs)
+    client = HedgedLLMClient(primary, secondary, {"hedge_delay_ms": 50})
+    client.set_tool_call_listener(notified.append)
+    assert chat(client, [{"role": "user", "content": "深圳天气怎么样"}]) == "来自primary的回复。"
+    assert tool_runs == ["primary"] and notified == ["get_current_weather"]
+    assert secondary.calls == 0 and client.stats()["hedges"] == 0
+
+    # 对冲后备用后端先开始执行工具：选定备用后端，主后端被取消，没有机会再执行同一个工具
+    tool_runs.clear()
+    primary = FakeLLMClient("primary", 0.2, tool_delay=0.3, tool_runs=tool_runs)
+    secondary = FakeLLMClient("secondary", 0.01, tool_delay=0.3, tool_runs=tool_runs)
+    client = HedgedLLMClient(primary, secondary, {"hedge_delay_ms": 50})
+    messages = [{"role": "user", "content": "深圳天气怎么样"}]
+    assert chat(client, messages) == "来自secondary的回复。"
+    assert tool_runs == ["secondary"] and primary.cancelled == 1
+    assert len(messages) == 2 and client.stats()["wins"] == {"primary": 0, "secondary": 1}
+
+def test_secondary_init_failure_does_not_abort_startup():
+    primary, secondary = FakeLLMClient("primary", 0.01), FakeLLMClient("secondary", 0.01, init_fail=True)
+    client = HedgedLLMClient(primary, secondary)
+    asyncio.run(client.init())
+    assert chat(client, [{"role": "user", "content": "你好"}]) == "来自primary的回复。"
+
+async def run_benchmark(requests: int, hedge_delay_ms: float, stall_rate: float, seed: int):
+    """对比对冲前后的首token延迟分布：主后端正常约150 ms，以stall_rate的概率卡顿2 s；备用后端约300 ms"""
+    rng = random.Random(seed)
+    stalls = [rng.random() < stall_rate for _ in range(requests)]
+
+    def primary_delay(i: int) -> float:
+        return 2.0 if stalls[(i - 1) % requests] else rng.uniform(0.12, 0.18)
+
+    def secondary_delay(i: int) -> float:
+        return rng.uniform(0.25, 0.35)
+
+    async def first_token_ms(client) -> float:
+        start_time = time.perf_counter()
+        stream = client.astream_chat([{"role": "user", "content": "你好"}], "session")
+        await stream.__anext__()
+        elapsed = (time.perf_counter() - start_time) * 1000
+        await stream.aclose()
+        return elapsed
+
+    def percentile(values: List[float], p: float) -> float:
+        values = sorted(values)
+        return values[min(len(values) - 1, int(len(values) * p))]
+
+    results = {}
+    direct = FakeLLMClient("primary", primary_delay)
+    results["single"] = [await first_token_ms(direct) for _ in range(requests)]
+    hedged = HedgedLLMClient(FakeLLMClient("primary", primary_delay), FakeLLMClient("secondary", secondary_delay), {"hedge_delay_ms": hedge_delay_ms})
+    results["hedged"] = [await first_token_ms(hedged) for _ in range(requests)]
+
+    for name, values in results.items():
+        print(f"{name:<8} 首token延迟 p50: {percentile(values, 0.5):7.1f} ms   p99: {percentile(values, 0.99):7.1f} ms")
+    print(f"对冲统计: {hedged.stats()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=100, help='模拟的请求数')
+    parser.add_argument('--hedge-delay-ms', type=float, default=250, help='对冲延迟')
+    parser.add_argument('--stall-rate', type=float, default=0.05, help='主后端卡顿的概率')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.requests, args.hedge_delay_ms, args.stall_rate, args.seed))
@@ -0,0 +1,186 @@
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from typing import List, Dict, Tuple
+from core.test.mock.llm_server import MockLLMServer
+from core.component.llm import AsyncOllamaClient, AsyncOpenAIClient
+from core.component.llm.llm_client import _is_json_complete
+from core.component.segmenter import LatencyAwareSegmenter
+
+SCRIPT = {
+    "ttft_ms": 200,
+    "inter_token_ms": 20,
+    "chunk_chars": 2,
+    "rules": [
+        {
+            "match": "天气",
+            "tool_call": {"name": "get_current_weather", "arguments": {"city": "深圳"}},
+            "reply": "深圳今天晴，气温二十六度。适合出门散步！",
+        },
+        {"match": "你好", "reply": "你好呀，我是你的语音助手。有什么可以帮你的吗？"},
+        {
+            "match": "对比",
+            "tool_calls": [
+                {"name": "get_current_weather", "arguments": {"city": "深圳"}},
+                {"name": "get_current_weather", "arguments": {"city": "北京"}},
+            ],
+            "reply": "深圳晴，北京多云。",
+        },
+    ],
+}
+
+WEATHER_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "get_current_weather",
+        "description": "获取指定城市的当前天气",
+        "parameters": {"type": "object", "properties": {"city": {"type": "string"}}, "required": ["city"]},
+    },
+}
+
+class FakeToolHandler:
+    """不访问网络的工具处理器，记录收到的工具调用"""
+    def __init__(self):
+        self.calls = []
+        self.started_at = []
+
+    def get_tool_definitions(self):
+        return [WEATHER_TOOL]
+
+    async def aexecute_tool(self, tool_name: str, tool_args) -> str:
+        self.calls.append((tool_name, tool_args))
+        self.started_at.append(time.perf_counter())
+        return "深圳：晴，26℃"
+
+def create_clients(port: int) -> Dict[str, object]:
+    return {
+        "openai": AsyncOpenAIClient({"base_url": f"http://127.0.0.1:{port}/v1", "api_key": "mock", "model_name": "mock", "warmup": False}),
+        "ollama": AsyncOllamaClient({"base_url": f"http://127.0.0.1:{port}", "model_name": "mock", "warmup": False}),
+    }
+
+async def run_turn(client, text: str, segmenter=None) -> Tuple[List[str], List[Dict], float, float]:
+    """执行一轮对话，返回 (文本段, 消息列表, 首段延迟ms, 总耗时ms)"""
+    messages = [{"role": "system", "content": "你是语音助手"}, {"role": "user", "content": text}]
+    segmenter = segmenter or LatencyAwareSegmenter()
+    start_time = time.perf_counter()
+    first_ms = None
+    segments = []
+    async for segment in segmenter.asegment(client.astream_chat(messages, "offline")):
+        if first_ms is None:
+            first_ms = (time.perf_counter() - start_time) * 1000
+        segments.append(segment)
+    return segments, messages, first_ms, (time.perf_counter() - start_time) * 1000
+
+def with_server(test):
+    """启动模拟服务器，对两种客户端分别执行test(client, server)"""
+    async def run():
+        server = MockLLMServer(SCRIPT)
+        port = await server.start()
+        try:
+            for client in create_clients(port).values():
+                try:
+                    await test(client, server)
+                finally:
+                    await client.close()
+        finally:
+            await server.stop()
+    asyncio.run(run())
+
+def test_streaming_reply_matches_script():
+    async def test(client, server):
+        segments, messages, first_ms, _ = await run_turn(client, "你好")
+        assert "".join(segments) == SCRIPT["rules"][1]["reply"]
+        assert messages[-1] == {"role": "assistant", "content": SCRIPT["rules"][1]["reply"]}
+        assert first_ms >= SCRIPT["ttft_ms"]
+        # 每次请求都上报prompt用量
+        assert client.last_prompt_usage is not None
+    with_server(test)
+
+def test_tool_call_round_trip():
+    async def test(client, server):
+        handler = FakeToolHandler()
+        client.config_tool_call(handler)
+        segments, messages, _, _ = await run_turn(client, "今天天气怎么样")
+        assert handler.calls and handler.calls[0][0] == "get_current_weather"
+        assert any(message.get("role") == "tool" for message in messages)
+        assert "".join(segments) == SCRIPT["rules"][0]["reply"]
+    with_server(test)
+
+def test_streamed_tool_calls_start_before_stream_ends():
+    async def run():
+        server = MockLLMServer(SCRIPT)
+        port = await server.start()
+        client = create_clients(port)["openai"]
+        try:
+            handler = FakeToolHandler()
+            client.config_tool_call(handler)
+            segments, messages, _, _ = await run_turn(client, "对比一下深圳和北京")
+            assert [json.loads(args)["city"] for _, args in handler.calls] == ["深圳", "北京"]
+            # 第一个工具调用的参数完整后立即执行，此时第二个工具调用的参数仍在流式下发
+            assert handler.started_at[0] < server.request_log[0]["finished_at"]
+            tool_messages = [message for message in messages if message.get("role") == "tool"]
+            assert len(tool_messages) == 2
+            assert [message["tool_call_id"] for message in tool_messages] == [call["id"] for call in messages[2]["tool_calls"]]
+            assert "".join(segments) == SCRIPT["rules"][2]["reply"]
+        finally:
+            await client.close()
+            await server.stop()
+    asyncio.run(run())
+
+def test_json_completeness_check():
+    assert not _is_json_complete("")
+    assert not _is_json_complete('{"city": "深')
+    # 嵌套对象：内层的右括号不代表参数结束
+    assert not _is_json_complete('{"location": {"city": "深圳"}')
+    assert _is_json_complete('{"location": {"city": "深圳"}}')
+    # 字符串中的右括号与转义的引号
+    assert not _is_json_complete('{"text": "}')
+    assert not _is_json_complete('{"text": "a\\"}')
+    assert _is_json_complete('{"text": "a\\"}"}')
+    assert _is_json_complete(' {"city": "深圳"} \n')
+
+def test_warmup_failure_does_not_abort_startup():
+    async def run():
+        # 服务尚未启动：预热失败只记录日志，init()正常返回，之后的请求仍按冷启动处理
+        server = MockLLMServer(SCRIPT)
+        port = await server.start()
+        await server.stop()
+        clients = [
+            AsyncOpenAIClient({"base_url": f"http://127.0.0.1:{port}/v1", "api_key": "mock", "model_name": "mock", "timeout": 1}),
+            AsyncOllamaClient({"base_url": f"http://127.0.0.1:{port}", "model_name": "mock"}),
+        ]
+        for client in clients:
+            try:
+                await client.init()
+                assert client._warmed_up is False
+            finally:
+                await client.close()
+    asyncio.run(run())
+
+async def run_benchmark(turns: int, ttft_ms: float, inter_token_ms: float):
+    """离线测量客户端在流式输出、文本分段环节引入的额外延迟（相对脚本设定的首token延迟）"""
+    script = dict(SCRIPT, ttft_ms=ttft_ms, inter_token_ms=inter_token_ms)
+    server = MockLLMServer(script)
+    port = await server.start()
+    try:
+        for name, client in create_clients(port).items():
+            first_ms, total_ms = [], []
+            for i in range(turns):
+                _, _, first, total = await run_turn(client, "你好")
+                first_ms.append(first)
+                total_ms.append(total)
+            await client.close()
+            print(f"{name:<8} 首段延迟中位数: {statistics.median(first_ms):7.1f} ms（脚本首token {ttft_ms:.0f} ms，"
+                  f"额外 {statistics.median(first_ms) - ttft_ms:5.1f} ms）   整轮耗时中位数: {statistics.median(total_ms):7.1f} ms")
+    finally:
+        await server.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--turns', type=int, default=20, help='每种客户端的对话轮数')
+    parser.add_argument('--ttft-ms', type=float, default=200, help='模拟的首token延迟')
+    parser.add_argument('--inter-token-ms', type=float, default=20, help='模拟的token间隔')
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.turns, args.ttft_ms, args.inter_token_ms))
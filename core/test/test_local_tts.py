@@ -0,0 +1,158 @@
+import time
+import yaml
+import asyncio
+import argparse
+import statistics
+import numpy as np
+import pytest
+from core.component.tts.sherpa import AsyncSherpaOnnxTTSClient
+from core.component.tts.failover import FailoverTTSClient
+
+class FakeAudio:
+    def __init__(self, samples):
+        self.samples = samples
+
+class FakeEngine:
+    """按句（以句号切分）合成，每句耗时sentence_delay秒，每个字0.1秒音频；回调返回0时停止"""
+    def __init__(self, sample_rate: int = 24000, sentence_delay: float = 0.02):
+        self.sample_rate = sample_rate
+        self.sentence_delay = sentence_delay
+        self.sentences = 0
+
+    def generate(self, text, sid=0, speed=1.0, callback=None):
+        samples = []
+        for sentence in [s for s in text.split("。") if s]:
+            time.sleep(self.sentence_delay)
+            self.sentences += 1
+            audio = np.full(len(sentence) * self.sample_rate // 10, 0.5, dtype=np.float32)
+            samples.append(audio)
+            if callback is not None and callback(audio, 0.0) == 0:
+                break
+        return FakeAudio(np.concatenate(samples) if samples else np.zeros(0, dtype=np.float32))
+
+class FakeCloudTTS:
+    """模拟云端TTS：mode为ok/error/hang/broken（输出一块后断开）"""
+    audio_format = "pcm"
+    audio_sample_rate = 24000
+
+    def __init__(self, mode: str = "ok"):
+        self.mode = mode
+        self.requests = []
+
+    async def astream_tts(self, text_stream):
+        async for text in text_stream:
+            self.requests.append(text)
+            if self.mode == "error":
+                raise ConnectionError("network unreachable")
+            if self.mode == "hang":
+                await asyncio.sleep(10)
+            yield b"cloud"
+            if self.mode == "broken":
+                raise ConnectionError("connection lost")
+
+async def text_stream(*texts: str):
+    for text in texts:
+        yield text
+
+def test_local_tts_streams_each_sentence_as_it_is_synthesized():
+    async def run():
+        engine = FakeEngine(sample_rate=16000, sentence_delay=0.05)
+        client = AsyncSherpaOnnxTTSClient({"audio_sample_rate": 24000, "chunk_ms": 100}, engine=engine)
+        start_time = time.perf_counter()
+        arrivals = []
+        chunks = []
+        async for chunk in client.astream_tts(text_stream("你好。今天天气不错。")):
+            arrivals.append(time.perf_counter() - start_time)
+            chunks.append(chunk)
+        # 第一句合成完即输出，不等待整段合成结束
+        assert arrivals[0] < 0.09
+        # 16kHz重采样为24kHz，共8个字，每字0.1秒
+        assert len(b"".join(chunks)) == 8 * 2400 * 2
+        assert max(len(chunk) for chunk in chunks) == 4800
+        stats = client.stats()
+        assert stats["segments"] == 1 and stats["audio_seconds"] == pytest.approx(0.8)
+        assert stats["rtf"] > 0
+        await client.close()
+
+    asyncio.run(run())
+
+def test_local_tts_stops_after_interruption():
+    async def run():
+        engine = FakeEngine(sentence_delay=0.05)
+        client = AsyncSherpaOnnxTTSClient({}, engine=engine)
+        stream = client.astream_tts(text_stream("一。二。三。四。五。"))
+        await stream.__anext__()
+        await stream.aclose()
+        await asyncio.sleep(0.2)
+        # 打断后在下一句的回调处停止，不会合成完全部五句
+        assert engine.sentences == 2
+        await client.close()
+
+    asyncio.run(run())
+
+def test_failover_uses_local_tts_and_cools_down():
+    async def run():
+        local = AsyncSherpaOnnxTTSClient({}, engine=FakeEngine())
+        cloud = FakeCloudTTS("error")
+        client = FailoverTTSClient(cloud, local, {"cooldown_s": 60})
+        audio = [chunk async for chunk in client.astream_tts(text_stream("你好。", "再见。"))]
+        assert len(b"".join(audio)) == 4 * 2400 * 2
+        # 第一个分段失败后，冷却期内的分段直接使用本地TTS
+        assert cloud.requests == ["你好。"]
+        assert client.stats() == {"segments": 2, "primary_failures": 1, "timeouts": 0, "fallback_segments": 2}
+
+    asyncio.run(run())
+
+def test_failover_on_first_audio_timeout_and_no_replay_after_partial_audio():
+    async def run():
+        local = AsyncSherpaOnnxTTSClient({}, engine=FakeEngine())
+        client = FailoverTTSClient(FakeCloudTTS("hang"), local, {"first_audio_timeout_ms": 50, "cooldown_s": 0})
+        start_time = time.perf_counter()
+        audio = b"".join([chunk async for chunk in client.astream_tts(text_stream("你好。"))])
+        assert time.perf_counter() - start_time < 0.5
+        assert len(audio) == 2 * 2400 * 2 and client.timeouts == 1
+
+        # 已经输出部分音频后断开：不重复合成该分段
+        client = FailoverTTSClient(FakeCloudTTS("broken"), local, {"cooldown_s": 0})
+        audio = [chunk async for chunk in client.astream_tts(text_stream("你好。"))]
+        assert audio == [b"cloud"]
+        assert client.primary_failures == 1 and client.fallback_segments == 0
+
+    asyncio.run(run())
+
+def test_failover_requires_matching_audio_format():
+    local = AsyncSherpaOnnxTTSClient({"audio_sample_rate": 16000}, engine=FakeEngine())
+    with pytest.raises(ValueError):
+        FailoverTTSClient(FakeCloudTTS(), local)
+
+async def run_benchmark(config_path: str, texts, repeat: int):
+    """加载config.yml中的本地TTS模型（需要sherpa-onnx与模型文件），测量CPU上的实时率与首包延迟"""
+    with open(config_path, "r", encoding="utf-8") as f:
+        tts_config = yaml.safe_load(f)["TTS"]["SherpaOnnxTTS"]
+    start_time = time.perf_counter()
+    client = AsyncSherpaOnnxTTSClient(tts_config)
+    print(f"模型加载耗时: {time.perf_counter() - start_time:.2f} s，模型采样率: {client.engine.sample_rate}，"
+          f"推理线程数: {tts_config.get('num_threads')}")
+    try:
+        for text in texts:
+            first_ms, rtf = [], []
+            for _ in range(repeat):
+                synthesis_seconds, audio_seconds = client.synthesis_seconds, client.audio_seconds
+                start_time = time.perf_counter()
+                first = None
+                async for _ in client.astream_tts(text_stream(text)):
+                    if first is None:
+                        first = (time.perf_counter() - start_time) * 1000
+                first_ms.append(first or 0.0)
+                rtf.append((client.synthesis_seconds - synthesis_seconds) / max(client.audio_seconds - audio_seconds, 1e-9))
+            print(f"{len(text):3d}字  首包延迟: {statistics.median(first_ms):7.1f} ms（中位数）   实时率: {statistics.median(rtf):.3f}   {text}")
+    finally:
+        await client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--config', type=str, default='./config.yml')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    texts = ["好的。", "今天深圳天气晴，最高气温二十八度。", "好的，我来为你查询一下今天深圳的天气情况。今天晴，最高气温二十八度，适合出门散步。"]
+    asyncio.run(run_benchmark(args.config, texts, args.repeat))
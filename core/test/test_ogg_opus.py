@@ -0,0 +1,124 @@
+import time
+import yaml
+import struct
+import asyncio
+import argparse
+from typing import List
+import pytest
+from core.component.audio.ogg_opus import OggOpusDecoder, OggPacketReader, decode_audio_stream
+
+class FakeOpusDecoder:
+    """把包内容原样作为PCM返回，用于在没有libopus的环境中验证解复用与pre-skip"""
+    def __init__(self, sample_rate: int, channels: int):
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+    def decode(self, packet: bytes, frame_size: int) -> bytes:
+        return bytes(packet)
+
+def opus_head(pre_skip: int = 0, channels: int = 1) -> bytes:
+    return b"OpusHead" + struct.pack("<BBHIhB", 1, channels, pre_skip, 24000, 0, 0)
+
+def ogg_page(segments: List[bytes], continued: bool = False, open_end: bool = False, sequence: int = 0) -> bytes:
+    """构造一个Ogg页。open_end时最后一个片段的长度须为255的整数倍，表示该包在下一页继续"""
+    lacing = bytearray()
+    for i, data in enumerate(segments):
+        lacing.extend([255] * (len(data) // 255))
+        if not (open_end and i == len(segments) - 1):
+            lacing.append(len(data) % 255)
+    header = struct.pack("<4sBBqIIIB", b"OggS", 0, 0x01 if continued else 0, 0, 1, sequence, 0, len(lacing))
+    return header + bytes(lacing) + b"".join(segments)
+
+def build_stream(pre_skip: int = 0) -> bytes:
+    long_packet = bytes(range(256)) * 3     # 768字节，跨两页
+    return b"".join([
+        ogg_page([opus_head(pre_skip)]),
+        ogg_page([b"OpusTags" + b"\x00" * 8], sequence=1),
+        ogg_page([b"\x01\x02" * 10, long_packet[:510]], open_end=True, sequence=2),
+        ogg_page([long_packet[510:], b"\x03\x04"], continued=True, sequence=3),
+    ])
+
+def test_packets_are_reassembled_across_pages_and_chunks():
+    stream = build_stream()
+    whole = OggPacketReader().feed(stream)
+    assert [len(packet) for packet in whole] == [19, 16, 20, 768, 2]
+
+    reader = OggPacketReader()
+    packets = []
+    for i in range(0, len(stream), 7):
+        packets.extend(reader.feed(stream[i:i + 7]))
+    assert packets == whole
+    assert reader.pages == 4
+
+def test_reader_resyncs_after_garbage():
+    reader = OggPacketReader()
+    packets = reader.feed(b"garbage" + ogg_page([b"abc"]))
+    assert packets == [b"abc"]
+
+def test_decoder_applies_pre_skip_and_resets_on_new_stream():
+    # pre-skip为96个48kHz样本，即24kHz下48个样本（96字节）
+    decoder = OggOpusDecoder(24000, decoder_factory=FakeOpusDecoder)
+    stream = build_stream(pre_skip=96)
+    pcm = b"".join(decoder.feed(stream[i:i + 11]) for i in range(0, len(stream), 11))
+    assert len(pcm) == 20 + 768 + 2 - 96
+    assert decoder.packets == 3
+
+    # 下一个会话的流重新以OpusHead开头
+    assert len(decoder.feed(build_stream(pre_skip=0))) == 20 + 768 + 2
+
+def test_decode_audio_stream_selects_by_format():
+    async def chunks(*items: bytes):
+        for item in items:
+            yield item
+
+    async def run():
+        assert [c async for c in decode_audio_stream(chunks(b"\x00\x01"), "pcm", 24000)] == [b"\x00\x01"]
+        with pytest.raises(ValueError):
+            [c async for c in decode_audio_stream(chunks(b"ID3"), "mp3", 24000)]
+
+    asyncio.run(run())
+    with pytest.raises(ValueError):
+        OggOpusDecoder(22050, decoder_factory=FakeOpusDecoder)
+
+async def run_benchmark(config_path: str, text: str, repeat: int):
+    """请求真实的豆包TTS，对比pcm与ogg_opus的传输码率与首个可播放PCM块的延迟（需要opuslib与libopus）"""
+    from core.component.tts.doubao import AsyncDouBaoTTSClient
+    with open(config_path, "r", encoding="utf-8") as f:
+        tts_config = yaml.safe_load(f)["TTS"]["DouBaoTTS"]
+
+    async def text_stream():
+        yield text
+
+    for audio_format in ("pcm", "ogg_opus"):
+        client = AsyncDouBaoTTSClient({**tts_config, "audio_format": audio_format, "pool_size": 1})
+        await client.init()
+        received, pcm_bytes, first_ms = 0, 0, []
+        try:
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+
+                async def counted():
+                    nonlocal received
+                    async for chunk in client.astream_tts(text_stream()):
+                        received += len(chunk)
+                        yield chunk
+
+                first = None
+                async for pcm in decode_audio_stream(counted(), audio_format, client.audio_sample_rate):
+                    if first is None:
+                        first = (time.perf_counter() - start_time) * 1000
+                    pcm_bytes += len(pcm)
+                first_ms.append(first or 0.0)
+        finally:
+            await client.close()
+        duration_s = pcm_bytes / 2 / client.audio_sample_rate
+        print(f"{audio_format:<9} 码率: {received * 8 / duration_s / 1000:7.1f} kbit/s   "
+              f"传输: {received / repeat / 1024:7.1f} KB/条   首个PCM块: {sorted(first_ms)[len(first_ms) // 2]:7.1f} ms（中位数）")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--config', type=str, default='./config.yml')
+    parser.add_argument('--text', type=str, default='今天深圳天气晴，最高气温二十八度，适合出门散步。')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.config, args.text, args.repeat))
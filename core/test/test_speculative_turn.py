@@ -0,0 +1,119 @@
+import asyncio
+from typing import List, Dict
+from core.component.llm.llm_client import AsyncBaseLLMClient, ToolCallDispatcher
+from core.component.llm.memory import ConversationMemory
+from core.service.speculative import SpeculativeTurn, SpeculationStats
+
+class FakeLLMClient:
+    def __init__(self, reply: str = "好的，明天深圳晴。", token_interval: float = 0.01):
+        self.reply = reply
+        self.token_interval = token_interval
+
+    async def astream_chat(self, messages: List[Dict[str, str]], session_id: str, print_stream: bool = False):
+        response = ""
+        try:
+            for ch in self.reply:
+                await asyncio.sleep(self.token_interval)
+                response += ch
+                yield ch
+        finally:
+            messages.append({"role": "assistant", "content": response})
+
+class FakeToolHandler:
+    def __init__(self):
+        self.calls = []
+
+    def get_tool_definitions(self):
+        return []
+
+    async def aexecute_tool(self, tool_name: str, tool_args) -> str:
+        self.calls.append(tool_name)
+        return "深圳：晴"
+
+class FakeToolLLMClient(AsyncBaseLLMClient):
+    """先发起一次工具调用，拿到结果后输出回复"""
+    async def astream_chat(self, messages: List[Dict[str, str]], session_id: str, print_stream: bool = False):
+        dispatcher = ToolCallDispatcher(self, messages)
+        try:
+            await asyncio.sleep(0.01)
+            dispatcher.dispatch(0, "get_current_weather", '{"city": "深圳"}')
+            (success, result), = await dispatcher.gather([0])
+            for ch in f"{result}。":
+                yield ch
+        finally:
+            dispatcher.cancel()
+
+    async def acomplete(self, messages: List[Dict[str, str]]) -> str:
+        return ""
+
+def fake_recognize(text: str):
+    async def recognize(speech_chunks, session_id):
+        await asyncio.sleep(0.01)
+        return text
+    return recognize
+
+def test_accepted_speculation_reuses_generated_tokens():
+    async def run():
+        memory = ConversationMemory("system")
+        stats = SpeculationStats()
+        turn = SpeculativeTurn(fake_recognize("明天天气怎么样？"), FakeLLMClient(), memory, [b""], "s1")
+        # 端点检测确认之前，LLM已经开始生成
+        await asyncio.sleep(0.08)
+        assert turn.generated
+        assert await turn.transcript() == "明天天气怎么样？"
+        assert turn.matches("明天天气怎么样")
+        stats.record_accepted(turn)
+        memory.add_user_message(turn.text, turn.user_message)
+        reply = "".join([t async for t in turn.stream()])
+        memory.commit(turn.messages)
+        stats.record_reply(memory.last_reply())
+        return memory, reply, stats
+
+    memory, reply, stats = asyncio.run(run())
+    assert reply == "好的，明天深圳晴。"
+    assert memory.last_reply() == reply
+    assert [m["role"] for m in memory.turns[-1]] == ["user", "assistant"]
+    summary = stats.summary()
+    assert summary["accepted"] == 1 and summary["avg_gained_ms"] > 0 and summary["wasted_token_ratio"] == 0
+
+def test_rejected_speculation_is_cancelled_and_counted_as_waste():
+    async def run():
+        memory = ConversationMemory("system")
+        stats = SpeculationStats()
+        turn = SpeculativeTurn(fake_recognize("明天天气"), FakeLLMClient(), memory, [b""], "s1")
+        await asyncio.sleep(0.05)
+        await turn.transcript()
+        assert not turn.matches("明天天气怎么样")
+        await turn.cancel()
+        stats.record_discarded(turn, aborted=False)
+        stats.record_reply("后天深圳有雨。")
+        return memory, stats
+
+    memory, stats = asyncio.run(run())
+    # 推测的用户消息没有进入对话记忆
+    assert memory.turns == []
+    summary = stats.summary()
+    assert summary["rejected"] == 1 and 0 < summary["wasted_token_ratio"] < 1
+
+def test_tool_calls_wait_until_speculation_is_accepted():
+    async def run():
+        # 未被采纳：推测期间发起的工具调用从未执行
+        handler = FakeToolHandler()
+        client = FakeToolLLMClient()
+        client.config_tool_call(handler)
+        turn = SpeculativeTurn(fake_recognize("明天天气"), client, ConversationMemory("system"), [b""], "s1")
+        await asyncio.sleep(0.1)
+        await turn.transcript()
+        assert not turn.matches("明天天气怎么样")
+        await turn.cancel()
+        assert handler.calls == [] and not turn.generated
+
+        # 采纳：工具调用在采纳后才执行，回复与正常路径一致
+        turn = SpeculativeTurn(fake_recognize("深圳天气"), client, ConversationMemory("system"), [b""], "s2")
+        await asyncio.sleep(0.1)
+        assert handler.calls == []
+        assert turn.matches("深圳天气")
+        reply = "".join([t async for t in turn.stream()])
+        assert handler.calls == ["get_current_weather"] and reply == "深圳：晴。"
+
+    asyncio.run(run())
@@ -0,0 +1,131 @@
+import asyncio
+import argparse
+from core.component.audio.spoken import SpokenTextTracker
+from core.component.llm.memory import ConversationMemory
+from core.component.tts.doubao_codec import EVENT_TTSSentenceStart, EVENT_TTSSentenceEnd
+from core.component.tts.sherpa import AsyncSherpaOnnxTTSClient
+from core.test.mock.tts_server import MockTTSServer
+from core.test.test_doubao_tts_mock_server import text_stream, create_client, SAMPLE_RATE
+from core.test.test_local_tts import FakeEngine
+
+SCRIPT = {"first_byte_ms": 20, "rtf": 0.1, "chunk_ms": 100, "ms_per_char": 200}
+REPLY = ("好的，", "今天深圳晴。", "最高气温二十八度。")
+BYTES_PER_CHAR = 200 * SAMPLE_RATE // 1000 * 2     # 模拟服务器每字200ms
+
+async def synthesize(tts_client, texts, server: MockTTSServer = None, drop_after: int = 0) -> SpokenTextTracker:
+    """合成texts并记录分句边界，drop_after > 0时在收到该数量的音频块后由服务端断开所有连接"""
+    tracker = SpokenTextTracker(SAMPLE_RATE)
+    count = 0
+    async for _ in tracker.track_audio(tts_client.astream_tts(tracker.track_text(text_stream(*texts)), tracker.on_sentence)):
+        count += 1
+        if count == drop_after:
+            await server.drop_connections()
+    return tracker
+
+def test_sentence_boundaries_align_with_audio_from_doubao_mock():
+    async def run():
+        server = MockTTSServer(SCRIPT)
+        port = await server.start()
+        client = create_client(port)
+        try:
+            await client.init()
+            tracker = await synthesize(client, REPLY)
+            # 每句的字节区间与模拟服务器按字数生成的音频一致
+            assert [sentence[0] for sentence in tracker.sentences] == list(REPLY)
+            assert [(start, end) for _, start, end in tracker.sentences] == [
+                (0, 3 * BYTES_PER_CHAR), (3 * BYTES_PER_CHAR, 9 * BYTES_PER_CHAR), (9 * BYTES_PER_CHAR, 18 * BYTES_PER_CHAR)
+            ]
+            assert tracker.spoken_text(0) == ""
+            assert tracker.spoken_text(tracker.audio_bytes) == "".join(REPLY)
+            # 第二句播放到一半：前一句完整，当前句按播放比例截取
+            assert tracker.spoken_text(6 * BYTES_PER_CHAR) == "好的，今天深"
+            assert tracker.unspoken_chars(6 * BYTES_PER_CHAR) == 12
+
+            # 连接在第二句中途断开：恢复的会话不重复通知已经通知过的分句事件
+            resumed = await synthesize(client, REPLY, server, drop_after=6)
+            assert resumed.sentences == tracker.sentences
+        finally:
+            await client.close()
+            await server.stop()
+
+    asyncio.run(run())
+
+def test_per_segment_backend_reports_each_segment_as_a_sentence():
+    async def run():
+        client = AsyncSherpaOnnxTTSClient({"audio_sample_rate": SAMPLE_RATE}, engine=FakeEngine(sample_rate=SAMPLE_RATE, sentence_delay=0))
+        try:
+            tracker = await synthesize(client, ["你好。", "再见。"])
+        finally:
+            await client.close()
+        # FakeEngine每字0.1秒
+        assert tracker.sentences == [["你好。", 0, 4800 * 2], ["再见。", 4800 * 2, 4800 * 4]]
+        assert tracker.spoken_text(4800 * 3) == "你好。再"
+
+    asyncio.run(run())
+
+def test_sentence_without_text_uses_segments_and_estimates_unfinished_sentence():
+    tracker = SpokenTextTracker(16000, chars_per_second=5)
+    tracker.texts = ["第一句。", "第二句话还没有合成完。"]
+    tracker.on_sentence(EVENT_TTSSentenceStart, "")
+    tracker.audio_bytes = 32000
+    tracker.on_sentence(EVENT_TTSSentenceEnd, "")
+    tracker.on_sentence(EVENT_TTSSentenceStart, "")
+    tracker.audio_bytes = 48000
+    assert [sentence[0] for sentence in tracker.sentences] == tracker.texts
+    # 第二句尚无句末：播放了0.4秒，按每秒5字估算听到2个字
+    assert tracker.spoken_text(32000 + 12800) == "第一句。第二"
+
+def test_commit_truncates_interrupted_reply_to_spoken_text():
+    memory = ConversationMemory("system")
+    memory.add_user_message("深圳天气怎么样？")
+    messages = memory.build_prompt()
+    messages.append({"role": "assistant", "content": "好的，今天深圳晴。\n最高气温二十八度，适合出门。"})
+    memory.commit(messages, "好的，今天深圳晴。最高")
+    assert memory.last_reply() == "好的，今天深圳晴。\n最高"
+    assert messages[-1]["content"].endswith("适合出门。")
+
+    # 一个字都没有听到：不记入回复
+    memory.add_user_message("明天呢？")
+    messages = memory.build_prompt()
+    messages.append({"role": "assistant", "content": "明天有雨。"})
+    memory.commit(messages, "")
+    assert [message["role"] for message in memory.turns[-1]] == ["user"]
+
+    # LLM的生成被取消、尚未追加回复：按听到的文本补记，保留工具调用
+    memory.add_user_message("查一下北京。")
+    messages = memory.build_prompt()
+    messages.append({"role": "assistant", "content": None, "tool_calls": [
+        {"id": "call_0", "type": "function", "function": {"name": "get_current_weather", "arguments": '{"city": "北京"}'}}
+    ]})
+    messages.append({"role": "tool", "name": "get_current_weather", "content": "北京：多云", "tool_call_id": "call_0"})
+    memory.commit(messages, "北京多云")
+    assert [message["role"] for message in memory.turns[-1]] == ["user", "assistant", "tool", "assistant"]
+    assert memory.last_reply() == "北京多云"
+
+    # 关闭截断时保留完整回复
+    memory = ConversationMemory("system", {"truncate_interrupted": False})
+    memory.add_user_message("你好")
+    messages = memory.build_prompt()
+    messages.append({"role": "assistant", "content": "你好呀，有什么可以帮你？"})
+    memory.commit(messages, "你好呀")
+    assert memory.last_reply() == "你好呀，有什么可以帮你？"
+
+def run_benchmark(turns: int, heard_ratio: float):
+    """模拟每轮回复都只播放了heard_ratio就被打断，对比截断与否时每轮的prompt token数"""
+    reply = "好的，我来为你查询一下。今天深圳晴，最高气温二十八度，最低二十度，空气质量良好，适合出门散步或者运动。"
+    for truncate in (False, True):
+        memory = ConversationMemory("你是一个语音助手。", {"max_turns": 1000, "max_tokens": 10 ** 6, "truncate_interrupted": truncate})
+        for i in range(turns):
+            memory.add_user_message(f"第{i}轮：今天深圳天气怎么样？")
+            messages = memory.build_prompt()
+            messages.append({"role": "assistant", "content": reply})
+            memory.commit(messages, reply[:int(len(reply) * heard_ratio)])
+        print(f"{'截断' if truncate else '不截断'}：{turns}轮后prompt约 {memory.prompt_tokens()} token，"
+              f"最近一条回复: {memory.last_reply()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--turns', type=int, default=8)
+    parser.add_argument('--heard-ratio', type=float, default=0.3, help='每轮回复被打断前播放的比例')
+    args = parser.parse_args()
+    run_benchmark(args.turns, args.heard_ratio)
@@ -0,0 +1,135 @@
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from typing import List
+from core.component.segmenter import LatencyAwareSegmenter
+
+async def fake_llm_stream(text: str, token_interval: float = 0.0, stall_after: int = -1, stall: float = 0.0, seed: int = 0):
+    """模拟LLM的token流：每次输出1~3个字符"""
+    rng = random.Random(seed)
+    i = 0
+    count = 0
+    while i < len(text):
+        size = rng.randint(1, 3)
+        if count == stall_after:
+            await asyncio.sleep(stall)
+        elif token_interval:
+            await asyncio.sleep(token_interval)
+        yield text[i:i + size]
+        i += size
+        count += 1
+
+def segment(text: str, config: dict = None, **stream_kwargs) -> List[str]:
+    async def run():
+        segmenter = LatencyAwareSegmenter(config)
+        return [s async for s in segmenter.asegment(fake_llm_stream(text, **stream_kwargs))]
+    return asyncio.run(run())
+
+def test_first_clause_fast_then_sentences():
+    text = "好的，今天深圳是晴天。气温大约二十六度，湿度百分之六十。很适合出门散步，记得带上水哦！"
+    segments = segment(text)
+    assert "".join(segments) == text
+    # 首段在第一个逗号处就输出
+    assert segments[0] == "好的，"
+    # 后续段都在句末标点处结束
+    assert all(s[-1] in "。！" for s in segments[1:])
+    assert len(segments) < len(text) / 2
+
+def test_short_sentences_are_merged():
+    segments = segment("你好。在吗？我在。你说吧，我听着呢。", {"first_min_chars": 2, "min_chars": 8})
+    assert segments[0] == "你好。"
+    assert all(len(s) >= 8 for s in segments[1:-1])
+
+def test_english_numbers_and_abbreviations():
+    text = "Hi Mr. Smith, the price is 3.5 dollars. It opens at 12:30, e.g. after lunch. See you!"
+    segments = segment(text, {"min_chars": 10})
+    assert segments[0] == "Hi Mr. Smith,"
+    assert "the price is 3.5 dollars." in segments
+    assert "It opens at 12:30, e.g. after lunch." in segments
+
+def test_max_chars_forces_cut():
+    text = "这是一段没有句号但是有逗号的很长的文本，会一直说下去，" * 4
+    segments = segment(text, {"max_chars": 30})
+    assert all(len(s) <= 30 for s in segments)
+    assert "".join(segments) == text
+
+def test_max_wait_flushes_stalled_stream():
+    async def run():
+        segmenter = LatencyAwareSegmenter({"first_max_wait_ms": 50})
+        stream = fake_llm_stream("嗯让我想想看这个问题", stall_after=2, stall=0.5)
+        start_time = time.perf_counter()
+        async for s in segmenter.asegment(stream):
+            return s, time.perf_counter() - start_time
+    first, elapsed = asyncio.run(run())
+    # 没有标点且上游停顿时，到达最长等待时间后立即输出已有文本
+    assert first and elapsed < 0.3
+
+def test_blank_tokens_before_tool_pause_do_not_spin(monkeypatch):
+    waits = []
+    original_wait = asyncio.wait
+
+    async def counting_wait(*args, **kwargs):
+        waits.append(kwargs.get("timeout"))
+        return await original_wait(*args, **kwargs)
+
+    async def stream():
+        for token in ("好的，", "请稍等一下，我现在帮你查询深圳的天气。", "\n\n"):
+            yield token
+        # 工具调用期间LLM没有输出
+        await asyncio.sleep(0.5)
+        yield "深圳今天晴。"
+
+    async def run():
+        segmenter = LatencyAwareSegmenter({"max_wait_ms": 50})
+        return [s async for s in segmenter.asegment(stream())]
+
+    monkeypatch.setattr(asyncio, "wait", counting_wait)
+    segments = asyncio.run(run())
+    assert segments == ["好的，", "请稍等一下，我现在帮你查询深圳的天气。", "深圳今天晴。"]
+    # 缓冲区只有空白时不计时，停顿期间只等待下一个token，而不是以0超时反复轮询
+    assert len(waits) < 10
+
+async def legacy_segments(text_stream):
+    """改造前LLM客户端内置的分段规则：累积到2个字符或遇到标点即输出"""
+    buffer = ""
+    async for content in text_stream:
+        buffer += content
+        if any(p in content for p in ["，", "。", "！", "？", "\n"]) or len(buffer) >= 2:
+            yield buffer
+            buffer = ""
+    if buffer:
+        yield buffer
+
+async def measure(segment_stream) -> tuple:
+    start_time = time.perf_counter()
+    first_ms = None
+    frames = 0
+    async for _ in segment_stream:
+        if first_ms is None:
+            first_ms = (time.perf_counter() - start_time) * 1000
+        frames += 1
+    return first_ms, frames
+
+async def run_benchmark(replies: int, token_interval_ms: float):
+    """对比改造前后：首个文本段送入TTS的延迟（首音频延迟中分段器贡献的部分），以及每条回复的TTS帧数"""
+    text = "好的，我帮你看了一下，今天深圳是晴天，气温二十六度左右。下午可能会有阵风，出门记得带件外套。如果要去海边的话，防晒也别忘了哦！"
+    results = {"legacy": [], "latency_aware": []}
+    for i in range(replies):
+        interval = token_interval_ms / 1000
+        results["legacy"].append(await measure(legacy_segments(fake_llm_stream(text, interval, seed=i))))
+        segmenter = LatencyAwareSegmenter()
+        results["latency_aware"].append(await measure(segmenter.asegment(fake_llm_stream(text, interval, seed=i))))
+
+    for name, values in results.items():
+        first_ms = [v[0] for v in values]
+        frames = [v[1] for v in values]
+        print(f"{name:<14} 首段延迟中位数: {statistics.median(first_ms):7.1f} ms   每条回复TTS帧数: {statistics.mean(frames):5.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--replies', type=int, default=10, help='模拟的回复条数')
+    parser.add_argument('--token-interval-ms', type=float, default=30, help='模拟的LLM token间隔')
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.replies, args.token_interval_ms))
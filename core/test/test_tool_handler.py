@@ -0,0 +1,56 @@
+import time
+import asyncio
+from core.tools.handler import ToolHandler
+
+class FakeConfig:
+    """不启用任何内置工具，由测试直接注册处理方法"""
+    def get_tools_list(self):
+        return []
+
+def create_handler(timeout: float = 1.0) -> ToolHandler:
+    handler = ToolHandler(FakeConfig())
+
+    async def ahandle_slow_weather(args, session):
+        await asyncio.sleep(args.get("delay", 0))
+        return f"{args['city']}：晴"
+
+    def handle_slow_time(args):
+        time.sleep(args.get("delay", 0))
+        return "12:00"
+
+    handler.available_async_tools["slow_weather"] = ahandle_slow_weather
+    handler.available_tools["slow_time"] = handle_slow_time
+    handler.tool_timeouts.update({"slow_weather": timeout, "slow_time": timeout})
+    return handler
+
+def test_tool_timeout_returns_error_message():
+    async def run():
+        handler = create_handler(timeout=0.1)
+        try:
+            start_time = time.perf_counter()
+            # 异步工具与线程池中的同步工具超时后都立即返回错误信息，不等待工具执行完
+            assert await handler.aexecute_tool("slow_weather", '{"city": "深圳", "delay": 1}') == "工具执行超时: slow_weather"
+            assert await handler.aexecute_tool("slow_time", '{"delay": 0.5}') == "工具执行超时: slow_time"
+            assert time.perf_counter() - start_time < 0.5
+            assert await handler.aexecute_tool("slow_weather", '{"city": "深圳"}') == "深圳：晴"
+            assert await handler.aexecute_tool("unknown", "{}") == "未知的工具: unknown"
+            assert (await handler.aexecute_tool("slow_weather", "not json")).startswith("工具执行错误")
+        finally:
+            await handler.close()
+
+    asyncio.run(run())
+
+def test_concurrent_tool_calls_overlap():
+    async def run():
+        handler = create_handler()
+        try:
+            for tool_name, args in (("slow_weather", '{"city": "深圳", "delay": 0.3}'), ("slow_time", '{"delay": 0.3}')):
+                start_time = time.perf_counter()
+                results = await asyncio.gather(handler.aexecute_tool(tool_name, args), handler.aexecute_tool(tool_name, args))
+                # 两次调用同时执行，总耗时接近单次调用
+                assert results[0] == results[1]
+                assert time.perf_counter() - start_time < 0.5
+        finally:
+            await handler.close()
+
+    asyncio.run(run())
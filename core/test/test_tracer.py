@@ -0,0 +1,101 @@
+import os
+import json
+import time
+import asyncio
+import tempfile
+from core.utils.tracer import (
+    TurnTracer, current_session, percentile,
+    MARK_ASR_DONE, MARK_LLM_FIRST_TOKEN, MARK_TTS_FIRST_BYTE, MARK_FIRST_SPEAKER_SAMPLE
+)
+
+def test_finish_turn_writes_stage_latencies():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "trace", "turns.jsonl")
+        tracer = TurnTracer({"path": path})
+        tracer.start_turn("s1")
+        time.sleep(0.01)
+        tracer.mark(MARK_ASR_DONE, "s1")
+        tracer.mark(MARK_LLM_FIRST_TOKEN, "s1")
+        # 同名时间点只记录第一次
+        time.sleep(0.01)
+        tracer.mark(MARK_LLM_FIRST_TOKEN, "s1")
+        record = tracer.finish_turn("s1", interrupted=False)
+        tracer.close()
+
+        assert record[MARK_ASR_DONE] >= 10
+        assert record[MARK_LLM_FIRST_TOKEN] < 20
+        assert MARK_TTS_FIRST_BYTE not in record
+        assert record["interrupted"] is False
+        with open(path, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        assert lines == [record]
+        # 已结束的轮次不再接受打点
+        assert tracer.finish_turn("s1") is None
+
+def test_current_session_is_used_by_components_without_session_id():
+    async def run():
+        tracer = TurnTracer()
+        tracer.start_turn("s1")
+
+        async def tts():
+            tracer.mark(MARK_TTS_FIRST_BYTE)
+
+        async def turn():
+            current_session.set("s1")
+            await tts()
+
+        await asyncio.create_task(turn())
+        # 当前协程之外没有设置current_session，打点被忽略
+        tracer.mark(MARK_FIRST_SPEAKER_SAMPLE)
+        return tracer.finish_turn("s1")
+
+    record = asyncio.run(run())
+    assert MARK_TTS_FIRST_BYTE in record
+    assert MARK_FIRST_SPEAKER_SAMPLE not in record
+
+def test_merge_speculative_turn():
+    tracer = TurnTracer()
+    # 推测执行的LLM先于端点开始生成
+    tracer.mark(MARK_LLM_FIRST_TOKEN, "spec")
+    time.sleep(0.005)
+    tracer.start_turn("final")
+    tracer.mark(MARK_ASR_DONE, "final")
+    tracer.merge("final", "spec")
+    # 合并后对原轮次的打点记到推测执行的轮次上
+    tracer.mark(MARK_FIRST_SPEAKER_SAMPLE, "final")
+    record = tracer.finish_turn("spec")
+    assert record["session_id"] == "spec"
+    assert record[MARK_LLM_FIRST_TOKEN] < 0
+    assert record[MARK_ASR_DONE] >= 0
+    assert MARK_FIRST_SPEAKER_SAMPLE in record
+
+def test_rolling_percentiles():
+    assert percentile([], 0.5) == 0.0
+    assert percentile(list(range(1, 101)), 0.5) == 50
+    assert percentile(list(range(1, 101)), 0.99) == 99
+    assert percentile([3.0], 0.99) == 3.0
+
+    tracer = TurnTracer({"window": 10, "report_every": 0})
+    for i in range(20):
+        tracer.start_turn(str(i))
+        tracer.mark(MARK_ASR_DONE, str(i))
+        tracer.finish_turn(str(i))
+    assert len(tracer.window[MARK_ASR_DONE]) == 10
+    assert set(tracer.percentiles()) == {MARK_ASR_DONE}
+    assert set(tracer.percentiles()[MARK_ASR_DONE]) == {"p50", "p90", "p99"}
+
+def test_tracing_overhead_is_negligible():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tracer = TurnTracer({"path": os.path.join(tmp_dir, "turns.jsonl"), "report_every": 0})
+        turns = 200
+        start_time = time.perf_counter()
+        for i in range(turns):
+            session_id = f"s{i}"
+            tracer.start_turn(session_id)
+            for name in (MARK_ASR_DONE, MARK_LLM_FIRST_TOKEN, MARK_TTS_FIRST_BYTE, MARK_FIRST_SPEAKER_SAMPLE):
+                tracer.mark(name, session_id)
+            tracer.finish_turn(session_id)
+        per_turn_ms = (time.perf_counter() - start_time) * 1000 / turns
+        tracer.close()
+    # 包括写入JSONL在内，每轮的追踪开销远小于1ms
+    assert per_turn_ms < 1.0
@@ -0,0 +1,118 @@
+import os
+import mmap
+import time
+import asyncio
+import tempfile
+from core.component.tts.cache import CachedTTSClient, TTSAudioCache, TTSAudioStore
+
+class FakeTTSClient:
+    """每个字合成为两个音频块，首块延迟first_chunk_delay秒"""
+    speaker = "fake"
+    audio_sample_rate = 24000
+    audio_format = "pcm"
+    speech_rate = 0
+
+    def __init__(self, first_chunk_delay: float = 0.02):
+        self.first_chunk_delay = first_chunk_delay
+        self.requests = []
+
+    async def astream_tts(self, text_stream):
+        async for text in text_stream:
+            self.requests.append(text)
+            await asyncio.sleep(self.first_chunk_delay)
+            for ch in text:
+                yield ch.encode()
+                yield ch.encode()
+
+async def text_stream(*texts: str):
+    for text in texts:
+        yield text
+
+async def synthesize(client, *texts: str) -> bytes:
+    return b"".join([chunk async for chunk in client.astream_tts(text_stream(*texts))])
+
+def test_repeated_segments_are_served_from_cache():
+    async def run():
+        inner = FakeTTSClient()
+        client = CachedTTSClient(inner, {"max_text_chars": 10, "chunk_bytes": 4})
+        long_text = "这是一个很长的分段，不值得缓存。"
+        assert await synthesize(client, "好的，", long_text) == "好好的的，，".encode() + "".join(ch * 2 for ch in long_text).encode()
+        assert await synthesize(client, "好的，", long_text) == "好好的的，，".encode() + "".join(ch * 2 for ch in long_text).encode()
+        # 短分段第二次命中缓存，长分段每次都请求TTS
+        assert inner.requests == ["好的，", long_text, long_text]
+        stats = client.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["bytes_saved"] == len("好好的的，，".encode())
+        assert stats["saved_ms"] >= 20
+
+    asyncio.run(run())
+
+def test_disk_store_survives_restart():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        async def run():
+            first = CachedTTSClient(FakeTTSClient(), {"cache_dir": cache_dir})
+            assert await synthesize(first, "你好") == "你你好好".encode()
+            assert len(os.listdir(cache_dir)) == 1
+
+            inner = FakeTTSClient()
+            second = CachedTTSClient(inner, {"cache_dir": cache_dir})
+            assert await synthesize(second, "你好") == "你你好好".encode()
+            assert inner.requests == []
+            assert second.stats()["hits"] == 1
+
+        asyncio.run(run())
+
+def test_interrupted_segment_is_not_cached():
+    async def run():
+        inner = FakeTTSClient()
+        client = CachedTTSClient(inner)
+        stream = client.astream_tts(text_stream("你好呀"))
+        await stream.__anext__()
+        await stream.aclose()
+        assert len(client.cache) == 0
+        assert await synthesize(client, "你好呀") == "你你好好呀呀".encode()
+        assert inner.requests == ["你好呀", "你好呀"]
+
+    asyncio.run(run())
+
+def test_memory_lru_is_bounded_by_bytes():
+    cache = TTSAudioCache(max_memory_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    assert cache.get("a") == b"12345"
+    # 超出容量时淘汰最久未使用的条目
+    cache.put("c", b"123")
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+def test_disk_store_is_bounded_and_maps_only_large_files():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        store = TTSAudioStore(cache_dir, max_bytes=300, mmap_min_bytes=100)
+        store.put("small", b"1" * 50)
+        store.put("large", b"2" * 200)
+        # 小文件读入内存，大文件内存映射
+        assert isinstance(store.get("small"), bytes)
+        assert isinstance(store.get("large"), mmap.mmap)
+
+        # 超出容量时删除最久未使用的文件：small刚被读取，large最久未使用
+        time.sleep(0.01)
+        store.get("small")
+        store.put("other", b"3" * 100)
+        assert store.get("large") is None
+        assert store.get("small") is not None and store.get("other") is not None
+        assert store.evicted == 1
+        # 重启后按磁盘上的文件重新统计容量
+        assert TTSAudioStore(cache_dir, max_bytes=300)._disk_bytes == 150
+
+def test_memory_lru_bounds_mapped_entries():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = TTSAudioCache(max_memory_bytes=10 ** 6, cache_dir=cache_dir, max_mapped=2)
+        cache.store.mmap_min_bytes = 10
+        for key in "abcd":
+            cache.store.put(key, key.encode() * 20)
+        cache.store.put("e", b"e")
+        for key in "abcde":
+            assert cache.get(key) is not None
+        # 只保留最近使用的两个内存映射，小文件以bytes保留
+        assert sorted(cache._entries) == ["c", "d", "e"]
+        assert cache._mapped == 2
@@ -0,0 +1,187 @@
+import time
+import asyncio
+import argparse
+import statistics
+import pytest
+from core.component.tts.doubao import AsyncDouBaoTTSClient
+from core.component.tts.parallel import ParallelTTSClient
+from core.component.tts.doubao_codec import EVENT_TTSSentenceStart, EVENT_TTSSentenceEnd
+from core.test.mock.tts_server import MockTTSServer
+from core.test.test_doubao_tts_mock_server import text_stream, SAMPLE_RATE
+
+# 合成速度与播放速度相同（实时率1.0）：串行合成时，后面分段的音频只能边合成边播放
+SCRIPT = {"first_byte_ms": 30, "rtf": 1.0, "chunk_ms": 50, "ms_per_char": 50}
+REPLY = ("好的，我来查一下。", "今天深圳晴，最高二十八度。", "最低二十度，空气质量良好。", "适合出门散步或者运动。")
+
+def create_client(port: int, pool_size: int) -> AsyncDouBaoTTSClient:
+    return AsyncDouBaoTTSClient({
+        "base_url": f"ws://127.0.0.1:{port}",
+        "audio_sample_rate": SAMPLE_RATE,
+        "pool_size": pool_size,
+    })
+
+class FakeTTS:
+    """每个分段输出两块音频，每块耗时delay秒；text在fail中时输出一块后报错"""
+    audio_format = "pcm"
+    audio_sample_rate = SAMPLE_RATE
+
+    def __init__(self, delay: float = 0.02, fail=()):
+        self.delay = delay
+        self.fail = fail
+        self.started = []
+        self.cancelled = []
+
+    async def astream_tts(self, text_stream, sentence_listener=None):
+        async for text in text_stream:
+            self.started.append(text)
+            try:
+                for i in range(2):
+                    await asyncio.sleep(self.delay)
+                    yield f"{text}{i}".encode()
+                    if text in self.fail:
+                        raise ConnectionError("connection lost")
+            except asyncio.CancelledError:
+                self.cancelled.append(text)
+                raise
+
+async def synthesize(client, texts):
+    return [bytes(chunk) async for chunk in client.astream_tts(text_stream(*texts))]
+
+def test_parallel_synthesis_keeps_order_and_is_faster_than_serial():
+    async def run():
+        server = MockTTSServer(SCRIPT)
+        port = await server.start()
+        inner = create_client(port, pool_size=4)
+        try:
+            await inner.init()
+            start_time = time.perf_counter()
+            serial = await synthesize(inner, REPLY)
+            serial_s = time.perf_counter() - start_time
+
+            client = ParallelTTSClient(inner, {"max_concurrency": 4})
+            events = []
+            start_time = time.perf_counter()
+            chunks = [bytes(chunk) async for chunk in client.astream_tts(
+                text_stream(*REPLY), lambda event, text: events.append((event, text)))]
+            parallel_s = time.perf_counter() - start_time
+            # 与串行合成逐字节一致，分句事件按输出顺序通知
+            assert b"".join(chunks) == b"".join(serial)
+            assert events == [(event, text) for text in REPLY for event in (EVENT_TTSSentenceStart, EVENT_TTSSentenceEnd)]
+            # 四个分段同时合成，耗时接近最长的一个分段
+            assert client.max_in_flight == 4
+            assert parallel_s < serial_s * 0.6
+            stats = client.stats()
+            assert stats["segments"] == 4 and stats["cancelled_segments"] == 0
+            assert stats["throughput"] > 1.5
+        finally:
+            await inner.close()
+            await server.stop()
+
+    asyncio.run(run())
+
+def test_concurrency_window_and_interruption_cancels_pending_segments():
+    async def run():
+        inner = FakeTTS(delay=0.2)
+        client = ParallelTTSClient(inner, {"max_concurrency": 2})
+        stream = client.astream_tts(text_stream("一", "二", "三", "四"))
+        assert await stream.__anext__() == "一0".encode()
+        await asyncio.sleep(0.05)
+        # 正在播放的分段与下一个分段同时合成，更后面的分段等待
+        assert inner.started == ["一", "二"]
+        # 打断：两个尚未合成完的分段都被取消
+        await stream.aclose()
+        assert sorted(inner.cancelled) == sorted(["一", "二"])
+        assert client.cancelled_segments == 2
+        assert client.stats()["max_in_flight"] == 2
+
+        # 输出完一个分段后，下一个分段才开始合成
+        inner = FakeTTS()
+        client = ParallelTTSClient(inner, {"max_concurrency": 2})
+        stream = client.astream_tts(text_stream("一", "二", "三", "四"))
+        chunks = [await stream.__anext__() for _ in range(3)]
+        assert chunks == ["一0".encode(), "一1".encode(), "二0".encode()]
+        await asyncio.sleep(0.01)
+        assert inner.started == ["一", "二", "三"]
+        await stream.aclose()
+        assert "三" in inner.cancelled
+
+    asyncio.run(run())
+
+def test_next_reply_after_interruption_does_not_cold_start():
+    async def run():
+        server = MockTTSServer(SCRIPT)
+        port = await server.start()
+        try:
+            for pool_size in (2, 4):
+                inner = create_client(port, pool_size=pool_size)
+                client = ParallelTTSClient(inner, {"max_concurrency": 2})
+                await client.init()
+                try:
+                    stream = client.astream_tts(text_stream(*REPLY))
+                    await stream.__anext__()
+                    # 打断：正在合成的两个分段所在的连接都进入排空状态
+                    await stream.aclose()
+                    assert client.cancelled_segments == 2
+                    # 下一轮回复立即开始：pool_size为2 * max_concurrency时仍有就绪的连接，否则需要现场建立连接
+                    chunks = [chunk async for chunk in client.astream_tts(text_stream(*REPLY[:2]))]
+                    assert chunks
+                    assert (inner.cold_starts == 0) == (pool_size == 4)
+                finally:
+                    await client.close()
+        finally:
+            await server.stop()
+
+    asyncio.run(run())
+
+def test_segment_error_surfaces_in_order():
+    async def run():
+        client = ParallelTTSClient(FakeTTS(fail=("二",)), {"max_concurrency": 3})
+        chunks = []
+        with pytest.raises(ConnectionError):
+            async for chunk in client.astream_tts(text_stream("一", "二", "三")):
+                chunks.append(bytes(chunk))
+        # 出错分段之前的音频全部输出，出错分段已输出的音频也保留
+        assert chunks == ["一0".encode(), "一1".encode(), "二0".encode()]
+
+    asyncio.run(run())
+
+async def run_benchmark(turns: int, script: dict):
+    """长回复在各并发度下的吞吐（每秒墙钟时间合成的音频秒数）与首包延迟，音频按输出速度消费、不等待播放"""
+    server = MockTTSServer(script)
+    port = await server.start()
+    reply = [
+        "好的，我来为你详细介绍一下今天深圳的天气情况。", "今天白天晴转多云，最高气温二十八度，最低气温二十度。",
+        "空气质量良好，紫外线较强，出门记得做好防晒。", "傍晚前后可能有短时阵雨，建议随身带一把伞。",
+        "明天气温略有下降，体感会更舒适一些。", "周末两天以晴为主，很适合和朋友一起去户外走走。",
+    ]
+    try:
+        for concurrency in (1, 2, 3, 4):
+            inner = create_client(port, pool_size=2 * concurrency)
+            client = ParallelTTSClient(inner, {"max_concurrency": concurrency})
+            await client.init()
+            first_ms = []
+            try:
+                for _ in range(turns):
+                    start_time = time.perf_counter()
+                    first = None
+                    async for _ in client.astream_tts(text_stream(*reply)):
+                        if first is None:
+                            first = (time.perf_counter() - start_time) * 1000
+                    first_ms.append(first)
+                stats = client.stats()
+            finally:
+                await client.close()
+            print(f"并发度 {concurrency}: 吞吐 {stats['throughput']:5.2f} 秒音频/秒   首包 p50 {statistics.median(first_ms):7.1f} ms   "
+                  f"音频共 {stats['audio_seconds']:.1f} s")
+    finally:
+        await server.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--turns', type=int, default=5)
+    parser.add_argument('--first-byte-ms', type=float, default=150)
+    parser.add_argument('--rtf', type=float, default=0.5)
+    parser.add_argument('--jitter-ms', type=float, default=20)
+    args = parser.parse_args()
+    script = {"first_byte_ms": args.first_byte_ms, "rtf": args.rtf, "jitter_ms": args.jitter_ms}
+    asyncio.run(run_benchmark(args.turns, script))
@@ -1,12 +1,18 @@
 import json
-from typing import List, Dict, Any
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any
 from core.utils.config import ConfigLoader
 from .weather import WeatherTool
 from .time_tool import TimeTool
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_TOOL_TIMEOUT = 5            # 单个工具调用的默认超时时间，单位为秒
+DEFAULT_TOOL_WORKERS = 4            # 执行同步工具的线程池大小
+DEFAULT_HTTP_POOL_SIZE = 20         # 工具共享的HTTP连接池大小
+
 class ToolHandler:
     def __init__(self, config: ConfigLoader):
         self.config = config
@@ -21,22 +27,31 @@ class ToolHandler:
         
         # 注册启用的工具
         self.available_tools = {}
+        # 异步版本的工具处理方法（ahandle_*），优先于同步版本使用
+        self.available_async_tools = {}
+        # 各工具函数的超时时间
+        self.tool_timeouts: Dict[str, float] = {}
         # 收集启用工具的函数定义
         self._tool_definitions = []
         
+        # 同步工具在线程池中执行，避免阻塞事件循环（如requests.get）
+        self._executor = ThreadPoolExecutor(max_workers=DEFAULT_TOOL_WORKERS, thread_name_prefix="tool")
+        # 异步工具共享的HTTP会话，首次使用时创建
+        self._http_session = None
+
         # 初始化启用的工具
         self._init_tools()
         
     def _init_tools(self):
         """初始化并注册工具"""
-        for tool_name in self.tools_list:
-            if tool_name not in self.tool_classes:
-                logger.warning(f"未知的工具类型: {tool_name}")
+        for tool_class_name in self.tools_list:
+            if tool_class_name not in self.tool_classes:
+                logger.warning(f"未知的工具类型: {tool_class_name}")
                 continue
                 
             try:
                 # 实例化工具
-                tool_instance = self.tool_classes[tool_name](self.config)
+                tool_instance = self.tool_classes[tool_class_name](self.config)
                 
                 # 获取工具的函数定义
                 tool_definitions = tool_instance.get_tool_definitions()
@@ -51,15 +66,18 @@ class ToolHandler:
                     if not tool_name:
                         logger.warning(f"工具定义缺少name: {tool_def}")
                         continue
+                    if hasattr(tool_instance, f"ahandle_{tool_name}"):
+                        self.available_async_tools[tool_name] = getattr(tool_instance, f"ahandle_{tool_name}")
                     if hasattr(tool_instance, f"handle_{tool_name}"):
                         self.available_tools[tool_name] = getattr(tool_instance, f"handle_{tool_name}")
-                    else:
+                    if tool_name not in self.available_tools and tool_name not in self.available_async_tools:
                         logger.warning(f"工具 {tool_name} 缺少处理方法: handle_{tool_name}")
+                    self.tool_timeouts[tool_name] = self.config.get_tool_config(tool_class_name).get("timeout", DEFAULT_TOOL_TIMEOUT)
                         
             except Exception as e:
                 import traceback
                 traceback.print_exc()
-                logger.error(f"初始化工具 {tool_name} 失败: {str(e)}")
+                logger.error(f"初始化工具 {tool_class_name} 失败: {str(e)}")
     
     def get_tool_definitions(self) -> List[Dict[str, Any]]:
         """获取所有注册的工具定义"""
@@ -79,5 +97,47 @@ class ToolHandler:
         except Exception as e:
             logger.error(f"执行工具 {tool_name} 失败: {str(e)}")
             return f"工具执行错误: {str(e)}"
-    
 
+    async def get_http_session(self):
+        """获取工具共享的aiohttp会话（带保活的连接池），首次调用时创建"""
+        if self._http_session is None or self._http_session.closed:
+            import aiohttp
+            self._http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=DEFAULT_HTTP_POOL_SIZE, ttl_dns_cache=300)
+            )
+        return self._http_session
+
+    async def aexecute_tool(self, tool_name: str, tool_args: str) -> str:
+        """异步执行指定的工具，超时或失败时返回错误信息
+
+        优先使用工具的异步处理方法（ahandle_*），并传入共享的HTTP会话；
+        仅有同步处理方法的工具在线程池中执行。
+        """
+        logger.debug(f"Tool Call, name: {tool_name}, args: {tool_args}")
+
+        if tool_name not in self.available_async_tools and tool_name not in self.available_tools:
+            logger.error(f"未知的工具: {tool_name}")
+            return f"未知的工具: {tool_name}"
+
+        timeout = self.tool_timeouts.get(tool_name, DEFAULT_TOOL_TIMEOUT)
+        try:
+            args = json.loads(tool_args) if isinstance(tool_args, str) else tool_args
+            if tool_name in self.available_async_tools:
+                session = await self.get_http_session()
+                coroutine = self.available_async_tools[tool_name](args, session)
+            else:
+                loop = asyncio.get_running_loop()
+                coroutine = loop.run_in_executor(self._executor, self.available_tools[tool_name], args)
+            return await asyncio.wait_for(coroutine, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"执行工具 {tool_name} 超时（{timeout}秒）")
+            return f"工具执行超时: {tool_name}"
+        except Exception as e:
+            logger.error(f"执行工具 {tool_name} 失败: {str(e)}")
+            return f"工具执行错误: {str(e)}"
+
+    async def close(self) -> None:
+        """关闭共享的HTTP会话与线程池"""
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+        self._executor.shutdown(wait=False)
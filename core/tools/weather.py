@@ -8,8 +8,9 @@ logger = logging.getLogger(__name__)
 class WeatherTool:
     def __init__(self, config: ConfigLoader):
         self.config = config
-        self.api_key = config.get_tool_config("Weather").get("Gaode", "api_key")
-        self.base_url = config.get_tool_config("Weather").get("Gaode", "base_url")
+        gaode_config = config.get_tool_config("Weather").get("Gaode", {})
+        self.api_key = gaode_config.get("api_key")
+        self.base_url = gaode_config.get("base_url")
 
         # 定义天气相关的函数
         self.tool_definitions = [
@@ -57,25 +58,35 @@ class WeatherTool:
         """获取所有注册的函数定义"""
         return self.tool_definitions
 
-    def _get_weather_data(self, city: str, weather_type: str = "base") -> Dict[str, Any]:
-        """
-            调用高德天气API获取天气数据
-            :param city: 城市名称（中文）
-            :param weather_type: 'base' 获取实时天气，'all' 获取天气预报
-            :return: 天气数据字典
-        """
+    def _build_params(self, city: str, weather_type: str) -> Dict[str, Any]:
+        """生成高德天气API的请求参数"""
         if not self.api_key:
             raise ValueError("高德API密钥未配置")
-        params = {
+        return {
             "key": self.api_key,  
             "city": city,
             "extensions": weather_type,
             "output": "JSON"
         }
-        
-        response = requests.get(self.base_url, params=params)
+
+    def _get_weather_data(self, city: str, weather_type: str = "base") -> Dict[str, Any]:
+        """
+            调用高德天气API获取天气数据
+            :param city: 城市名称（中文）
+            :param weather_type: 'base' 获取实时天气，'all' 获取天气预报
+            :return: 天气数据字典
+        """
+        response = requests.get(self.base_url, params=self._build_params(city, weather_type))
         return response.json()
 
+    async def _aget_weather_data(self, city: str, weather_type: str, session) -> Dict[str, Any]:
+        """
+            异步调用高德天气API获取天气数据，复用ToolHandler共享的HTTP连接池
+            :param session: aiohttp.ClientSession
+        """
+        async with session.get(self.base_url, params=self._build_params(city, weather_type)) as response:
+            return await response.json(content_type=None)
+
     def _format_current_weather(self, weather_data: Dict[str, Any]) -> str:
         """格式化实时天气信息"""
         if weather_data["status"] != "1" or weather_data["infocode"] != "10000":
@@ -125,3 +136,21 @@ class WeatherTool:
         
         weather_data = self._get_weather_data(city, "all")
         return self._format_weather_forecast(weather_data)
+
+    async def ahandle_get_current_weather(self, args: Dict[str, Any], session) -> str:
+        """异步处理实时天气查询"""
+        city = args.get("city")
+        if not city:
+            return "缺少城市参数"
+
+        weather_data = await self._aget_weather_data(city, "base", session)
+        return self._format_current_weather(weather_data)
+
+    async def ahandle_get_weather_forecast(self, args: Dict[str, Any], session) -> str:
+        """异步处理天气预报查询"""
+        city = args.get("city")
+        if not city:
+            return "缺少城市参数"
+
+        weather_data = await self._aget_weather_data(city, "all", session)
+        return self._format_weather_forecast(weather_data)
@@ -46,9 +46,13 @@ class ConfigLoader:
     def get_cls_config(self, cls: str):
         cls_name = self.get_cls_name(cls)
         if cls_name:
-            return self.all_cfg.get(cls, {}).get(cls_name, {})
+            return self.get_component_config(cls, cls_name)
         else:
             return {}
+
+    # 获取指定组件实现的配置，不要求该实现被选中
+    def get_component_config(self, cls: str, name: str):
+        return (self.all_cfg.get(cls, {}) or {}).get(name, {}) or {}
     
     # 获取用户想要启用的工具列表
     def get_tools_list(self) -> list[str]:
@@ -0,0 +1,95 @@
+import re
+import sys
+import argparse
+import subprocess
+from dataclasses import dataclass
+from typing import List, Optional
+
+# python -X importtime 的输出格式:
+# import time: self [us] | cumulative | imported package
+# import time:       123 |        456 |   encodings.utf_8
+_IMPORTTIME_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+@dataclass
+class ImportRecord:
+    """单个模块的导入耗时"""
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+def parse_importtime(stderr: str) -> List[ImportRecord]:
+    """解析 python -X importtime 输出到stderr的内容"""
+    records = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_PATTERN.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        # 顶层模块缩进为1个空格，每深一层多2个空格
+        records.append(ImportRecord(module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return records
+
+def measure_import_time(modules: List[str]) -> List[ImportRecord]:
+    """在全新的解释器中导入指定模块，返回每个模块的导入耗时
+
+    Args:
+        modules: 要导入的模块路径列表
+
+    Returns:
+        importtime 记录列表，按导入完成的顺序排列
+    """
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"导入模块失败: {result.stderr.strip().splitlines()[-1]}")
+    return parse_importtime(result.stderr)
+
+def format_report(records: List[ImportRecord], top: int = 15) -> str:
+    """按顶层包汇总导入耗时，生成文本报告"""
+    # 只统计depth为0的记录，其cumulative已包含子模块耗时，避免重复计算
+    packages = {}
+    for record in records:
+        if record.depth == 0:
+            package = record.module.split(".")[0]
+            packages[package] = packages.get(package, 0) + record.cumulative_us
+    total_us = sum(packages.values())
+
+    lines = [f"导入总耗时: {total_us / 1000:.1f} ms"]
+    for package, cumulative_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+        lines.append(f"  {package:<24} {cumulative_us / 1000:>9.1f} ms  {cumulative_us / max(total_us, 1):>6.1%}")
+    return "\n".join(lines)
+
+def total_import_ms(records: List[ImportRecord]) -> float:
+    return sum(record.cumulative_us for record in records if record.depth == 0) / 1000
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """统计 config.yml 所选组件的导入耗时，超出预算时返回非0"""
+    from core.utils.config import ConfigLoader
+    from core.component.factory import ComponentFactory
+
+    parser = argparse.ArgumentParser(description="统计所选组件的冷启动导入耗时")
+    parser.add_argument('--config', type=str, default='config.yml', help='Path to config file')
+    parser.add_argument('--top', type=int, default=15, help='展示耗时最多的前N个顶层包')
+    parser.add_argument('--budget-ms', type=float, default=None, help='导入耗时预算，单位为毫秒')
+    args = parser.parse_args(argv)
+
+    config = ConfigLoader(args.config)
+    modules = ["core.service"] + ComponentFactory.get_selected_modules(config)
+    print(f"导入模块: {', '.join(modules)}")
+
+    records = measure_import_time(modules)
+    print(format_report(records, args.top))
+
+    elapsed_ms = total_import_ms(records)
+    if args.budget_ms is not None and elapsed_ms > args.budget_ms:
+        print(f"超出导入耗时预算: {elapsed_ms:.1f} ms > {args.budget_ms:.1f} ms")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,56 @@
 import os
 import sys
 import logging
+import threading
 from contextlib import contextmanager
-from typing import Optional
+from typing import Optional, Dict, List, Callable
 from io import StringIO
 
+# 文件描述符重定向是进程级的：组件在多个线程中并行创建时，各线程的重定向同时生效，
+# 并发的dup2会互相覆盖保存的原始fd，导致stdout/stderr无法恢复。因此按fd引用计数：
+# 第一个进入的重定向生效，期间其他线程（或嵌套）的重定向沿用它，最后一个退出时恢复原始fd。
+# 锁只保护计数与dup2本身，不跨越被包裹的代码，各组件的创建互不阻塞；代价是并行期间各组件的底层输出会混在一起。
+_fd_lock = threading.Lock()
+_fd_state: Dict[int, List[int]] = {}   # fd -> [引用计数, 保存的原始fd]
+
+def _acquire_fd(fd: int, target: int) -> None:
+    """将fd重定向到target，已有重定向生效时沿用已有的重定向。须与_release_fd()成对调用"""
+    with _fd_lock:
+        state = _fd_state.get(fd)
+        if state is None:
+            _fd_state[fd] = [1, os.dup(fd)]
+            os.dup2(target, fd)
+        else:
+            state[0] += 1
+
+def _release_fd(fd: int) -> bool:
+    """引用计数减一，降为0时恢复原始fd
+
+    Returns:
+        是否已恢复原始fd
+    """
+    with _fd_lock:
+        state = _fd_state[fd]
+        state[0] -= 1
+        if state[0]:
+            return False
+        del _fd_state[fd]
+        os.dup2(state[1], fd)
+        os.close(state[1])
+        return True
+
+@contextmanager
+def _redirect_to_devnull(fd: int):
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    try:
+        _acquire_fd(fd, devnull)
+    finally:
+        os.close(devnull)
+    try:
+        yield
+    finally:
+        _release_fd(fd)
+
 @contextmanager
 def suppress_stderr():
     """
@@ -12,16 +58,8 @@ def suppress_stderr():
 
     用于抑制不必要的错误输出，比如ALSA lib的警告信息
     """
-    original_stderr_fd = os.dup(2)
-    devnull = os.open(os.devnull, os.O_WRONLY)
-    os.dup2(devnull, 2)
-    try:
+    with _redirect_to_devnull(2):
         yield
-    finally:
-        # 恢复原始 stderr
-        os.dup2(original_stderr_fd, 2)
-        os.close(original_stderr_fd)
-        os.close(devnull)
 
 @contextmanager
 def suppress_stdout():
@@ -30,16 +68,18 @@ def suppress_stdout():
 
     用于抑制不必要的标准输出，比如FunASR的debug信息
     """
-    original_stdout_fd = os.dup(1)
-    devnull = os.open(os.devnull, os.O_WRONLY)
-    os.dup2(devnull, 1)
-    try:
+    with _redirect_to_devnull(1):
         yield
-    finally:
-        # 恢复原始 stdout
-        os.dup2(original_stdout_fd, 1)
-        os.close(original_stdout_fd)
-        os.close(devnull)
+
+def _collect_lines(read_fd: int, level: Callable[[str], None]) -> None:
+    """在线程中持续读取管道（避免管道写满后阻塞写入方），写端全部关闭后再逐行记录到logger，
+    此时原始fd已经恢复，logger写到stderr的内容不会再流回管道"""
+    with os.fdopen(read_fd, 'r', errors='replace') as reader:
+        lines = reader.readlines()
+    for line in lines:
+        line = line.rstrip('\n')
+        if line:
+            level(line)
 
 @contextmanager
 def redirect_to_logger_low_level(logger: Optional[logging.Logger] = None):
@@ -60,43 +100,22 @@ def redirect_to_logger_low_level(logger: Optional[logging.Logger] = None):
     if logger is None:
         logger = logging.getLogger()
 
-    # 保存原始的文件描述符
-    old_stdout_fd = os.dup(1)
-    old_stderr_fd = os.dup(2)
-
-    # 创建管道（使用非阻塞模式）
-    stdout_r, stdout_w = os.pipe()
-    stderr_r, stderr_w = os.pipe()
-
+    readers = []
+    for fd, level in [(1, logger.info), (2, logger.error)]:
+        read_fd, write_fd = os.pipe()
+        try:
+            _acquire_fd(fd, write_fd)
+        finally:
+            # 立即关闭写入端：沿用其他重定向时管道没有写入方，读取线程随即结束
+            os.close(write_fd)
+        reader = threading.Thread(target=_collect_lines, args=(read_fd, level), name=f"redirect_fd{fd}", daemon=True)
+        reader.start()
+        readers.append(reader)
     try:
-        # 重定向标准输出和错误输出到管道
-        os.dup2(stdout_w, 1)
-        os.dup2(stderr_w, 2)
-        
-        # 立即关闭写入端
-        os.close(stdout_w)
-        os.close(stderr_w)
-
         yield
-
-        # 恢复原始的文件描述符
-        os.dup2(old_stdout_fd, 1)
-        os.dup2(old_stderr_fd, 2)
-
-        # 读取并记录输出
-        for reader, level in [(os.fdopen(stdout_r, 'r'), logger.info),
-                             (os.fdopen(stderr_r, 'r'), logger.error)]:
-            with reader:
-                while True:
-                    line = reader.readline()
-                    if not line:
-                        break
-                    line = line.rstrip('\n')
-                    if line:
-                        level(line)
-
     finally:
-        # 关闭所有剩余的文件描述符
-        os.close(old_stdout_fd)
-        os.close(old_stderr_fd)
-    
\ No newline at end of file
+        for fd, reader in zip([1, 2], readers):
+            # 恢复原始fd后管道的写端全部关闭，等待记录完剩余的输出；
+            # 仍有其他线程的重定向沿用该管道时，由读取线程在其结束后记录
+            if _release_fd(fd):
+                reader.join()
@@ -0,0 +1,161 @@
+import os
+import json
+import math
+import time
+import logging
+import threading
+from collections import deque, OrderedDict
+from contextvars import ContextVar
+from typing import Dict, Optional, Any, List, Deque
+
+logger = logging.getLogger(__name__)
+
+# 当前协程所处理的对话轮次，供不接收session_id参数的组件（如TTS）打点时使用
+current_session: ContextVar[Optional[str]] = ContextVar("current_session", default=None)
+
+# 一轮对话中依次经过的关键时间点
+MARK_ENDPOINT = "endpoint"                      # 端点检测判定用户说完话
+MARK_ASR_DONE = "asr_done"                      # 语音识别完成
+MARK_LLM_FIRST_TOKEN = "llm_first_token"        # LLM返回首token
+MARK_TTS_FIRST_BYTE = "tts_first_byte"          # TTS返回首个音频片段
+MARK_FIRST_SPEAKER_SAMPLE = "first_speaker_sample"  # 首个回复音频帧送入扬声器
+STAGES = [MARK_ASR_DONE, MARK_LLM_FIRST_TOKEN, MARK_TTS_FIRST_BYTE, MARK_FIRST_SPEAKER_SAMPLE]
+
+DEFAULT_WINDOW = 200            # 滚动百分位统计的窗口大小（轮数）
+DEFAULT_REPORT_EVERY = 20       # 每隔多少轮输出一次百分位统计
+MAX_OPEN_TURNS = 64             # 未结束的轮次上限，超出时丢弃最早的（如被中止的推测执行）
+
+def percentile(values: List[float], p: float) -> float:
+    """最近秩法计算百分位数"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, math.ceil(p * len(values)) - 1))]
+
+class TurnTracer:
+    """轻量的单轮端到端延迟追踪
+
+    各组件在关键时间点调用 mark(name, session_id)，同一轮中同名时间点只记录第一次；
+    轮次结束时 finish_turn() 计算各时间点相对端点的耗时，写入一行JSONL，并更新滚动百分位统计。
+    打点只是一次 perf_counter_ns() 与字典写入，可以在音频回调线程中调用。
+    """
+    def __init__(self, config: Optional[dict] = None):
+        self._lock = threading.Lock()
+        self._turns: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self._aliases: Dict[str, str] = {}
+        self._file = None
+        self.configure(config)
+
+    def configure(self, config: Optional[dict] = None) -> None:
+        config = config or {}
+        self.enabled: bool = config.get("enabled", True)
+        self.path: str = config.get("path", "")
+        self.report_every: int = config.get("report_every", DEFAULT_REPORT_EVERY)
+        self.window: Dict[str, Deque[float]] = {
+            name: deque(maxlen=config.get("window", DEFAULT_WINDOW)) for name in STAGES
+        }
+        self.finished = 0
+        self.close()
+
+    def _key(self, session_id: Optional[str]) -> Optional[str]:
+        session_id = session_id or current_session.get()
+        return self._aliases.get(session_id, session_id)
+
+    def start_turn(self, session_id: str) -> None:
+        """开始一轮对话，并记录端点时间"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._turns[session_id] = {MARK_ENDPOINT: time.perf_counter_ns()}
+            while len(self._turns) > MAX_OPEN_TURNS:
+                self._turns.popitem(last=False)
+
+    def mark(self, name: str, session_id: Optional[str] = None) -> None:
+        """记录一个时间点，session_id为空时使用current_session"""
+        if not self.enabled:
+            return
+        key = self._key(session_id)
+        if key is None:
+            return
+        now = time.perf_counter_ns()
+        with self._lock:
+            marks = self._turns.get(key)
+            if marks is None:
+                # 推测执行等尚未开始的轮次，先行记录
+                marks = self._turns[key] = {}
+                while len(self._turns) > MAX_OPEN_TURNS:
+                    self._turns.popitem(last=False)
+            marks.setdefault(name, now)
+
+    def merge(self, src: str, dst: str) -> None:
+        """将src轮次的时间点并入dst（取较早者），之后对src的打点都记到dst上
+
+        用于推测执行被采纳时：端点与最终识别记录在src上，LLM等阶段已经在dst上提前开始，
+        因此这些阶段相对端点的耗时可能为负。
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            src_marks = self._turns.pop(src, {})
+            dst_marks = self._turns.setdefault(dst, {})
+            for name, value in src_marks.items():
+                dst_marks[name] = min(value, dst_marks.get(name, value))
+            self._aliases[src] = dst
+
+    def discard(self, session_id: str) -> None:
+        """丢弃未完成的轮次，如被取消的推测执行"""
+        with self._lock:
+            self._turns.pop(session_id, None)
+
+    def finish_turn(self, session_id: str, **extra: Any) -> Optional[Dict[str, Any]]:
+        """结束一轮对话：计算各阶段相对端点的耗时（ms），写入JSONL并更新滚动统计"""
+        if not self.enabled:
+            return None
+        key = self._key(session_id)
+        with self._lock:
+            marks = self._turns.pop(key, None)
+            self._aliases = {src: dst for src, dst in self._aliases.items() if dst != key}
+        if not marks or MARK_ENDPOINT not in marks:
+            return None
+
+        endpoint = marks[MARK_ENDPOINT]
+        record: Dict[str, Any] = {"session_id": key, "ts": round(time.time(), 3)}
+        for name in STAGES:
+            if name in marks:
+                value = round((marks[name] - endpoint) / 1e6, 1)
+                record[name] = value
+                self.window[name].append(value)
+        record.update(extra)
+        self._write(record)
+
+        self.finished += 1
+        if self.report_every and self.finished % self.report_every == 0:
+            logger.info(f"端到端延迟统计（最近{len(self.window[MARK_FIRST_SPEAKER_SAMPLE])}轮，ms）: {self.percentiles()}")
+        return record
+
+    def percentiles(self) -> Dict[str, Dict[str, float]]:
+        """各阶段相对端点耗时的滚动p50/p90/p99"""
+        return {
+            name: {f"p{int(p * 100)}": percentile(list(values), p) for p in (0.5, 0.9, 0.99)}
+            for name, values in self.window.items() if values
+        }
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        if not self.path:
+            return
+        try:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self._file.flush()
+        except OSError as e:
+            logger.error(f"写入延迟追踪记录失败: {str(e)}")
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+# 全局的追踪器，由服务在启动时按配置调用 tracer.configure()
+tracer = TurnTracer()